@@ -0,0 +1,60 @@
+"""Add the `archive_watermarks` table used to resume interrupted archiving runs
+
+Revision ID: 3b8e1f0c4d27
+Revises: c03c5e3628e9
+Create Date: 2026-10-18 10:12:47.318204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b8e1f0c4d27'
+down_revision: Union[str, None] = 'c03c5e3628e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(engine_name: str) -> None:
+    globals()["upgrade_%s" % engine_name]()
+
+def downgrade(engine_name: str) -> None:
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_ecosystems() -> None:
+    pass
+
+def downgrade_ecosystems() -> None:
+    pass
+
+
+def upgrade_app() -> None:
+    pass
+
+def downgrade_app() -> None:
+    pass
+
+
+def upgrade_system() -> None:
+    pass
+
+def downgrade_system() -> None:
+    pass
+
+
+def upgrade_archive() -> None:
+    op.create_table('archive_watermarks',
+    sa.Column('table_name', sa.String(length=64), nullable=False),
+    sa.Column('cutoff', sa.DateTime(), nullable=False),
+    sa.Column('last_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('last_id', sa.Integer(), nullable=True),
+    sa.Column('completed', sa.Boolean(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+
+def downgrade_archive() -> None:
+    op.drop_table('archive_watermarks')
@@ -0,0 +1,76 @@
+"""Add the `sensor_activity` table summarizing the logged sensor records
+
+Revision ID: 5c7a0e2d9b14
+Revises: 8f2d6a91c5e3
+Create Date: 2026-10-18 16:03:22.871540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c7a0e2d9b14'
+down_revision: Union[str, None] = '8f2d6a91c5e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(engine_name: str) -> None:
+    globals()["upgrade_%s" % engine_name]()
+
+def downgrade(engine_name: str) -> None:
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_ecosystems() -> None:
+    op.create_table('sensor_activity',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('sensor_uid', sa.String(length=16), nullable=False),
+    sa.Column('measure', sa.String(length=32), nullable=False),
+    sa.Column('first_seen', sa.DateTime(), nullable=False),
+    sa.Column('last_seen', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['measure'], ['measures.name'], ),
+    sa.ForeignKeyConstraint(['sensor_uid'], ['hardware.uid'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('sensor_uid', 'measure', name='uq_sensor_activity_sensor_uid_measure')
+    )
+    with op.batch_alter_table('sensor_activity', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_sensor_activity_last_seen'), ['last_seen'], unique=False)
+
+    # Backfill the summary from the records already logged
+    op.execute(
+        "INSERT INTO sensor_activity (sensor_uid, measure, first_seen, last_seen, count) "
+        "SELECT sensor_uid, measure, MIN(timestamp), MAX(timestamp), COUNT(*) "
+        "FROM sensor_records GROUP BY sensor_uid, measure"
+    )
+
+def downgrade_ecosystems() -> None:
+    with op.batch_alter_table('sensor_activity', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_sensor_activity_last_seen'))
+
+    op.drop_table('sensor_activity')
+
+
+def upgrade_app() -> None:
+    pass
+
+def downgrade_app() -> None:
+    pass
+
+
+def upgrade_system() -> None:
+    pass
+
+def downgrade_system() -> None:
+    pass
+
+
+def upgrade_archive() -> None:
+    pass
+
+def downgrade_archive() -> None:
+    pass
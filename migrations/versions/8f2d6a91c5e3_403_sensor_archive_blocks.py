@@ -0,0 +1,74 @@
+"""Add the `sensor_records_archive_blocks` table storing compressed archived sensor data
+
+Revision ID: 8f2d6a91c5e3
+Revises: 3b8e1f0c4d27
+Create Date: 2026-10-18 14:41:05.529163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8f2d6a91c5e3'
+down_revision: Union[str, None] = '3b8e1f0c4d27'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(engine_name: str) -> None:
+    globals()["upgrade_%s" % engine_name]()
+
+def downgrade(engine_name: str) -> None:
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_ecosystems() -> None:
+    pass
+
+def downgrade_ecosystems() -> None:
+    pass
+
+
+def upgrade_app() -> None:
+    pass
+
+def downgrade_app() -> None:
+    pass
+
+
+def upgrade_system() -> None:
+    pass
+
+def downgrade_system() -> None:
+    pass
+
+
+def upgrade_archive() -> None:
+    op.create_table('sensor_records_archive_blocks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('ecosystem_uid', sa.String(length=8), nullable=False),
+    sa.Column('sensor_uid', sa.String(length=16), nullable=False),
+    sa.Column('measure', sa.String(length=32), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('start', sa.DateTime(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.Column('resolution', sa.Float(), nullable=False),
+    sa.Column('encoded_timestamps', sa.LargeBinary(), nullable=False),
+    sa.Column('encoded_values', sa.LargeBinary(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('ecosystem_uid', 'sensor_uid', 'measure', 'day', name='_no_repost_constraint')
+    )
+    with op.batch_alter_table('sensor_records_archive_blocks') as batch_op:
+        batch_op.create_index('ix_sensor_records_archive_blocks_ecosystem_uid', ['ecosystem_uid'], unique=False)
+        batch_op.create_index('ix_sensor_records_archive_blocks_sensor_uid', ['sensor_uid'], unique=False)
+        batch_op.create_index('ix_sensor_records_archive_blocks_day', ['day'], unique=False)
+
+def downgrade_archive() -> None:
+    with op.batch_alter_table('sensor_records_archive_blocks') as batch_op:
+        batch_op.drop_index('ix_sensor_records_archive_blocks_day')
+        batch_op.drop_index('ix_sensor_records_archive_blocks_sensor_uid')
+        batch_op.drop_index('ix_sensor_records_archive_blocks_ecosystem_uid')
+    op.drop_table('sensor_records_archive_blocks')
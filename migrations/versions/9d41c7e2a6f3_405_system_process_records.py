@@ -0,0 +1,71 @@
+"""Add the `system_process_records` table storing the resources used by each
+Ouranos process
+
+Revision ID: 9d41c7e2a6f3
+Revises: 5c7a0e2d9b14
+Create Date: 2026-10-18 21:12:40.318752
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d41c7e2a6f3'
+down_revision: Union[str, None] = '5c7a0e2d9b14'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(engine_name: str) -> None:
+    globals()["upgrade_%s" % engine_name]()
+
+def downgrade(engine_name: str) -> None:
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_ecosystems() -> None:
+    pass
+
+def downgrade_ecosystems() -> None:
+    pass
+
+
+def upgrade_app() -> None:
+    pass
+
+def downgrade_app() -> None:
+    pass
+
+
+def upgrade_system() -> None:
+    op.create_table('system_process_records',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('system_uid', sa.String(length=32), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('label', sa.String(length=64), nullable=False),
+    sa.Column('pid', sa.Integer(), nullable=False),
+    sa.Column('CPU_used', sa.Float(precision=1), nullable=False),
+    sa.Column('RAM_used', sa.Float(precision=3), nullable=False),
+    sa.Column('FD_count', sa.Integer(), nullable=True),
+    sa.Column('thread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['system_uid'], ['systems.uid'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('system_process_records', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_system_process_records_timestamp'), ['timestamp'], unique=False)
+
+def downgrade_system() -> None:
+    with op.batch_alter_table('system_process_records', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_system_process_records_timestamp'))
+
+    op.drop_table('system_process_records')
+
+
+def upgrade_archive() -> None:
+    pass
+
+def downgrade_archive() -> None:
+    pass
@@ -0,0 +1,82 @@
+"""Add the `system_records_hourly` table storing the hourly roll-ups of the
+system data, and index the `system_records` by system and timestamp
+
+Revision ID: e58b3f1c7a20
+Revises: 9d41c7e2a6f3
+Create Date: 2026-10-18 23:04:12.581947
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e58b3f1c7a20'
+down_revision: Union[str, None] = '9d41c7e2a6f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade(engine_name: str) -> None:
+    globals()["upgrade_%s" % engine_name]()
+
+def downgrade(engine_name: str) -> None:
+    globals()["downgrade_%s" % engine_name]()
+
+
+def upgrade_ecosystems() -> None:
+    pass
+
+def downgrade_ecosystems() -> None:
+    pass
+
+
+def upgrade_app() -> None:
+    pass
+
+def downgrade_app() -> None:
+    pass
+
+
+def upgrade_system() -> None:
+    op.create_table('system_records_hourly',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('system_uid', sa.String(length=32), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.Column('samples', sa.Integer(), nullable=False),
+    sa.Column('CPU_used_min', sa.Float(precision=1), nullable=True),
+    sa.Column('CPU_used_mean', sa.Float(precision=1), nullable=True),
+    sa.Column('CPU_used_max', sa.Float(precision=1), nullable=True),
+    sa.Column('CPU_temp_min', sa.Float(precision=1), nullable=True),
+    sa.Column('CPU_temp_mean', sa.Float(precision=1), nullable=True),
+    sa.Column('CPU_temp_max', sa.Float(precision=1), nullable=True),
+    sa.Column('RAM_process_min', sa.Float(precision=2), nullable=True),
+    sa.Column('RAM_process_mean', sa.Float(precision=2), nullable=True),
+    sa.Column('RAM_process_max', sa.Float(precision=2), nullable=True),
+    sa.Column('RAM_used_min', sa.Float(precision=2), nullable=True),
+    sa.Column('RAM_used_mean', sa.Float(precision=2), nullable=True),
+    sa.Column('RAM_used_max', sa.Float(precision=2), nullable=True),
+    sa.Column('DISK_used_min', sa.Float(precision=2), nullable=True),
+    sa.Column('DISK_used_mean', sa.Float(precision=2), nullable=True),
+    sa.Column('DISK_used_max', sa.Float(precision=2), nullable=True),
+    sa.ForeignKeyConstraint(['system_uid'], ['systems.uid'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('system_uid', 'timestamp', name='uq_system_records_hourly_system_uid_timestamp')
+    )
+    with op.batch_alter_table('system_records', schema=None) as batch_op:
+        batch_op.create_index('ix_system_records_system_uid_timestamp', ['system_uid', 'timestamp'], unique=False)
+
+def downgrade_system() -> None:
+    with op.batch_alter_table('system_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_system_records_system_uid_timestamp')
+
+    op.drop_table('system_records_hourly')
+
+
+def upgrade_archive() -> None:
+    pass
+
+def downgrade_archive() -> None:
+    pass
@@ -1,19 +1,57 @@
-from datetime import datetime, timedelta, timezone
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import datetime
 from inspect import isclass
 from logging import getLogger, Logger
+from time import monotonic
+from typing import Callable, Sequence, TypedDict
 
-from sqlalchemy import delete
+from sqlalchemy import Column, ColumnElement, delete, Row, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ouranos import db, scheduler
+from ouranos import current_app, db, scheduler
 from ouranos.core.database.models import app, archives, gaia
-from ouranos.core.database.models.abc import ArchivableMixin, Base
+from ouranos.core.database.models.abc import ArchivableMixin, ArchiveMixin, Base
+from ouranos.core.database.models.archives import ArchiveWatermark
+
+
+class ArchivingProgress(TypedDict):
+    cutoff: datetime
+    oldest_record: datetime | None
+    lag: float  # in sec
+
+
+@dataclass
+class _ArchivingRun:
+    cutoff: datetime
+    last_key: tuple[datetime, int] | None = None
+    archived: int = 0
 
 
 class Archiver:
-    def __init__(self, *args, **kwargs) -> None:
+    # Number of rows copied and deleted per transaction
+    chunk_size: int = 500
+
+    def __init__(
+            self,
+            *args,
+            ingest_backlog: Callable[[], int] | None = None,
+            **kwargs,
+    ) -> None:
+        """
+        :param ingest_backlog: a callable returning the number of data
+                               payloads waiting to be written. Incremental
+                               archiving pauses when it is too high.
+        """
         super().__init__(*args, **kwargs)
         self.logger: Logger = getLogger("ouranos.aggregator")
         self._mapping: dict[str, dict[str, type[ArchivableMixin]]] | None = None
+        self._runs: dict[str, _ArchivingRun] = {}
+        self.ingest_backlog: Callable[[], int] | None = ingest_backlog
+        self.write_latency: float = 0.0
+        self.progress: dict[str, ArchivingProgress] = {}
 
     @property
     def mapping(self) -> dict[str, dict[str, type[ArchivableMixin]]]:
@@ -40,6 +78,8 @@ class Archiver:
             if (
                 isclass(Model)
                 and issubclass(Model, Base)
+                # Skip the abstract models
+                and hasattr(Model, "__table__")
             )
         }
         recent_models = {
@@ -62,28 +102,143 @@ class Archiver:
         return mapping
 
     @staticmethod
-    async def _get_archives(
-            session,
-            Model: type[ArchivableMixin],
-            time_limit,
-            offset: int,
-            per_page: int = 250,
-    ) -> list[dict]:
-        stmt = Model._generate_get_query(
-            offset=offset, limit=per_page,
-            order_by=Model.get_archive_column().asc())
-        stmt = stmt.where(Model.get_archive_column() < time_limit)
-        result = await session.execute(stmt)
+    def _get_archive_columns(
+            RecentModel: type[ArchivableMixin | Base],
+            ArchiveModel: type[ArchiveMixin | Base],
+    ) -> list[Column]:
         return [
-            row.to_dict()
-            for row in result.scalars()
+            column
+            for column in RecentModel.__table__.columns
+            if column.name in ArchiveModel.__table__.columns
         ]
 
+    @staticmethod
+    def _after_key(
+            Model: type[ArchivableMixin | Base],
+            last_key: tuple[datetime, int],
+    ) -> ColumnElement[bool]:
+        # Expanded row-value comparison so the timestamp index can be used
+        archive_column = Model.get_archive_column()
+        id_column = Model.__table__.c["id"]
+        return (
+            (archive_column > last_key[0])
+            | ((archive_column == last_key[0]) & (id_column > last_key[1]))
+        )
+
+    @staticmethod
+    async def _get_archives(
+            session: AsyncSession,
+            Model: type[ArchivableMixin | Base],
+            columns: list[Column],
+            time_limit: datetime,
+            last_key: tuple[datetime, int] | None,
+            per_page: int = 500,
+    ) -> Sequence[Row]:
+        archive_column = Model.get_archive_column()
+        stmt = (
+            select(*columns)
+            .where(archive_column < time_limit)
+            .order_by(archive_column.asc(), Model.__table__.c["id"].asc())
+            .limit(per_page)
+        )
+        if last_key is not None:
+            stmt = stmt.where(Archiver._after_key(Model, last_key))
+        result = await session.execute(stmt)
+        return result.all()
+
+    async def _start_run(
+            self,
+            data_name: str,
+            RecentModel: type[ArchivableMixin | Base],
+    ) -> _ArchivingRun:
+        async with db.scoped_session() as session:
+            watermark = await ArchiveWatermark.get(session, table_name=data_name)
+
+        if watermark is not None and not watermark.completed:
+            # Resume the interrupted run with its own cutoff
+            run = _ArchivingRun(cutoff=watermark.cutoff)
+            if watermark.last_timestamp is not None:
+                run.last_key = (watermark.last_timestamp, watermark.last_id)
+                self.logger.info(
+                    f"Resuming {data_name} data archiving from "
+                    f"{watermark.last_timestamp}")
+                # Rows copied before the interruption might not have been deleted
+                async with db.scoped_session() as session:
+                    async with session.begin():
+                        stmt = (
+                            delete(RecentModel)
+                            .where(RecentModel.get_archive_column() < run.cutoff)
+                            .where(~self._after_key(RecentModel, run.last_key))
+                        )
+                        await session.execute(stmt)
+            return run
+
+        run = _ArchivingRun(cutoff=RecentModel.get_archive_cutoff())
+        async with db.scoped_session() as session:
+            async with session.begin():
+                await ArchiveWatermark.update_or_create(
+                    session, table_name=data_name,
+                    values={"cutoff": run.cutoff, "completed": False},
+                )
+        return run
+
+    async def _archive_chunk(
+            self,
+            data_name: str,
+            RecentModel: type[ArchivableMixin | Base],
+            ArchiveModel: type[ArchiveMixin | Base],
+            run: _ArchivingRun,
+            per_page: int,
+    ) -> int:
+        columns = self._get_archive_columns(RecentModel, ArchiveModel)
+        async with db.scoped_session() as session:
+            to_archive = await self._get_archives(
+                session, RecentModel, columns, run.cutoff, run.last_key, per_page)
+        if not to_archive:
+            return 0
+        last_row = to_archive[-1]
+        last_key = (
+            last_row._mapping[RecentModel.get_archive_column().name],
+            last_row._mapping["id"],
+        )
+        # Copy the chunk and move the watermark in the same transaction ...
+        async with db.scoped_session() as session:
+            async with session.begin():
+                await ArchiveModel.insert_archives(session, to_archive)
+                await ArchiveWatermark.update(
+                    session, table_name=data_name,
+                    values={
+                        "last_timestamp": last_key[0],
+                        "last_id": last_key[1],
+                    },
+                )
+        # ... then delete it from the recent table in its own short one
+        id_column = RecentModel.__table__.c["id"]
+        start = monotonic()
+        async with db.scoped_session() as session:
+            async with session.begin():
+                stmt = (
+                    delete(RecentModel)
+                    .where(id_column.in_([row._mapping["id"] for row in to_archive]))
+                )
+                await session.execute(stmt)
+        self.write_latency = monotonic() - start
+        run.last_key = last_key
+        run.archived += len(to_archive)
+        return len(to_archive)
+
+    async def _complete_run(self, data_name: str, run: _ArchivingRun) -> None:
+        async with db.scoped_session() as session:
+            async with session.begin():
+                await ArchiveWatermark.update(
+                    session, table_name=data_name, values={"completed": True})
+        self.logger.debug(f"Archived {run.archived} {data_name} rows")
+
     async def _archive(
             self,
             data_name: str,
             RecentModel: type[ArchivableMixin | Base],
-            ArchiveModel: type[Base],
+            ArchiveModel: type[ArchiveMixin | Base],
     ) -> None:
         self.logger.debug(f"Archiving {data_name} data")
         limit = RecentModel.get_time_limit()
@@ -91,26 +246,12 @@ class Archiver:
             self.logger.warning(f"No limit_key set for {data_name} ArchiveLink")
             return
 
-        now_utc = datetime.now(timezone.utc)
-        time_limit = now_utc - timedelta(days=limit)
-
-        async with (db.scoped_session() as session):
-            async with session.begin():
-                per_page = 250
-                offset = 0
-                to_archive = await self._get_archives(
-                    session, RecentModel, time_limit, offset, per_page)
-                while to_archive:
-                    await ArchiveModel.create_multiple(
-                        session, values=to_archive, _on_conflict_do="update")
-                    offset += per_page
-                    to_archive = await self._get_archives(
-                        session, RecentModel, time_limit, offset, per_page)
-                stmt = (
-                    delete(RecentModel)
-                    .where(RecentModel.get_archive_column() < time_limit)
-                )
-                await session.execute(stmt)
+        run = await self._start_run(data_name, RecentModel)
+        while await self._archive_chunk(
+                data_name, RecentModel, ArchiveModel, run, self.chunk_size):
+            # Let other tasks access the databases between two chunks
+            await asyncio.sleep(0)
+        await self._complete_run(data_name, run)
 
     async def archive_old_data(self) -> None:
         self.logger.info("Archiving old data")
@@ -119,13 +260,98 @@ class Archiver:
             archive = self.mapping[data]["archive"]
             await self._archive(data, recent, archive)
 
+    # ---------------------------------------------------------------------------
+    #   Incremental archiving
+    # ---------------------------------------------------------------------------
+    def _should_pause(self) -> bool:
+        config = current_app.config
+        max_latency = config["ARCHIVING_MAX_WRITE_LATENCY"]
+        if max_latency is not None and self.write_latency > max_latency:
+            self.logger.debug(
+                f"Pausing archiving, database write latency is "
+                f"{self.write_latency:.3f} s")
+            return True
+        max_backlog = config["ARCHIVING_MAX_INGEST_BACKLOG"]
+        if (
+                max_backlog is not None
+                and self.ingest_backlog is not None
+                and self.ingest_backlog() > max_backlog
+        ):
+            self.logger.debug("Pausing archiving, data ingestion is busy")
+            return True
+        return False
+
+    async def _update_progress(
+            self,
+            data_name: str,
+            RecentModel: type[ArchivableMixin | Base],
+    ) -> ArchivingProgress:
+        cutoff = RecentModel.get_archive_cutoff()
+        async with db.scoped_session() as session:
+            oldest = await RecentModel.get_oldest_timestamp(session)
+        lag = 0.0
+        if oldest is not None and oldest < cutoff:
+            lag = (cutoff - oldest).total_seconds()
+        progress: ArchivingProgress = {
+            "cutoff": cutoff,
+            "oldest_record": oldest,
+            "lag": lag,
+        }
+        self.progress[data_name] = progress
+        return progress
+
+    async def archive_step(self) -> None:
+        """Move at most `ARCHIVING_BATCH_SIZE` rows per table to the archive"""
+        if self._should_pause():
+            # Reset the latency so the next step probes the database again
+            self.write_latency = 0.0
+            return
+        batch_size = current_app.config["ARCHIVING_BATCH_SIZE"]
+        for data_name, models in self.mapping.items():
+            RecentModel = models["recent"]
+            if RecentModel.get_time_limit() is None:
+                continue
+            run = self._runs.get(data_name)
+            if run is None:
+                # Only start a new run when some data needs to be archived
+                progress = await self._update_progress(data_name, RecentModel)
+                if not progress["lag"]:
+                    continue
+                run = self._runs[data_name] = await self._start_run(
+                    data_name, RecentModel)
+            budget = batch_size
+            while budget > 0:
+                moved = await self._archive_chunk(
+                    data_name, RecentModel, models["archive"], run,
+                    min(self.chunk_size, budget))
+                if not moved:
+                    await self._complete_run(data_name, run)
+                    del self._runs[data_name]
+                    await self._update_progress(data_name, RecentModel)
+                    break
+                budget -= moved
+                if self._should_pause():
+                    return
+                await asyncio.sleep(0)
+
+    # ---------------------------------------------------------------------------
+    #   Scheduling
+    # ---------------------------------------------------------------------------
     async def start(self) -> None:
         self.logger.info("Scheduling the archiver")
-        scheduler.add_job(
-            self.archive_old_data,
-            "cron", hour="1", day_of_week="0", misfire_grace_time=60 * 60,
-            id="archiver"
-        )
+        interval = current_app.config["ARCHIVING_INTERVAL"]
+        if interval is None:
+            scheduler.add_job(
+                self.archive_old_data,
+                "cron", hour="1", day_of_week="0", misfire_grace_time=60 * 60,
+                id="archiver"
+            )
+        else:
+            scheduler.add_job(
+                self.archive_step,
+                "interval", seconds=interval, max_instances=1, coalesce=True,
+                misfire_grace_time=interval, id="archiver"
+            )
 
     async def stop(self) -> None:
         self.logger.info("Stopping the archiver")
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from functools import wraps
 import logging
 import sys
 import typing as t
-from typing import Callable, cast, Type, TypeAlias, TypedDict, TypeVar
+from typing import Callable, cast, Iterator, Type, TypeAlias, TypedDict, TypeVar
 from uuid import UUID
 
 from anyio import Path as ioPath
@@ -26,7 +27,8 @@ from ouranos.core.database.models.app import ServiceName
 from ouranos.core.database.models.gaia import (
     ActuatorRecord, ActuatorState, CameraPicture, Chaos, CrudRequest, Ecosystem,
     Engine, EnvironmentParameter, Hardware, NycthemeralCycle,
-    Place, Plant, SensorAlarm, SensorDataRecord, SensorDataCache, WeatherEvent)
+    Place, Plant, ResourceVersion, SensorActivity, SensorAlarm, SensorDataRecord,
+    SensorDataCache, WeatherEvent)
 from ouranos.core.database.models.utils import Within
 from ouranos.core.exceptions import NotRegisteredError
 from ouranos.core.utils import humanize_list, Tokenizer
@@ -147,6 +149,7 @@ class GaiaEvents(AsyncEventHandler):
         self._internal_dispatcher: AsyncDispatcher | None = None
         self._stream_dispatcher: AsyncDispatcher | None = None
         self._alarms_data: list[SensorAlarmDict] = []
+        self._ingesting: int = 0
         self.camera_dir: ioPath = ioPath(current_app.static_dir) / "camera_stream"
 
     # ---------------------------------------------------------------------------
@@ -166,6 +169,19 @@ class GaiaEvents(AsyncEventHandler):
                 f"Received an event from an unknown ecosystem with uid '{uid}'")
             return None
 
+    @property
+    def ingest_backlog(self) -> int:
+        """The number of data payloads currently being written to the database"""
+        return self._ingesting
+
+    @contextmanager
+    def _track_ingest(self) -> Iterator[None]:
+        self._ingesting += 1
+        try:
+            yield
+        finally:
+            self._ingesting -= 1
+
     # ---------------------------------------------------------------------------
     #   Alternative dispatchers
     # ---------------------------------------------------------------------------
@@ -423,6 +439,7 @@ class GaiaEvents(AsyncEventHandler):
                 .values({"in_config": False})
             )
             await session.execute(stmt)
+            await ResourceVersion.bump(session, "base_info")
 
         self.logger.debug(
             f"Logged base info from ecosystem(s): {humanize_list(ecosystems_to_log)}"
@@ -600,6 +617,7 @@ class GaiaEvents(AsyncEventHandler):
                 not_used = result.all()
                 for hardware_row in not_used:
                     await Hardware.update(session, uid=hardware_row[0], values={"in_config": False})
+            await ResourceVersion.bump(session, "hardware")
         self.logger.debug(
             f"Logged hardware info from ecosystem(s): {humanize_list(ecosystems_to_log)}"
         )
@@ -685,6 +703,7 @@ class GaiaEvents(AsyncEventHandler):
             if ecosystems_to_update:
                 for ecosystem_uid, update_value in ecosystems_to_update.items():
                     await Ecosystem.update(session, uid=ecosystem_uid, values=update_value)
+                await ResourceVersion.bump(session, "management")
             self.logger.debug(
                 f"Logged management info from ecosystem(s): "
                 f"{humanize_list(ecosystems_to_log)}")
@@ -734,17 +753,18 @@ class GaiaEvents(AsyncEventHandler):
             namespace="application-internal", ttl=15)
         self.logger.debug("Sent `current_sensors_data` to the web API")
         # Log current data in memory DB
-        async with db.scoped_session() as session:
-            await SensorDataCache.insert_data(session, sensors_data)
-            hardware_uids = [*{s["sensor_uid"] for s in sensors_data}]
-            try:
-                await session.commit()
-            except IntegrityError:  # Received same data twice if connection issue for ex.
-                pass
-            else:
-                self.logger.debug(
-                    f"Updated `sensors_data` cache with data from sensors "
-                    f"{humanize_list(hardware_uids)}")
+        with self._track_ingest():
+            async with db.scoped_session() as session:
+                await SensorDataCache.insert_data(session, sensors_data)
+                hardware_uids = [*{s["sensor_uid"] for s in sensors_data}]
+                try:
+                    await session.commit()
+                except IntegrityError:  # Received same data twice if connection issue for ex.
+                    pass
+                else:
+                    self.logger.debug(
+                        f"Updated `sensors_data` cache with data from sensors "
+                        f"{humanize_list(hardware_uids)}")
         # Memorise alarms
         self.alarms_data = alarms_data
 
@@ -801,17 +821,20 @@ class GaiaEvents(AsyncEventHandler):
         self.logger.debug(
             "Sent `historic_sensors_data_update` to the web API")
 
-        async with db.scoped_session() as session:
-            # Log historic data in the DB
-            await SensorDataRecord.create_multiple(session, values=records_to_create)
-            # Mark the cached data as logged
-            await SensorDataCache.update_multiple(session, values=logged_cached_data)
-            # Update the last_log column for hardware
-            await Hardware.update_multiple(
-                session, values=[*hardware_to_update.values()])
-            # Log new alarms or lengthen old ones
-            for alarm in alarms_to_log:
-                await SensorAlarm.create_or_lengthen(session, alarm)
+        with self._track_ingest():
+            async with db.scoped_session() as session:
+                # Log historic data in the DB
+                await SensorDataRecord.create_multiple(session, values=records_to_create)
+                await SensorActivity.record_activity(session, records_to_create)
+                # Mark the cached data as logged
+                await SensorDataCache.update_multiple(session, values=logged_cached_data)
+                # Update the last_log column for hardware
+                await Hardware.update_multiple(
+                    session, values=[*hardware_to_update.values()])
+                await ResourceVersion.bump(session, "sensors_data")
+                # Log new alarms or lengthen old ones
+                for alarm in alarms_to_log:
+                    await SensorAlarm.create_or_lengthen(session, alarm)
         self.logger.info(
             f"Logged sensors data from ecosystem(s) "
             f"{humanize_list([*ecosystems_to_log])}")
@@ -825,8 +848,17 @@ class GaiaEvents(AsyncEventHandler):
     ) -> None:
         async with db.scoped_session() as session:
             try:
-                await record_model.create_multiple(
-                    session, records, _on_conflict_do="nothing")
+                with self._track_ingest():
+                    if record_model is SensorDataRecord:
+                        # Only account the records not logged yet
+                        created = await SensorDataRecord.create_new(session, records)
+                        await SensorActivity.record_activity(session, created)
+                        await ResourceVersion.bump(session, "sensors_data")
+                    else:
+                        await record_model.create_multiple(
+                            session, records, _on_conflict_do="nothing")
+                        if record_model is ActuatorRecord:
+                            await ResourceVersion.bump(session, "actuators_data")
             except Exception as e:
                 await self.emit(
                     "buffered_data_ack",
@@ -943,6 +975,7 @@ class GaiaEvents(AsyncEventHandler):
             if records_to_log:
                 await ActuatorRecord.create_multiple(session, records_to_log)
             if data_to_dispatch:
+                await ResourceVersion.bump(session, "actuators_data")
                 await self.internal_dispatcher.emit(
                     "actuators_data", data=data_to_dispatch,
                     namespace="application-internal", ttl=15)
@@ -1032,11 +1065,12 @@ class GaiaEvents(AsyncEventHandler):
         logged: list[str] = []
         async with db.scoped_session() as session:
             # Log the health data in the DB
-            await SensorDataRecord.create_multiple(
-                session, health_data, _on_conflict_do="nothing")
+            created = await SensorDataRecord.create_new(session, health_data)
+            await SensorActivity.record_activity(session, created)
             # Update the last_log column for hardware
             await Hardware.update_multiple(
                 session, values=[*hardware_to_update.values()])
+            await ResourceVersion.bump(session, "health_data")
             # Get ecosystems name
             for ecosystem in data:
                 ecosystem_name = await self.get_ecosystem_name(
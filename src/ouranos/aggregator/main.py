@@ -7,6 +7,7 @@ from ouranos.aggregator.events import GaiaEvents
 from ouranos.aggregator.file_server import FileServer
 from ouranos.aggregator.sky_watcher import SkyWatcher
 from ouranos.core.config import ConfigDict, consts
+from ouranos.core.database.models.gaia import SensorDataCache
 from ouranos.core.dispatchers import DispatcherFactory
 from ouranos.core.globals import scheduler
 from ouranos.sdk import Functionality, Plugin
@@ -40,7 +41,8 @@ class Aggregator(Functionality):
         self._internal_dispatcher = None
         self._stream_dispatcher = None
         self._event_handler = None
-        self.archiver = Archiver()
+        self.archiver = Archiver(
+            ingest_backlog=lambda: self.event_handler.ingest_backlog)
         self.sky_watcher = SkyWatcher()
         self.file_server = FileServer()
 
@@ -132,6 +134,7 @@ class Aggregator(Functionality):
             id="log_sensors_data", trigger="cron", minute="*",
             misfire_grace_time=10
         )
+        SensorDataCache.start_sweeper(self.config["CACHE_SWEEP_INTERVAL"])
 
     async def startup(self) -> None:
         await self.start_gaia_events_dispatcher()
@@ -146,6 +149,7 @@ class Aggregator(Functionality):
             if self.sky_watcher.started:
                 await self.sky_watcher.stop()
             await self.archiver.stop()
+            SensorDataCache.stop_sweeper()
             await self.gaia_dispatcher.stop()
             await self.internal_dispatcher.stop()
             await self.stream_dispatcher.stop()
@@ -1,17 +1,23 @@
 from __future__ import annotations
 
 import asyncio
-from datetime import date, datetime, timedelta
+from datetime import date, datetime, timedelta, timezone
+from itertools import combinations
 from logging import getLogger, Logger
+import random
 
-from aiohttp import ClientError, ClientSession, ClientTimeout
+from aiohttp import (
+    ClientError, ClientResponseError, ClientSession, ClientTimeout, TCPConnector)
 from pydantic import Field, field_validator, RootModel
 
 import gaia_validators as gv
 from gaia_validators.utils import get_sun_times
 
-from ouranos import current_app, scheduler
-from ouranos.core.caches import CacheFactory
+from ouranos import current_app, db, scheduler
+from ouranos.core.caches import (
+    CacheFactory, forecast_snapshot_key, make_snapshot, Snapshot, snapshot_key,
+    weather_timings)
+from ouranos.core.database.models.gaia import Place
 from ouranos.core.dispatchers import DispatcherFactory
 from ouranos.core.utils import stripped_warning
 from ouranos.core.validate.base import BaseModel
@@ -97,23 +103,101 @@ class WeatherData(BaseModel):
     daily: list[WeatherDataDay]
 
 
-async def get_weather_data(coordinates: gv.Coordinates, api_key: str) -> WeatherData:
-    url = "https://api.openweathermap.org/data/3.0/onecall"
-    parameters = {
-        "lat": coordinates.latitude,
-        "lon": coordinates.longitude,
-        "appid": api_key,
-        "exclude": "minutely",
-        "units": "metric",  # ca: SI units with temperature in °C rather than °K
-    }
-    try:
-        async with ClientSession() as session:
-            timeout = ClientTimeout(total=3.0)
-            async with session.get(url, params=parameters, timeout=timeout) as resp:
-                raw_data = await resp.json()
+class OpenWeatherMapClient:
+    """A long-lived HTTP client for the OpenWeatherMap One Call API
+
+    The client session, and its connections, are kept between the updates.
+    Failed requests are retried with an exponential backoff and full jitter,
+    as long as the time budget of the fetch is not spent.
+
+    :param api_key: the OpenWeatherMap API key.
+    :param url: the URL of the One Call API.
+    :param max_attempts: the maximum number of requests per fetch.
+    :param request_timeout: the timeout, in seconds, of a single request.
+    :param time_budget: the maximum time, in seconds, spent on a fetch,
+    including the retries.
+    :param backoff_base: the maximum delay, in seconds, before the first
+    retry. It doubles with each retry.
+    """
+    url: str = "https://api.openweathermap.org/data/3.0/onecall"
+    # Status codes that do not come from a faulty request
+    _retryable_status: set[int] = {429, 500, 502, 503, 504}
+
+    def __init__(
+            self,
+            api_key: str,
+            *,
+            url: str | None = None,
+            max_attempts: int = 3,
+            request_timeout: float = 3.0,
+            time_budget: float = 10.0,
+            backoff_base: float = 0.5,
+    ) -> None:
+        self.api_key = api_key
+        if url is not None:
+            self.url = url
+        self.max_attempts = max_attempts
+        self.request_timeout = request_timeout
+        self.time_budget = time_budget
+        self.backoff_base = backoff_base
+        self._session: ClientSession | None = None
+
+    def _get_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(limit=4, keepalive_timeout=60),
+            )
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(self, parameters: dict, timeout: float) -> dict:
+        session = self._get_session()
+        async with session.get(
+                self.url, params=parameters, timeout=ClientTimeout(total=timeout),
+        ) as resp:
+            resp.raise_for_status()
+            return await resp.json()
+
+    async def get_weather_data(self, coordinates: gv.Coordinates) -> WeatherData:
+        """Fetch the current, hourly and daily weather at `coordinates`
+
+        :raises ConnectionError: if the data could not be fetched.
+        """
+        parameters = {
+            "lat": coordinates.latitude,
+            "lon": coordinates.longitude,
+            "appid": self.api_key,
+            "exclude": "minutely",
+            "units": "metric",  # ca: SI units with temperature in °C rather than °K
+        }
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.time_budget
+        error: Exception | None = None
+        for attempt in range(self.max_attempts):
+            if attempt:
+                delay = random.uniform(0, self.backoff_base * 2 ** (attempt - 1))
+                if loop.time() + delay >= deadline:
+                    break
+                await asyncio.sleep(delay)
+            remaining = deadline - loop.time()
+            try:
+                raw_data = await self._request(
+                    parameters, min(self.request_timeout, remaining))
+            except ClientResponseError as e:
+                error = e
+                if e.status not in self._retryable_status:
+                    break
+            except (ClientError, asyncio.TimeoutError) as e:
+                error = e
+            else:
                 return WeatherData.model_validate(raw_data)
-    except (ClientError, asyncio.TimeoutError) as e:
-        raise ConnectionError from e
+        raise ConnectionError(
+            f"Could not fetch the weather data after {attempt + 1} "
+            f"attempt(s)") from error
 
 
 async def get_weather_test_data(coordinates: gv.Coordinates, api_key: str) -> WeatherData:
@@ -142,6 +226,61 @@ async def get_weather_test_data(coordinates: gv.Coordinates, api_key: str) -> We
     })
 
 
+# -------------------------------------------------------------------------------
+#   Locations and snapshots
+# -------------------------------------------------------------------------------
+def location_key(coordinates: gv.Coordinates) -> str:
+    """Key of the location of `coordinates`, rounded to about a kilometer so
+    that the places close to each other share their data"""
+    return f"{round(coordinates.latitude, 2)},{round(coordinates.longitude, 2)}"
+
+
+def _forecast_timings() -> list[tuple[str, ...]]:
+    # The forecast route can exclude any of the timings
+    return [
+        timings
+        for length in range(1, len(weather_timings) + 1)
+        for timings in combinations(weather_timings, length)
+    ]
+
+
+def weather_snapshot_keys(location: str | None = None) -> list[str]:
+    return [
+        *(snapshot_key(f"weather_{timing}", location) for timing in weather_timings),
+        *(forecast_snapshot_key(timings, location) for timings in _forecast_timings()),
+    ]
+
+
+def make_weather_snapshots(
+        weather_data: dict,
+        location: str | None = None,
+) -> dict[str, Snapshot]:
+    """Serialize each view of the weather routes
+
+    :param weather_data: the dumped `WeatherData`.
+    :param location: the location key, None for the home coordinates.
+    """
+    now = datetime.now(timezone.utc)
+    views = {
+        "currently": weather_data["current"],
+        "hourly": weather_data["hourly"],
+        "daily": weather_data["daily"],
+    }
+    snapshots = {
+        snapshot_key(f"weather_{timing}", location): make_snapshot(view, now)
+        for timing, view in views.items()
+    }
+    for timings in _forecast_timings():
+        snapshots[forecast_snapshot_key(timings, location)] = make_snapshot(
+            {
+                timing: views[timing] if timing in timings else None
+                for timing in weather_timings
+            },
+            now,
+        )
+    return snapshots
+
+
 # -------------------------------------------------------------------------------
 #   SkyWatcher class
 # -------------------------------------------------------------------------------
@@ -156,6 +295,9 @@ class SkyWatcher:
         self._API_key = current_app.config.get("OPEN_WEATHER_MAP_API_KEY")
         self._update_period: int = current_app.config["WEATHER_UPDATE_PERIOD"]
         self._aio_cache = CacheFactory.get("sky_watcher")
+        self._client: OpenWeatherMapClient | None = None
+        if self._API_key:
+            self._client = OpenWeatherMapClient(self._API_key)
         self._started: bool = False
 
     @property
@@ -184,9 +326,59 @@ class SkyWatcher:
         now = datetime.now()
         # If weather "current" time older than _RECENCY_LIMIT hours: clear
         if now.timestamp() - timestamp.timestamp() > _RECENCY_LIMIT:
-            await self._aio_cache.delete("weather_currently")
-            await self._aio_cache.delete("weather_hourly")
-            await self._aio_cache.delete("weather_daily")
+            await self._aio_cache.delete_many([
+                "weather_currently", "weather_hourly", "weather_daily",
+                *weather_snapshot_keys(),
+            ])
+
+    async def _get_locations(self) -> dict[str, gv.Coordinates]:
+        """Get the distinct locations to watch, by location key: the home
+        coordinates and the places registered by the engines
+
+        The location of each place is published as 'places_locations' for the
+        web workers to find the data of a place.
+        """
+        locations: dict[str, gv.Coordinates] = {}
+        if self._coordinates is not None:
+            locations[location_key(self._coordinates)] = self._coordinates
+        try:
+            async with db.scoped_session() as session:
+                places = await Place.get_multiple(session)
+        except Exception as e:
+            self.logger.error(
+                f"Encountered an error when trying to get the places. Error "
+                f"msg: `{e.__class__.__name__}: {e}`")
+            return locations
+        places_locations: dict[str, str] = {}
+        for place in places:
+            coordinates = gv.Coordinates(
+                latitude=place.latitude, longitude=place.longitude)
+            key = location_key(coordinates)
+            locations.setdefault(key, coordinates)
+            places_locations[f"{place.engine_uid}/{place.name}"] = key
+        await self._aio_cache.set("places_locations", places_locations)
+        return locations
+
+    async def _fetch_weather_data(
+            self,
+            coordinates: gv.Coordinates,
+    ) -> WeatherData | None:
+        try:
+            if current_app.config["TESTING"]:
+                return await get_weather_test_data(coordinates, self._API_key)
+            return await self._client.get_weather_data(coordinates)
+        except ConnectionError as e:
+            self.logger.error(
+                f"Could not update the weather data at {location_key(coordinates)}. "
+                f"Error msg: `{e.__cause__.__class__.__name__}: {e.__cause__}`")
+            return None
+        except Exception as e:
+            # Includes the validation errors of malformed responses, the other
+            #  locations are still updated
+            self.logger.error(
+                f"Could not update the weather data at {location_key(coordinates)}. "
+                f"Error msg: `{e.__class__.__name__}: {e}`")
+            return None
 
     async def update_weather_data(self) -> None:
         self.logger.debug("Trying to update weather data")
@@ -195,36 +387,59 @@ class SkyWatcher:
                 "'HOME_COORDINATES' and 'OPEN_WEATHER_MAP_API_KEY' are needed "
                 "in the config class in order to update the weather forecast.")
             return
-        try:
-            if current_app.config["TESTING"]:
-                get_weather_data_imp = get_weather_test_data
-            else:
-                get_weather_data_imp = get_weather_data
-            weather_data = await get_weather_data_imp(self._coordinates, self._API_key)
-        except ConnectionError:
+        locations = await self._get_locations()
+        # The requests share the connections of the client
+        fetched: dict[str, WeatherData | None] = dict(zip(
+            locations.keys(),
+            await asyncio.gather(*(
+                self._fetch_weather_data(coordinates)
+                for coordinates in locations.values()
+            )),
+        ))
+        values: dict = {}
+        # Compressing the snapshots takes tens of milliseconds per location,
+        #  keep it out of the event loop
+        for location, weather_data in fetched.items():
+            if weather_data is not None:
+                values.update(await asyncio.to_thread(
+                    make_weather_snapshots, weather_data.model_dump(), location))
+        home_location = location_key(self._coordinates)
+        home = fetched[home_location]
+        if home is not None:
+            weather_data_dict = home.model_dump()
+            values.update({
+                "weather_currently": weather_data_dict["current"],
+                "weather_hourly": weather_data_dict["hourly"],
+                "weather_daily": weather_data_dict["daily"],
+            })
+            # The home coordinates snapshots are also served without location
+            for located_key, key in zip(
+                    weather_snapshot_keys(home_location), weather_snapshot_keys()
+            ):
+                values[key] = values[located_key]
+        if values:
+            # Forecasts expire on their own if they cannot be updated. The web
+            #  workers serve the snapshots as-is
+            await self._aio_cache.set_many(values, ttl=_RECENCY_LIMIT)
+            updated = sum(data is not None for data in fetched.values())
+            self.logger.debug(f"Weather data updated for {updated} location(s)")
+        if home is None:
             self.logger.error(
-                "Ouranos is not connected to the internet, could not update "
-                "weather data")
+                "Ouranos could not update the weather data of its home "
+                "coordinates")
             await self.clear_old_weather_data()
             return
-        else:
-            # Log data in cache
-            weather_data_dict = weather_data.model_dump()
-            await self._aio_cache.set("weather_currently", weather_data_dict["current"])
-            await self._aio_cache.set("weather_hourly", weather_data_dict["hourly"])
-            await self._aio_cache.set("weather_daily", weather_data_dict["daily"])
-            self.logger.debug("Weather data updated")
-
-            # Dispatch data
-            await self.dispatcher.emit(
-                "weather_current", data=weather_data_dict["current"],
-                namespace="application-internal")
-            await self.dispatcher.emit(
-                "weather_hourly", data=weather_data_dict["hourly"],
-                namespace="application-internal")
-            await self.dispatcher.emit(
-                "weather_daily", data=weather_data_dict["daily"],
-                namespace="application-internal")
+
+        # Dispatch data
+        await self.dispatcher.emit(
+            "weather_current", data=weather_data_dict["current"],
+            namespace="application-internal")
+        await self.dispatcher.emit(
+            "weather_hourly", data=weather_data_dict["hourly"],
+            namespace="application-internal")
+        await self.dispatcher.emit(
+            "weather_daily", data=weather_data_dict["daily"],
+            namespace="application-internal")
 
     """Sun times"""
     async def update_sun_times_data(self) -> None:
@@ -235,11 +450,18 @@ class SkyWatcher:
             return
         today = date.today()
         days = [today + timedelta(days=i) for i in range(0, 7)]
-        sun_times = [
-            get_sun_times(self._coordinates, day).model_dump()
-            for day in days
-        ]
-        await self._aio_cache.set("sun_times", sun_times)
+        locations = await self._get_locations()
+        values: dict[str, Snapshot] = {}
+        for location, coordinates in locations.items():
+            sun_times = [
+                get_sun_times(coordinates, day).model_dump()
+                for day in days
+            ]
+            snapshot = make_snapshot(sun_times)
+            values[snapshot_key("sun_times", location)] = snapshot
+            if location == location_key(self._coordinates):
+                values[snapshot_key("sun_times")] = snapshot
+        await self._aio_cache.set_many(values)
         self.logger.debug("Sun times data updated")
 
     async def start(self) -> None:
@@ -252,8 +474,7 @@ class SkyWatcher:
                 "in the config class in order to use the `SkyWatcher`.")
             return
         # Start
-        if not self._aio_cache.is_init:
-            await self._aio_cache.init()
+        await self._aio_cache.init()
         tasks = []
         if not await self._check_weather_recency():
             tasks.append(self.update_weather_data())
@@ -276,8 +497,11 @@ class SkyWatcher:
             raise RuntimeError("SkyWatcher is not started")
         self.logger.debug("Stopping SkyWatcher")
         await self._aio_cache.clear()
+        await self._aio_cache.close()
         if scheduler.get_job("sky_watcher-weather"):
             scheduler.remove_job("sky_watcher-weather")
         if scheduler.get_job("sky_watcher-sun_times"):
             scheduler.remove_job("sky_watcher-sun_times")
+        if self._client is not None:
+            await self._client.close()
         self._started = False
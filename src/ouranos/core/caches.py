@@ -1,26 +1,41 @@
 from __future__ import annotations
 
+import asyncio
+from datetime import datetime, timezone
+import hashlib
+import os
 from pathlib import Path
 import pickle
-from typing import Any, AsyncIterable
+import time
+from typing import Any, AsyncIterable, Iterable, NamedTuple
 
 import aiosqlite
+import brotli
 
 from ouranos import current_app
+from ouranos.core.utils import json
 
 
 _create_query = """
   CREATE TABLE IF NOT EXISTS %(table_name)s (
-    key TEXT UNIQUE NOT NULL,
+    key TEXT PRIMARY KEY,
     value BLOB NOT NULL,
-    ttl TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    expires REAL
   )
 """
-_get_query = "SELECT value FROM %(table_name)s WHERE key = CAST(? AS TEXT)"
-_set_query = "REPLACE INTO %(table_name)s (key, value) VALUES (CAST(? AS TEXT), CAST(? AS BLOB))"
-_delete_query = "DELETE FROM %(table_name)s WHERE key = CAST(? AS TEXT)"
+_columns_query = "SELECT name FROM pragma_table_info('%(table_name)s')"
+_drop_query = "DROP TABLE IF EXISTS %(table_name)s"
+_get_many_query = (
+    "SELECT key, value, expires FROM %(table_name)s "
+    "WHERE key IN (%(placeholders)s) AND (expires IS NULL OR expires > ?)"
+)
+_set_query = "REPLACE INTO %(table_name)s (key, value, expires) VALUES (?, ?, ?)"
+_delete_query = "DELETE FROM %(table_name)s WHERE key = ?"
+_delete_many_query = "DELETE FROM %(table_name)s WHERE key IN (%(placeholders)s)"
+_remove_expired_query = "DELETE FROM %(table_name)s WHERE expires <= ?"
 _clear_query = "DELETE FROM %(table_name)s"
-_iter_query = "SELECT key FROM %(table_name)s"
+_iter_query = (
+    "SELECT key FROM %(table_name)s WHERE expires IS NULL OR expires > ?")
 
 
 class NoDefault:
@@ -30,66 +45,299 @@ class NoDefault:
 no_default = NoDefault()
 
 
+class _Entry(NamedTuple):
+    value: Any
+    expires: float | None
+
+
 class aioCache:
-    def __init__(self, file_path: Path | str, table: str = "cache") -> None:
+    """A key-value cache stored in a SQLite file shared by the processes of a
+    host
+
+    Each process keeps its own connection opened, WAL mode allows the
+    processes to read while another one writes. Values are pickled and can
+    be given a time to live, in seconds.
+
+    The values read or written are also kept in memory. This in-process layer
+    is dropped when another process writes to the file: the file and WAL
+    modification times and sizes are compared on each access and, when they
+    changed, SQLite `data_version` tells whether the change came from another
+    connection. As modification times can be coarse, `data_version` is also
+    checked every `max_staleness` seconds. In steady state, reads do not leave
+    the process.
+
+    The values returned are shared by all the callers of the process and must
+    not be mutated.
+
+    :param file_path: the path to the SQLite file.
+    :param table: the name of the table used.
+    :param default_ttl: the time to live, in seconds, of the values set
+    without one. None for the values to never expire.
+    """
+    remove_expired_every: int = 64
+    max_staleness: float = 5.0  # in sec
+
+    def __init__(
+            self,
+            file_path: Path | str,
+            table: str = "cache",
+            default_ttl: float | None = None,
+    ) -> None:
         self._path = Path(file_path)
+        self._wal_path = Path(f"{file_path}-wal")
         self._table = table
-        self._init: bool = False
+        self.default_ttl = default_ttl
+        self._connection: aiosqlite.Connection | None = None
+        self._connection_lock = asyncio.Lock()
+        self._local: dict[str, _Entry] = {}
+        self._file_signature: tuple | None = None
+        self._data_version: int | None = None
+        self._last_check: float = 0.0
+        self._writes: int = 0
+        # Bumped whenever the in-process values change, the reads started
+        #  before must not fill them with the values they fetched
+        self._generation: int = 0
 
     @property
     def is_init(self) -> bool:
-        return self._init
+        return self._connection is not None
+
+    def _query(self, query: str, **kwargs) -> str:
+        return query % {"table_name": self._table, **kwargs}
+
+    async def init(self) -> None:
+        async with self._connection_lock:
+            if self._connection is not None:
+                return
+            connection = await aiosqlite.connect(self._path, timeout=5)
+            await connection.execute("PRAGMA journal_mode=WAL")
+            await connection.execute("PRAGMA synchronous=NORMAL")
+            # Tables created by older versions do not have the `expires`
+            #  column, their content is dropped
+            cursor = await connection.execute(self._query(_columns_query))
+            columns = {row[0] for row in await cursor.fetchall()}
+            if columns and "expires" not in columns:
+                await connection.execute(self._query(_drop_query))
+            await connection.execute(self._query(_create_query))
+            await connection.commit()
+            self._connection = connection
+            self._file_signature = self._get_file_signature()
+            self._data_version = await self._get_data_version()
+            self._last_check = time.monotonic()
 
-    def _check_init(self) -> None:
-        if not self.is_init:
-            raise RuntimeError("Cache is not initialized")
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        self._local.clear()
 
-    async def init(self):
-        async with aiosqlite.connect(self._path) as db:
-            await db.execute(_create_query % {"table_name": self._table})
-            await db.commit()
-        self._init = True
+    async def _get_connection(self) -> aiosqlite.Connection:
+        # The connection is lazily opened by processes that did not go
+        #  through their startup, like the test clients
+        if self._connection is None:
+            await self.init()
+        return self._connection
+
+    def _get_file_signature(self) -> tuple:
+        signature = []
+        for path in (self._path, self._wal_path):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                signature.append(None)
+            else:
+                signature.append((stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    async def _get_data_version(self) -> int:
+        cursor = await self._connection.execute("PRAGMA data_version")
+        row = await cursor.fetchone()
+        return row[0]
+
+    async def _validate_local(self) -> None:
+        """Drop the in-process values if another process wrote to the file"""
+        signature = self._get_file_signature()
+        now = time.monotonic()
+        if (
+                signature == self._file_signature
+                and now - self._last_check < self.max_staleness
+        ):
+            return
+        self._file_signature = signature
+        self._last_check = now
+        # `data_version` only changes with the commits of other connections
+        data_version = await self._get_data_version()
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._generation += 1
+            self._local.clear()
+
+    def _get_local(self, key: str, now: float) -> _Entry | None:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        if entry.expires is not None and entry.expires <= now:
+            del self._local[key]
+            return None
+        return entry
 
     async def get(self, key: str, default: Any = no_default) -> Any:
-        self._check_init()
-        async with aiosqlite.connect(self._path) as db:
-            cursor = await db.execute(_get_query % {"table_name": self._table}, (key,))
-            row = await cursor.fetchone()
-        if not row:
-            if default == no_default:
+        values = await self.get_many([key])
+        if key not in values:
+            if default is no_default:
                 raise KeyError(key)
             return default
-        return pickle.loads(row[0])
+        return values[key]
 
-    async def set(self, key: str, value: Any) -> None:
-        # Set is inefficient
-        self._check_init()
-        value = pickle.dumps(value)
-        async with aiosqlite.connect(self._path) as db:
-            await db.execute(_set_query % {"table_name": self._table}, (key, value))
-            await db.commit()
+    async def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Get the values of the `keys` present in the cache"""
+        await self._get_connection()
+        await self._validate_local()
+        now = time.time()
+        rv: dict[str, Any] = {}
+        missing: list[str] = []
+        for key in keys:
+            entry = self._get_local(key, now)
+            if entry is None:
+                missing.append(key)
+            elif entry.value is not no_default:
+                rv[key] = entry.value
+        if missing:
+            generation = self._generation
+            query = self._query(
+                _get_many_query, placeholders=", ".join("?" * len(missing)))
+            cursor = await self._connection.execute(query, (*missing, now))
+            fetched = {
+                key: _Entry(pickle.loads(value), expires)
+                for key, value, expires in await cursor.fetchall()
+            }
+            rv.update({key: entry.value for key, entry in fetched.items()})
+            # A write happened while fetching, the values might be stale
+            if generation == self._generation:
+                self._local.update(fetched)
+                # Also remember the keys absent from the file
+                for key in missing:
+                    if key not in fetched:
+                        self._local[key] = _Entry(no_default, None)
+        return rv
+
+    async def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        await self.set_many({key: value}, ttl)
+
+    async def set_many(
+            self,
+            values: dict[str, Any],
+            ttl: float | None = None,
+    ) -> None:
+        """Set all the `values` in a single transaction
+
+        :param values: a dict of the keys and values to set.
+        :param ttl: the time to live of the values, in seconds. The cache
+        `default_ttl` is used if None.
+        """
+        connection = await self._get_connection()
+        await self._validate_local()
+        now = time.time()
+        ttl = ttl if ttl is not None else self.default_ttl
+        expires = now + ttl if ttl is not None else None
+        await connection.executemany(
+            self._query(_set_query),
+            [(key, pickle.dumps(value), expires) for key, value in values.items()]
+        )
+        self._writes += 1
+        if self._writes >= self.remove_expired_every:
+            await connection.execute(self._query(_remove_expired_query), (now, ))
+            self._writes = 0
+        await connection.commit()
+        self._generation += 1
+        for key, value in values.items():
+            self._local[key] = _Entry(value, expires)
 
     async def delete(self, key: str) -> None:
-        self._check_init()
-        async with aiosqlite.connect(self._path) as db:
-            cursor = await db.execute(_delete_query % {"table_name": self._table}, (key,))
-            if not cursor.rowcount:
-                raise KeyError(key)
-            await db.commit()
+        connection = await self._get_connection()
+        try:
+            cursor = await connection.execute(self._query(_delete_query), (key,))
+        finally:
+            # Do not keep the write transaction opened, it would lock the file
+            #  for the other processes
+            await connection.commit()
+        self._generation += 1
+        self._local.pop(key, None)
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    async def delete_many(self, keys: Iterable[str]) -> None:
+        """Delete the `keys`, ignoring the ones absent from the cache"""
+        keys = [*keys]
+        connection = await self._get_connection()
+        query = self._query(
+            _delete_many_query, placeholders=", ".join("?" * len(keys)))
+        await connection.execute(query, keys)
+        await connection.commit()
+        self._generation += 1
+        for key in keys:
+            self._local.pop(key, None)
 
     async def clear(self) -> None:
-        self._check_init()
-        async with aiosqlite.connect(self._path) as db:
-            await db.execute(_clear_query % {"table_name": self._table})
-            await db.commit()
+        connection = await self._get_connection()
+        await connection.execute(self._query(_clear_query))
+        await connection.commit()
+        self._generation += 1
+        self._local.clear()
 
     async def keys(self) -> AsyncIterable[str]:
-        self._check_init()
-        async with aiosqlite.connect(self._path) as db:
-            cursor = await db.execute(_iter_query % {"table_name": self._table})
-            rows = await cursor.fetchall()
-            for row in rows:
-                yield row[0]
+        connection = await self._get_connection()
+        cursor = await connection.execute(self._query(_iter_query), (time.time(), ))
+        rows = await cursor.fetchall()
+        for row in rows:
+            yield row[0]
+
+
+# Snapshots are compressed once per update, the best ratio is affordable
+SNAPSHOT_BROTLI_QUALITY = 11
+
+
+class Snapshot(NamedTuple):
+    """A ready-to-send JSON response, published to an `aioCache` by the
+    process producing the data"""
+    body: bytes
+    br_body: bytes | None
+    etag: str
+    last_modified: datetime
+
+
+def make_snapshot(data: Any, last_modified: datetime | None = None) -> Snapshot:
+    body = json.dumps(data)
+    br_body = brotli.compress(body, quality=SNAPSHOT_BROTLI_QUALITY)
+    digest = hashlib.blake2b(body, digest_size=12).hexdigest()
+    return Snapshot(
+        body=body,
+        br_body=br_body if len(br_body) < len(body) else None,
+        # Weak validator as the body can be re-encoded by the compression
+        #  middleware
+        etag=f'W/"{digest}"',
+        last_modified=last_modified or datetime.now(timezone.utc),
+    )
+
+
+weather_timings: tuple[str, ...] = ("currently", "hourly", "daily")
+
+
+def snapshot_key(view: str, location: str | None = None) -> str:
+    """Key of the snapshot of a view, at the home coordinates if `location` is
+    None"""
+    if location is None:
+        return f"snapshot_{view}"
+    return f"snapshot_{view}@{location}"
+
+
+def forecast_snapshot_key(
+        timings: list[str] | tuple[str, ...],
+        location: str | None = None,
+) -> str:
+    """Key of the snapshot of the forecast restricted to `timings`"""
+    included = [timing for timing in weather_timings if timing in timings]
+    return snapshot_key(f"forecast_{'_'.join(included)}", location)
 
 
 class CacheFactory:
@@ -118,8 +366,13 @@ class CacheFactory:
                 raise ValueError(f"Cache '{name}' does not have a valid config")
             cache_path = current_app.cache_dir / cache_path_str
             table_name = cls.__config[name].get("table_name", "cache")
+            default_ttl = cls.__config[name].get("default_ttl")
 
-
-            cache = aioCache(cache_path, table_name)
+            cache = aioCache(cache_path, table_name, default_ttl)
             cls.__caches[name] = cache
             return cache
+
+    @classmethod
+    async def close_all(cls) -> None:
+        for cache in cls.__caches.values():
+            await cache.close()
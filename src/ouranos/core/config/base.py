@@ -49,6 +49,7 @@ class BaseConfig:
     GAIA_COMMUNICATION_URL = os.environ.get("GAIA_COMMUNICATION_URL") or "amqp://"  # amqp://
     DISPATCHER_URL = os.environ.get("OURANOS_DISPATCHER_URL") or "memory://"  # memory:// or amqp://
     SIO_MANAGER_URL = os.environ.get("OURANOS_SIO_MANAGER_URL") or "memory://"  # memory:// or amqp:// or redis://
+    RESPONSE_CACHE_URL = os.environ.get("OURANOS_RESPONSE_CACHE_URL") or "sqlite://"  # sqlite:// or redis://, empty to disable
 
     # API config
     API_HOST = os.environ.get("OURANOS_API_HOST", "127.0.0.1")
@@ -92,6 +93,13 @@ class BaseConfig:
     MAX_ECOSYSTEMS = 32
     WEATHER_UPDATE_PERIOD = 5  # in min
     ECOSYSTEM_TIMEOUT = 150  # in sec
+    CACHE_SWEEP_INTERVAL = None  # in sec, None to sweep every cache TTL
+    SIO_COALESCING_WINDOW = 1.0  # in sec, 0 to emit live updates as soon as received
+    PASSWORD_HASHING_WORKERS = 2
+    PASSWORD_HASHING_QUEUE_TIMEOUT = 5  # in sec
+    TOUCH_FLUSH_INTERVAL = 30  # in sec, buffered `last_seen`-like updates
+    LOOP_MONITOR_INTERVAL = 0.5  # in sec, None to disable the event loop monitor
+    LOOP_SLOW_CALLBACK_DURATION = 0.1  # in sec, None to not log slow callbacks
 
     # Data logging
     SENSOR_LOGGING_PERIOD = 10
@@ -102,8 +110,12 @@ class BaseConfig:
     ACTUATOR_ARCHIVING_PERIOD = None  # 180
     HEALTH_ARCHIVING_PERIOD = None  # 360
     SENSOR_ARCHIVING_PERIOD = None  # 180
-    SYSTEM_ARCHIVING_PERIOD = None  # 90
+    SYSTEM_ARCHIVING_PERIOD = None  # 90, in days, raw data older is kept hourly
     WARNING_ARCHIVING_PERIOD = None  # 90
+    ARCHIVING_INTERVAL = 60  # in sec, None to archive all the data weekly
+    ARCHIVING_BATCH_SIZE = 2000  # max rows moved per table and per interval
+    ARCHIVING_MAX_WRITE_LATENCY = 0.5  # in sec, pause archiving above it
+    ARCHIVING_MAX_INGEST_BACKLOG = 4  # pause archiving above it
 
     # SQLAlchemy config
     @property
@@ -196,6 +208,7 @@ class BaseConfigDict(TypedDict):
     GAIA_COMMUNICATION_URL: str
     DISPATCHER_URL: str
     SIO_MANAGER_URL: str
+    RESPONSE_CACHE_URL: str | None
 
     # API config
     API_HOST: str
@@ -222,6 +235,13 @@ class BaseConfigDict(TypedDict):
     MAX_ECOSYSTEMS: int
     WEATHER_UPDATE_PERIOD: int
     ECOSYSTEM_TIMEOUT: int
+    CACHE_SWEEP_INTERVAL: int | None
+    SIO_COALESCING_WINDOW: float
+    PASSWORD_HASHING_WORKERS: int
+    PASSWORD_HASHING_QUEUE_TIMEOUT: float
+    TOUCH_FLUSH_INTERVAL: float
+    LOOP_MONITOR_INTERVAL: float | None
+    LOOP_SLOW_CALLBACK_DURATION: float | None
 
     # Data logging
     SENSOR_LOGGING_PERIOD: int | None
@@ -234,6 +254,10 @@ class BaseConfigDict(TypedDict):
     SENSOR_ARCHIVING_PERIOD: int | None
     SYSTEM_ARCHIVING_PERIOD: int | None
     WARNING_ARCHIVING_PERIOD: int | None
+    ARCHIVING_INTERVAL: int | None
+    ARCHIVING_BATCH_SIZE: int
+    ARCHIVING_MAX_WRITE_LATENCY: float | None
+    ARCHIVING_MAX_INGEST_BACKLOG: int | None
 
     # SQLAlchemy config
     DATABASE_URI_ECOSYSTEMS: str | Path
@@ -4,11 +4,15 @@ from enum import StrEnum
 
 START_TIME = datetime.now(timezone.utc).replace(microsecond=0)
 
+# Environment variable holding the pid of the process Ouranos was started with,
+#  inherited by all the processes it spawns
+ROOT_PID_ENV_VAR = "OURANOS_ROOT_PID"
+
 
 # Contracts
 GAIA_CONTRACT = 1
 REST_CONTRACT = 1
-SOCKETIO_CONTRACT = 1
+SOCKETIO_CONTRACT = 2
 
 # Timeout
 ECOSYSTEM_TIMEOUT = 60
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from typing import NamedTuple, Sequence
+import zlib
+
+import numpy as np
+
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_ONE_MS = timedelta(milliseconds=1)
+_TIMESTAMPS_DTYPE = np.dtype("<u4")
+_VALUES_DTYPE = np.dtype("<i8")
+
+
+class EncodedTimedValues(NamedTuple):
+    start: datetime
+    count: int
+    resolution: float
+    timestamps: bytes
+    values: bytes
+
+
+def encode_timed_values(
+        timestamps: Sequence[datetime],
+        values: Sequence[float],
+        resolution: float = 0.001,
+) -> EncodedTimedValues:
+    """Pack ordered timed values into two compressed buffers
+
+    Timestamps are stored as millisecond deltas from the first timestamp and
+    values are quantized to `resolution` then delta-encoded so that slowly
+    varying series compress well. Values must be finite, missing values have
+    to be dropped beforehand.
+    """
+    if len(timestamps) != len(values):
+        raise ValueError("'timestamps' and 'values' must have the same length")
+    if not timestamps:
+        raise ValueError("Cannot encode an empty series")
+    ms = np.fromiter(
+        ((timestamp - _EPOCH) // _ONE_MS for timestamp in timestamps),
+        dtype=np.int64, count=len(timestamps))
+    ts_deltas = np.diff(ms, prepend=ms[0])
+    if ts_deltas.min() < 0 or ts_deltas.max() > np.iinfo(_TIMESTAMPS_DTYPE).max:
+        raise ValueError("Timestamps must be ordered and span less than 49 days")
+    floats = np.asarray(values, dtype=np.float64)
+    # NaN and infinities have no integer representation once quantized
+    if not np.isfinite(floats).all():
+        raise ValueError("Values must be finite numbers")
+    quantized = np.rint(floats / resolution)
+    values_deltas = np.diff(quantized.astype(np.int64), prepend=0)
+    return EncodedTimedValues(
+        start=timestamps[0],
+        count=len(timestamps),
+        resolution=resolution,
+        timestamps=zlib.compress(ts_deltas.astype(_TIMESTAMPS_DTYPE).tobytes()),
+        values=zlib.compress(values_deltas.astype(_VALUES_DTYPE).tobytes()),
+    )
+
+
+def decode_timed_values(
+        start: datetime,
+        resolution: float,
+        timestamps: bytes,
+        values: bytes,
+) -> list[tuple[datetime, float]]:
+    """Unpack the buffers generated by `encode_timed_values()`"""
+    ts_deltas = np.frombuffer(zlib.decompress(timestamps), dtype=_TIMESTAMPS_DTYPE)
+    values_deltas = np.frombuffer(zlib.decompress(values), dtype=_VALUES_DTYPE)
+    offsets = np.cumsum(ts_deltas, dtype=np.int64)
+    decimals = max(0, int(np.ceil(-np.log10(resolution))))
+    decoded = np.round(np.cumsum(values_deltas) * resolution, decimals)
+    return [
+        (start + timedelta(milliseconds=offset), value)
+        for offset, value in zip(offsets.tolist(), decoded.tolist())
+    ]
@@ -1,7 +1,9 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from enum import Enum
+import heapq
 import typing as t
 from typing import Any, Callable, Literal, NamedTuple, Self, Sequence, TypeAlias
 from uuid import UUID
@@ -10,14 +12,17 @@ from warnings import warn
 from sqlalchemy import (
     and_, Column, delete, Insert, inspect, Select, select, Table, UnaryExpression,
     UniqueConstraint, update)
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy.sql import func
 
 from gaia_validators import missing
 
-from ouranos import db
+from ouranos import db, scheduler
+from ouranos.core.database.models import caches
 from ouranos.core.database.models.types import UtcDateTime
-from ouranos.core.database.models.utils import StmtModifier
+from ouranos.core.database.models.utils import StmtModifier, TimeWindow
 
 
 lookup_keys_type: TypeAlias = str | int | Enum | UUID | bool
@@ -54,6 +59,13 @@ class Base(db.Model, ToDictMixin):  # ty: ignore[invalid-base]
         assert cls._dialect is not None
         return cls._dialect
 
+    @classmethod
+    def _get_model_by_tablename(cls, tablename: str) -> type[Base] | None:
+        for mapper in cls.registry.mappers:  # ty: ignore[unresolved-attribute]
+            if getattr(mapper.class_, "__tablename__", None) == tablename:
+                return mapper.class_
+        return None
+
     @classmethod
     def _get_insert(cls) -> Callable[[Any], Insert]:
         """Get a dialect-specific `insert`"""
@@ -441,9 +453,12 @@ class CRUDMixin:
 
 
 class CacheMixin(CRUDMixin):
-    _remove_expired_threshold: int = 10
-    _remove_expired_tick: int = 0
+    """Mixin for the models storing short-lived data
 
+    Expired rows are filtered out on read and deleted by a background sweeper
+    so that neither the reads nor the inserts have to take a write lock to
+    remove them.
+    """
     timestamp: Mapped[datetime] = mapped_column(UtcDateTime)
 
     @classmethod
@@ -457,10 +472,6 @@ class CacheMixin(CRUDMixin):
             session: AsyncSession,
             values: dict | list[dict]
     ) -> None:
-        cls._remove_expired_tick += 1
-        if cls._remove_expired_tick >= cls._remove_expired_threshold:
-            await cls.remove_expired(session)
-            cls._remove_expired_tick = 0
         await cls.create_multiple(session, values=values, _on_conflict_do="update")  # ty: ignore[invalid-argument-type]
 
     @classmethod
@@ -476,10 +487,39 @@ class CacheMixin(CRUDMixin):
         return result.scalars().all()
 
     @classmethod
-    async def remove_expired(cls, session: AsyncSession) -> None:
+    async def remove_expired(cls, session: AsyncSession) -> int:
         time_limit = datetime.now(timezone.utc) - timedelta(seconds=cls.get_ttl())
         stmt = delete(cls).where(cls.timestamp < time_limit)
-        await session.execute(stmt)
+        result = await session.execute(stmt)
+        return result.rowcount
+
+    @classmethod
+    async def sweep_expired(cls) -> int:
+        """Remove the expired rows in a dedicated session and return their
+        number"""
+        async with db.scoped_session() as session:
+            return await cls.remove_expired(session)
+
+    @classmethod
+    def _get_sweeper_job_id(cls) -> str:
+        return f"sweep_{cls.__tablename__}"
+
+    @classmethod
+    def start_sweeper(cls, interval: int | None = None) -> None:
+        """Schedule the removal of the expired rows every `interval` seconds,
+        by default every TTL"""
+        interval = interval or cls.get_ttl()
+        scheduler.add_job(
+            cls.sweep_expired,
+            "interval", seconds=interval, max_instances=1, coalesce=True,
+            misfire_grace_time=interval, id=cls._get_sweeper_job_id(),
+            replace_existing=True,
+        )
+
+    @classmethod
+    def stop_sweeper(cls) -> None:
+        if scheduler.get_job(cls._get_sweeper_job_id()) is not None:
+            scheduler.remove_job(job_id=cls._get_sweeper_job_id())
 
     @classmethod
     async def clear(cls, session: AsyncSession) -> None:
@@ -487,9 +527,55 @@ class CacheMixin(CRUDMixin):
         await session.execute(stmt)
 
 
+class ArchiveMixin(CRUDMixin):
+    """Mixin for the models storing archived data"""
+
+    @classmethod
+    async def insert_archives(
+            cls,
+            session: AsyncSession,
+            /,
+            rows: Sequence[Row],
+    ) -> None:
+        await cls.create_multiple(
+            session, values=[row._asdict() for row in rows],
+            _on_conflict_do="update")
+
+    @classmethod
+    async def get_archived_values(
+            cls,
+            session: AsyncSession,
+            /,
+            query: Callable[[type], Select],
+            time_window: TimeWindow,
+            archive_column: str,
+    ) -> list[Row]:
+        column = cls.__table__.c[archive_column]  # ty: ignore[unresolved-attribute]
+        stmt = time_window.modify_stmt(query(cls), column)
+        result = await session.execute(stmt.order_by(column.asc()))
+        return list(result.all())
+
+
+# Longest span of archived data, in days, cached for a single request
+ARCHIVED_VALUES_CACHE_MAX_DAYS = 31
+
+
+def _day_floor(dt: datetime) -> datetime:
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def _window_day(dt: datetime) -> datetime:
+    """Return the start of the day window `(day, day + 1 day]` including `dt`"""
+    day = _day_floor(dt)
+    if day == dt:
+        return day - timedelta(days=1)
+    return day
+
+
 class ArchivableMixin(CRUDMixin):
     _archive_column: str
     _archive_table: str
+    _archive_model: type[ArchiveMixin | Base] | None = None
 
     @classmethod
     def get_archive_table(cls) -> str:
@@ -503,3 +589,173 @@ class ArchivableMixin(CRUDMixin):
     def get_time_limit(cls) -> int:
         """Return data TTL before its archiving in days"""
         raise NotImplementedError
+
+    @classmethod
+    def get_archive_cutoff(cls) -> datetime:
+        """Return the datetime before which data should be archived"""
+        return datetime.now(timezone.utc) - timedelta(days=cls.get_time_limit())
+
+    @classmethod
+    async def get_oldest_timestamp(cls, session: AsyncSession) -> datetime | None:
+        stmt = select(func.min(cls.get_archive_column()))
+        result = await session.execute(stmt)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def get_last_change(
+            cls,
+            session: AsyncSession,
+            /,
+            query: Select,
+            time_window: TimeWindow,
+    ) -> tuple[int | None, datetime | None]:
+        """Return the highest id and the latest timestamp of the recent rows
+        selected by `query` within the time window
+
+        They are cheap validators of a series: the highest id changes whenever
+        a row is added, even if it is an old one received late.
+        """
+        column = cls.get_archive_column()
+        stmt = (
+            query
+            .with_only_columns(func.max(cls.__table__.c.id), func.max(column))
+            .order_by(None)
+        )
+        stmt = time_window.modify_stmt(stmt, column)
+        result = await session.execute(stmt)
+        last_id, last_timestamp = result.one()
+        return last_id, last_timestamp
+
+    @classmethod
+    def get_archive_model(cls) -> type[ArchiveMixin | Base] | None:
+        if cls._archive_model is None:
+            cls._archive_model = cls._get_model_by_tablename(  # ty: ignore[unresolved-attribute]
+                cls._archive_table)
+        return cls._archive_model
+
+    @classmethod
+    async def get_archived_until(cls, session: AsyncSession) -> datetime | None:
+        """Return the timestamp up to which data has been moved to the archive"""
+        try:
+            return caches.cache_archive_watermarks[cls._archive_table]
+        except KeyError:
+            Watermark = cls._get_model_by_tablename("archive_watermarks")  # ty: ignore[unresolved-attribute]
+            if Watermark is None:
+                return None
+            stmt = (
+                select(Watermark.last_timestamp)
+                .where(Watermark.table_name == cls._archive_table)
+            )
+            result = await session.execute(stmt)
+            archived_until = result.scalar_one_or_none()
+            caches.cache_archive_watermarks[cls._archive_table] = archived_until
+            return archived_until
+
+    @classmethod
+    async def _get_archived_values(
+            cls,
+            ArchiveModel: type[ArchiveMixin | Base],
+            query: Callable[[type], Select],
+            time_window: TimeWindow,
+            cache_key: tuple,
+            archived_until: datetime,
+    ) -> list[Row]:
+        async def fetch(session: AsyncSession, window: TimeWindow) -> list[Row]:
+            return await ArchiveModel.get_archived_values(
+                session, query, window, cls._archive_column)
+
+        # Archived data only changes when the archiver moves more rows, cache
+        #  it per day, with the archive watermark in the key, so that the days
+        #  can be shared between requests
+        stable_start = _day_floor(time_window.start)
+        stable_end = _day_floor(time_window.end)
+        days = [
+            stable_start + timedelta(days=i)
+            for i in range((stable_end - stable_start).days)
+        ]
+        if len(days) > ARCHIVED_VALUES_CACHE_MAX_DAYS:
+            # Longer windows would flush the cache, fetch them as they are
+            days = []
+            stable_end = stable_start = time_window.start
+        bind_key = ArchiveModel.__table__.info.get("bind_key", None)
+        async with AsyncSession(db.get_engine_for_bind(bind_key)) as session:
+            values: list[Row] = []
+            tail_start = time_window.start
+            if days:
+                def day_key(day: datetime) -> tuple:
+                    return (cls._archive_table, *cache_key, archived_until, day)
+
+                per_day: dict[datetime, list[Row] | None] = {
+                    day: caches.cache_archived_values.get(day_key(day))
+                    for day in days
+                }
+                missing = [day for day, rows in per_day.items() if rows is None]
+                if missing:
+                    fetch_start = missing[0]
+                    fetch_end = missing[-1] + timedelta(days=1)
+                    for day in per_day:
+                        if fetch_start <= day < fetch_end:
+                            per_day[day] = []
+                    for row in await fetch(session, TimeWindow(fetch_start, fetch_end)):
+                        per_day[_window_day(row[0])].append(row)
+                    for day in per_day:
+                        if fetch_start <= day < fetch_end:
+                            caches.cache_archived_values[day_key(day)] = per_day[day]
+                values = [
+                    row
+                    for rows in per_day.values()
+                    for row in rows
+                    if row[0] > time_window.start
+                ]
+                tail_start = stable_end
+            if time_window.end > tail_start:
+                values.extend(
+                    await fetch(session, TimeWindow(tail_start, time_window.end)))
+        return values
+
+    @classmethod
+    async def get_federated_values(
+            cls,
+            session: AsyncSession,
+            /,
+            query: Callable[[type], Select],
+            time_window: TimeWindow,
+            cache_key: tuple,
+    ) -> list[Row]:
+        """Get values from both the recent and the archive tables
+
+        :param query: a callable returning the select statement of a single
+                      series to use for a given model. The archive column must
+                      be the first selected.
+        :param time_window: the time window in which to look for values
+        :param cache_key: the values, along with the time window, used as the
+                          archived values cache key
+        """
+        archive_column = cls.get_archive_column()
+
+        async def fetch_recent() -> list[Row]:
+            stmt = time_window.modify_stmt(query(cls), archive_column)
+            stmt = stmt.order_by(archive_column.asc())
+            result = await session.execute(stmt)
+            return list(result.all())
+
+        ArchiveModel = cls.get_archive_model()
+        archived_until = None
+        if ArchiveModel is not None:
+            archived_until = await cls.get_archived_until(session)
+        if archived_until is None or time_window.start >= archived_until:
+            return await fetch_recent()
+
+        archive_window = TimeWindow(
+            time_window.start, min(time_window.end, archived_until))
+        archived, recent = await asyncio.gather(
+            cls._get_archived_values(
+                ArchiveModel, query, archive_window, cache_key, archived_until),
+            fetch_recent(),
+        )
+        # Rows being archived can briefly be present in both tables. The query
+        #  selects a single series, a row is identified by its archive column
+        #  value. Archived values can be quantized, rows cannot be compared
+        archived_keys = {row[0] for row in archived}
+        recent = [row for row in recent if row[0] not in archived_keys]
+        return list(heapq.merge(archived, recent, key=lambda r: r[0]))
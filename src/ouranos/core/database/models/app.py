@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 import difflib
 import enum
@@ -30,13 +32,96 @@ from ouranos.core.database.models.abc import (
 from ouranos.core.database.models import caches
 from ouranos.core.database.models.types import PathType, SQLIntEnum, UtcDateTime
 from ouranos.core.database.models.utils import paginate
+from ouranos.core.database.touch import TouchBuffer
 from ouranos.core.email import send_gaia_templated_email
+from ouranos.core.exceptions import PasswordHashingBusyError
 from ouranos.core.utils import check_filename, slugify, Tokenizer
 
 
 argon2_hasher = PasswordHasher()
 
 
+class PasswordHashingPool:
+    """Run the Argon2 hashing and verification in a bounded pool of threads
+
+    Argon2 is designed to be slow and would block the event loop for tens of
+    milliseconds. argon2-cffi releases the GIL while hashing, so threads are
+    enough to keep the loop responsive.
+
+    At most `PASSWORD_HASHING_WORKERS` operations run at once, the others wait
+    for a worker for at most `PASSWORD_HASHING_QUEUE_TIMEOUT` seconds before
+    being rejected with a `PasswordHashingBusyError`.
+
+    :param workers: the number of threads, read from the config if None.
+    :param queue_timeout: the time, in seconds, an operation can wait for a
+    thread, read from the config if None.
+    """
+    def __init__(
+            self,
+            workers: int | None = None,
+            queue_timeout: float | None = None,
+    ) -> None:
+        self._executor: ThreadPoolExecutor | None = None
+        self._workers: int | None = workers
+        self._queue_timeout: float | None = queue_timeout
+        # Semaphores are bound to the event loop they are first used with
+        self._semaphores: dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            if self._workers is None:
+                self._workers = current_app.config["PASSWORD_HASHING_WORKERS"]
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._workers, thread_name_prefix="password_hashing")
+        return self._executor
+
+    def _get_semaphore(self, loop: asyncio.AbstractEventLoop) -> asyncio.Semaphore:
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            # Forget the semaphores of the loops that were closed
+            self._semaphores = {
+                lp: sem for lp, sem in self._semaphores.items()
+                if not lp.is_closed()
+            }
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self._workers)
+        return semaphore
+
+    async def _run(self, func: t.Callable[..., t.Any], *args: t.Any) -> t.Any:
+        executor = self._get_executor()
+        loop = asyncio.get_running_loop()
+        semaphore = self._get_semaphore(loop)
+        timeout = self._queue_timeout
+        if timeout is None:
+            timeout = current_app.config["PASSWORD_HASHING_QUEUE_TIMEOUT"]
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout)
+        except TimeoutError:
+            raise PasswordHashingBusyError(
+                "Too many password hashing operations are pending")
+        try:
+            return await loop.run_in_executor(executor, func, *args)
+        finally:
+            semaphore.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(argon2_hasher.hash, password)
+
+    async def verify(self, password_hash: str, password: str) -> bool:
+        try:
+            return await self._run(argon2_hasher.verify, password_hash, password)
+        except VerificationError:
+            return False
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            self._semaphores.clear()
+
+
+password_hashing_pool = PasswordHashingPool()
+
+
 class _UnfilledCls:
     pass
 
@@ -164,7 +249,7 @@ class UserMixin(ToDictMixin):
     def can(self, perm: Permission) -> bool:
         return self.role is not None and self.role.has_permission(perm)
 
-    def check_password(self, password: str) -> bool:
+    async def check_password(self, password: str) -> bool:
         raise NotImplementedError
 
 
@@ -188,7 +273,7 @@ class AnonymousUser(UserMixin):
     def is_anonymous(self) -> bool:
         return True
 
-    def check_password(self, password: str) -> bool:
+    async def check_password(self, password: str) -> bool:
         return False
 
 
@@ -272,13 +357,10 @@ class User(Base, UserMixin):
     def role_name(self) -> RoleName:
         return self.role.name
 
-    def check_password(self, password: str) -> bool:
+    async def check_password(self, password: str) -> bool:
         if self.password_hash is None:
             return False
-        try:
-            return argon2_hasher.verify(self.password_hash, password)
-        except VerificationError:
-            return False
+        return await password_hashing_pool.verify(self.password_hash, password)
 
     # ---------------------------------------------------------------------------
     #   Tokens creation
@@ -497,10 +579,10 @@ class User(Base, UserMixin):
             raise ValueError(errors)
 
     @classmethod
-    def _generate_password_hash(cls, password: str) -> str:
+    async def _generate_password_hash(cls, password: str) -> str:
         if password is None:
             raise ValueError("password cannot be `None`")
-        return argon2_hasher.hash(password)
+        return await password_hashing_pool.hash(password)
 
     @classmethod
     async def _compute_expected_role(
@@ -538,7 +620,7 @@ class User(Base, UserMixin):
     ) -> dict[str, str]:
         password = values.pop("password", None)
         if password is not None:
-            values["password_hash"] = cls._generate_password_hash(password)
+            values["password_hash"] = await cls._generate_password_hash(password)
         role_name = values.pop("role", _Unfilled)
         if role_name is not _Unfilled:
             email = values.get("email", None)
@@ -681,6 +763,28 @@ class User(Base, UserMixin):
         await session.execute(stmt)
         caches.cache_users.pop(user_id, None)
 
+    @classmethod
+    async def update_multiple(
+            cls,
+            session: AsyncSession,
+            /,
+            values: list[dict],
+    ) -> None:
+        """Bulk update users, each dict of `values` containing the user `id`
+
+        The values are not validated, use `update()` to update the password
+        or the role.
+        """
+        await session.execute(update(cls), values)
+        # Frequent writes, like `last_seen`, should not evict the cached users
+        for value in values:
+            user = caches.cache_users.get(value["id"])
+            if user is None:
+                continue
+            for key, column_value in value.items():
+                if key != "id":
+                    setattr(user, key, column_value)
+
     @classmethod
     async def delete(
             cls,
@@ -754,6 +858,10 @@ class User(Base, UserMixin):
         await cls.update(session, payload["user_id"], {"password": new_password})
 
 
+# Written in bulk, see `TouchBuffer`
+user_last_seen = TouchBuffer(User, "last_seen")
+
+
 class ServiceLevel(StrEnum):
     all = "all"
     app = "app"
@@ -1,14 +1,32 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+import heapq
+import math
+from typing import Callable, Optional, Sequence
+
 import sqlalchemy as sa
+from sqlalchemy import Row, Select, select, UniqueConstraint
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 
+from ouranos.core.database.compression import (
+    decode_timed_values, encode_timed_values)
+from ouranos.core.database.models.abc import ArchiveMixin, Base, CRUDMixin
 from ouranos.core.database.models.gaia import (
     BaseActuatorRecord, BaseSensorDataRecord)
+from ouranos.core.database.models.types import UtcDateTime
+from ouranos.core.database.models.utils import TimeWindow
+
+
+def utc_date(dt: datetime) -> date:
+    return dt.astimezone(timezone.utc).date()
 
 
 # ---------------------------------------------------------------------------
 #   Models used for archiving, located in db_archive
 # ---------------------------------------------------------------------------
-class ActuatorRecordArchive(BaseActuatorRecord):
+class ActuatorRecordArchive(BaseActuatorRecord, ArchiveMixin):
     __tablename__ = "actuator_records_archive"
     __bind_key__ = "archive"
 
@@ -16,10 +34,183 @@ class ActuatorRecordArchive(BaseActuatorRecord):
     actuator_uid: Mapped[str] = mapped_column(sa.String(length=16), index=True)
 
 
-class SensorDataRecordArchive(BaseSensorDataRecord):
+class SensorDataRecordArchive(BaseSensorDataRecord, ArchiveMixin):
+    """Sensor data archived one row per record
+
+    New archives are stored in `SensorDataArchiveBlock`, this table is still
+    read to get the data archived before blocks were introduced.
+    """
     __tablename__ = "sensor_records_archive"
     __bind_key__ = "archive"
 
     measure: Mapped[str] = mapped_column(sa.String(length=32), index=True)
     ecosystem_uid: Mapped[str] = mapped_column(sa.String(length=8), index=True)
     sensor_uid: Mapped[str] = mapped_column(sa.String(length=16), index=True)
+
+    @classmethod
+    async def insert_archives(
+            cls,
+            session: AsyncSession,
+            /,
+            rows: Sequence[Row],
+    ) -> None:
+        await SensorDataArchiveBlock.add_records(session, rows)
+
+    @classmethod
+    async def get_archived_values(
+            cls,
+            session: AsyncSession,
+            /,
+            query: Callable[[type], Select],
+            time_window: TimeWindow,
+            archive_column: str,
+    ) -> list[Row]:
+        legacy = await super().get_archived_values(
+            session, query, time_window, archive_column)
+        blocks = await SensorDataArchiveBlock.get_archived_values(
+            session, query, time_window, archive_column)
+        if not legacy:
+            return blocks
+        return list(heapq.merge(legacy, blocks, key=lambda r: r[0]))
+
+
+class SensorDataArchiveBlock(Base, CRUDMixin):
+    """A day of archived data of a sensor measure packed in a single row
+
+    Timestamps and values are delta-encoded and compressed, see
+    `ouranos.core.database.compression`.
+    """
+    __tablename__ = "sensor_records_archive_blocks"
+    __bind_key__ = "archive"
+    _lookup_keys = ["ecosystem_uid", "sensor_uid", "measure", "day"]
+    __table_args__ = (
+        UniqueConstraint(
+            "ecosystem_uid", "sensor_uid", "measure", "day",
+            name="_no_repost_constraint"
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    ecosystem_uid: Mapped[str] = mapped_column(sa.String(length=8), index=True)
+    sensor_uid: Mapped[str] = mapped_column(sa.String(length=16), index=True)
+    measure: Mapped[str] = mapped_column(sa.String(length=32))
+    day: Mapped[date] = mapped_column(sa.Date, index=True)
+    start: Mapped[datetime] = mapped_column(UtcDateTime)
+    count: Mapped[int] = mapped_column()
+    resolution: Mapped[float] = mapped_column()
+    encoded_timestamps: Mapped[bytes] = mapped_column(sa.LargeBinary)
+    encoded_values: Mapped[bytes] = mapped_column(sa.LargeBinary)
+
+    # Values are quantized to this step when encoded
+    default_resolution: float = 0.001
+
+    def decode(self) -> list[tuple[datetime, float]]:
+        return decode_timed_values(
+            self.start, self.resolution, self.encoded_timestamps,
+            self.encoded_values)
+
+    @classmethod
+    def _get_timed_values_query(cls, sensor_uid: str, measure_name: str) -> Select:
+        return (
+            select(
+                cls.start, cls.resolution, cls.encoded_timestamps,
+                cls.encoded_values,
+            )
+            .where(cls.measure == measure_name)
+            .where(cls.sensor_uid == sensor_uid)
+        )
+
+    @classmethod
+    async def get_archived_values(
+            cls,
+            session: AsyncSession,
+            /,
+            query: Callable[[type], Select],
+            time_window: TimeWindow,
+            archive_column: str,
+    ) -> list[tuple[datetime, float]]:
+        stmt = (
+            query(cls)
+            .where(cls.day >= utc_date(time_window.start))
+            .where(cls.day <= utc_date(time_window.end))
+            .order_by(cls.day.asc())
+        )
+        result = await session.execute(stmt)
+        return [
+            value
+            for block in result.all()
+            for value in decode_timed_values(*block)
+            if time_window.start < value[0] <= time_window.end
+        ]
+
+    @classmethod
+    async def add_records(
+            cls,
+            session: AsyncSession,
+            /,
+            rows: Sequence[Row],
+    ) -> None:
+        """Pack sensor data records into the blocks, merging existing ones"""
+        grouped: dict[tuple[str, str, str, date], dict[datetime, float]] = {}
+        for row in rows:
+            # Missing values cannot be encoded and carry no information
+            if row.value is None or not math.isfinite(row.value):
+                continue
+            timestamp: datetime = row.timestamp
+            key = (row.ecosystem_uid, row.sensor_uid, row.measure, utc_date(timestamp))
+            grouped.setdefault(key, {})[timestamp] = row.value
+        if not grouped:
+            return
+
+        stmt = (
+            select(cls)
+            .where(cls.sensor_uid.in_({key[1] for key in grouped}))
+            .where(cls.day.in_({key[3] for key in grouped}))
+        )
+        result = await session.execute(stmt)
+        for block in result.scalars().all():
+            key = (block.ecosystem_uid, block.sensor_uid, block.measure, block.day)
+            if key in grouped:
+                # Already archived values are overwritten by the new ones
+                grouped[key] = {**dict(block.decode()), **grouped[key]}
+
+        values = []
+        for (ecosystem_uid, sensor_uid, measure, day), records in grouped.items():
+            timestamps = sorted(records)
+            encoded = encode_timed_values(
+                timestamps, [records[timestamp] for timestamp in timestamps],
+                resolution=cls.default_resolution)
+            values.append({
+                "ecosystem_uid": ecosystem_uid,
+                "sensor_uid": sensor_uid,
+                "measure": measure,
+                "day": day,
+                "start": encoded.start,
+                "count": encoded.count,
+                "resolution": encoded.resolution,
+                "encoded_timestamps": encoded.timestamps,
+                "encoded_values": encoded.values,
+            })
+        await cls.create_multiple(session, values=values, _on_conflict_do="update")
+
+
+# ---------------------------------------------------------------------------
+#   Archiving progress
+# ---------------------------------------------------------------------------
+class ArchiveWatermark(Base, CRUDMixin):
+    """Progress of the archiving of a table
+
+    :param table_name: the name of the archive table
+    :param cutoff: the time limit used by the last (or current) archiving run
+    :param last_timestamp: the timestamp of the last archived row
+    :param last_id: the id of the last archived row
+    :param completed: whether every row older than the cutoff was archived
+    """
+    __tablename__ = "archive_watermarks"
+    __bind_key__ = "archive"
+
+    table_name: Mapped[str] = mapped_column(sa.String(length=64), primary_key=True)
+    cutoff: Mapped[datetime] = mapped_column(UtcDateTime)
+    last_timestamp: Mapped[Optional[datetime]] = mapped_column(UtcDateTime)
+    last_id: Mapped[Optional[int]] = mapped_column()
+    completed: Mapped[bool] = mapped_column(default=False)
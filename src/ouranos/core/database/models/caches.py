@@ -2,7 +2,9 @@ from cachetools import LRUCache, TTLCache
 
 
 # App
-cache_users = LRUCache(maxsize=32)
+# The updates made by the other web workers are broadcast, the TTL bounds the
+#  staleness of a user if a broadcast is missed
+cache_users = TTLCache(maxsize=32, ttl=300)
 
 
 # Gaia
@@ -20,12 +22,16 @@ cache_ecosystems_recent = TTLCache(maxsize=1, ttl=30)
 cache_ecosystems_has_recent_data = TTLCache(maxsize=_ecosystem_caches_size * 2, ttl=60)
 cache_ecosystems_has_recent_picture = TTLCache(maxsize=_ecosystem_caches_size, ttl=60)
 cache_ecosystems_has_active_actuator = TTLCache(maxsize=_ecosystem_caches_size, ttl=60)
+cache_ecosystems_functionalities = TTLCache(maxsize=_ecosystem_caches_size, ttl=60)
 # Hardware caches
 cache_hardware = LRUCache(maxsize=_hardware_caches_size)
 cache_hardware_groups = LRUCache(maxsize=_hardware_caches_size)
 # Sensor caches
 cache_sensors_data_skeleton = TTLCache(maxsize=_ecosystem_caches_size * 3, ttl=900)
 cache_sensors_value = TTLCache(maxsize=_ecosystem_caches_size * 32, ttl=600)
+# Archive caches
+cache_archive_watermarks = TTLCache(maxsize=4, ttl=60)
+cache_archived_values = LRUCache(maxsize=_ecosystem_caches_size * 32)
 # Measure caches
 cache_measures = LRUCache(maxsize=16)
 # Plant caches
@@ -37,3 +43,4 @@ cache_warnings = TTLCache(maxsize=5, ttl=60)
 # System
 cache_systems = LRUCache(maxsize=_system_cache_size)
 cache_systems_history = TTLCache(maxsize=_system_cache_size, ttl=60*5)
+cache_systems_hourly_history = TTLCache(maxsize=_system_cache_size, ttl=60*15)
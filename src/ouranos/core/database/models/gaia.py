@@ -413,20 +413,97 @@ class Ecosystem(Base, CachedCRUDMixin, InConfigMixin):
         result = await Ecosystem.check_if_recent_picture(session, uid=self.uid)
         return result
 
+    @classmethod
+    def _generate_data_functionalities_query(cls, uids: Sequence[str]) -> Select:
+        time_limit = datetime.now(timezone.utc) - timedelta(hours=TIME_LIMITS.SENSORS)
+
+        def recent_sensor_data(level: gv.HardwareLevel) -> sa.Exists:
+            return (
+                sa.exists()
+                .where(
+                    Hardware.ecosystem_uid == cls.uid,
+                    Hardware.type.in_([gv.HardwareType.sensor, gv.HardwareType.camera]),
+                    Hardware.level == level,
+                    Hardware.last_log >= time_limit,
+                )
+            )
+
+        return (
+            select(
+                cls.uid,
+                (
+                    sa.exists()
+                    .where(
+                        ActuatorState.ecosystem_uid == cls.uid,
+                        ActuatorState.active == True,
+                    )
+                ).label("actuators"),
+                recent_sensor_data(gv.HardwareLevel.ecosystem).label("ecosystem_data"),
+                recent_sensor_data(gv.HardwareLevel.environment).label("environment_data"),
+                recent_sensor_data(gv.HardwareLevel.plants).label("plants_data"),
+                (
+                    sa.exists()
+                    .where(
+                        CameraPicture.ecosystem_uid == cls.uid,
+                        CameraPicture.timestamp >= time_limit,
+                    )
+                ).label("recent_picture"),
+            )
+            .where(cls.uid.in_(uids))
+        )
+
+    @classmethod
+    async def get_data_functionalities(
+            cls,
+            session: AsyncSession,
+            /,
+            uids: Sequence[str],
+    ) -> dict[str, dict[str, bool]]:
+        """Return the data-based functionalities of the ecosystems, indexed by
+        uid, using a single query for all the ecosystems not cached yet"""
+        rv: dict[str, dict[str, bool]] = {}
+        missing: list[str] = []
+        for uid in uids:
+            functionalities = caches.cache_ecosystems_functionalities.get(uid)
+            if functionalities is None:
+                missing.append(uid)
+            else:
+                rv[uid] = functionalities
+        if missing:
+            stmt = cls._generate_data_functionalities_query(missing)
+            result = await session.execute(stmt)
+            for row in result.all():
+                uid, *flags = row
+                functionalities = {
+                    key: bool(flag) for key, flag in zip(row._fields[1:], flags)
+                }
+                caches.cache_ecosystems_functionalities[uid] = functionalities
+                rv[uid] = functionalities
+        return rv
+
+    @classmethod
+    async def get_functionalities_multiple(
+            cls,
+            session: AsyncSession,
+            /,
+            ecosystems: Sequence[Ecosystem],
+    ) -> list[dict]:
+        data_functionalities = await cls.get_data_functionalities(
+            session, uids=[ecosystem.uid for ecosystem in ecosystems])
+        return [
+            {
+                "uid": ecosystem.uid,
+                "name": ecosystem.name,
+                **ecosystem.management_dict,
+                **data_functionalities[ecosystem.uid],
+            }
+            for ecosystem in ecosystems
+        ]
+
     async def get_functionalities(self, session: AsyncSession) -> dict:
-        return {
-            "uid": self.uid,
-            "name": self.name,
-            **self.management_dict,
-            "actuators": await self.has_active_actuator(session),
-            "ecosystem_data": await self.has_recent_sensor_data(
-                session, level=gv.HardwareLevel.ecosystem),
-            "environment_data": await self.has_recent_sensor_data(
-                session, level=gv.HardwareLevel.environment),
-            "plants_data": await self.has_recent_sensor_data(
-                session, level=gv.HardwareLevel.plants),
-            "recent_picture": await self.has_recent_picture(session),
-        }
+        functionalities = await Ecosystem.get_functionalities_multiple(
+            session, ecosystems=[self])
+        return functionalities[0]
 
     async def get_hardware(
             self,
@@ -529,6 +606,18 @@ class Ecosystem(Base, CachedCRUDMixin, InConfigMixin):
             session, ecosystem_uid=self.uid, actuator_type=actuator_type,
             time_window=time_window)
 
+    async def get_timed_values_last_change(
+            self,
+            session: AsyncSession,
+            actuator_type: gv.HardwareType,
+            time_window: TimeWindow,
+    ) -> tuple[int | None, datetime | None]:
+        return await ActuatorRecord.get_last_change(
+            session,
+            query=ActuatorRecord._get_timed_values_query(self.uid, actuator_type),
+            time_window=time_window,
+        )
+
     async def turn_actuator(
             self,
             dispatcher: AsyncDispatcher,
@@ -1025,12 +1114,9 @@ class Sensor(Hardware):
         time_window: TimeWindow = lookup_keys.pop("time_window", None)  # ty: ignore[invalid-assignment]
         stmt = super()._generate_get_query(offset, limit, order_by, **lookup_keys)
         if time_window:
-            exists_stmt = (
-                select(1)
-                .where(SensorDataRecord.sensor_uid == Hardware.uid)
+            stmt = stmt.where(
+                Hardware.uid.in_(SensorActivity.generate_active_sensors_query(time_window))
             )
-            exists_stmt = time_window.modify_stmt(exists_stmt, SensorDataRecord.timestamp)
-            stmt = stmt.where(exists_stmt.exists())
         return stmt
 
     @classmethod
@@ -1104,6 +1190,18 @@ class Sensor(Hardware):
                 time_window=time_window),
         }
 
+    async def get_historic_data_last_change(
+            self,
+            session: AsyncSession,
+            measure: str,
+            time_window: TimeWindow,
+    ) -> tuple[int | None, datetime | None]:
+        return await SensorDataRecord.get_last_change(
+            session,
+            query=SensorDataRecord._get_timed_values_query(self.uid, measure),
+            time_window=time_window,
+        )
+
     @staticmethod
     async def create_records(
             session: AsyncSession,
@@ -1407,9 +1505,10 @@ class SensorDataCache(BaseSensorData, CacheMixin):
             sensor_uid: str,
             measure: str,
     ) -> Sequence[Row[tuple[datetime, float]]]:
-        await cls.remove_expired(session)
+        time_limit = datetime.now(timezone.utc) - timedelta(seconds=cls.get_ttl())
         sub_stmt = (
             select(cls.id, sa_max(cls.timestamp))
+            .where(cls.timestamp > time_limit)
             .group_by(cls.sensor_uid, cls.measure)
             .subquery()
         )
@@ -1424,6 +1523,45 @@ class SensorDataCache(BaseSensorData, CacheMixin):
         return result.all()
 
 
+class ResourceVersion(Base, CRUDMixin):
+    """Time of the latest update of the resources the web server derives its
+    validators and cache keys from
+
+    The versions are written by the aggregator when it stores an update and
+    read by all the web workers, so that they all compute the same validators.
+    """
+    __tablename__ = "resource_versions"
+    __bind_key__ = "transient"
+
+    name: Mapped[str] = mapped_column(sa.String(length=32), primary_key=True)
+    timestamp: Mapped[datetime] = mapped_column(UtcDateTime)
+
+    @classmethod
+    async def bump(cls, session: AsyncSession, *names: str) -> None:
+        now = datetime.now(timezone.utc)
+        await cls.create_multiple(
+            session,
+            values=[{"name": name, "timestamp": now} for name in names],
+            _on_conflict_do="update",
+        )
+
+    @classmethod
+    async def get_versions(
+            cls,
+            session: AsyncSession,
+            names: Sequence[str],
+    ) -> dict[str, str]:
+        """Return the versions of the resources `names`, the resources never
+        updated have the version '0'"""
+        stmt = (
+            select(cls.name, cls.timestamp)
+            .where(cls.name.in_(names))
+        )
+        result = await session.execute(stmt)
+        versions = {name: timestamp.isoformat() for name, timestamp in result.all()}
+        return {name: versions.get(name, "0") for name in names}
+
+
 class BaseSensorDataRecord(BaseSensorData, CRUDMixin):
     __abstract__ = True
     _lookup_keys = ["timestamp", "ecosystem_uid", "sensor_uid", "measure"]
@@ -1434,6 +1572,14 @@ class BaseSensorDataRecord(BaseSensorData, CRUDMixin):
         ),
     )
 
+    @classmethod
+    def _get_timed_values_query(cls, sensor_uid: str, measure_name: str) -> Select:
+        return (
+            select(cls.timestamp, cls.value)
+            .where(cls.measure == measure_name)
+            .where(cls.sensor_uid == sensor_uid)
+        )
+
 
 class SensorDataRecord(BaseSensorDataRecord, ArchivableMixin):
     __tablename__ = "sensor_records"
@@ -1458,23 +1604,151 @@ class SensorDataRecord(BaseSensorDataRecord, ArchivableMixin):
             measure_name: str,
             time_window: TimeWindow
     ) -> Sequence[Row[tuple[datetime, float]]]:
-        stmt = (
-            select(cls.timestamp, cls.value)
-            .where(cls.measure == measure_name)
-            .where(cls.sensor_uid == sensor_uid)
-            .where(
-                (cls.timestamp > time_window.start)
-                & (cls.timestamp <= time_window.end)
-            )
-            .order_by(cls.timestamp.asc())
+        return await cls.get_federated_values(
+            session,
+            query=lambda Model: Model._get_timed_values_query(sensor_uid, measure_name),
+            time_window=time_window,
+            cache_key=(sensor_uid, measure_name),
         )
+
+    @classmethod
+    async def create_new(
+            cls,
+            session: AsyncSession,
+            /,
+            values: list[dict],
+    ) -> list[dict]:
+        """Insert the records not logged yet and return them
+
+        The records already logged, like the ones sent again after a
+        connection issue, are ignored.
+        """
+        if not values:
+            return []
+        columns = (cls.timestamp, cls.ecosystem_uid, cls.sensor_uid, cls.measure)
+        if cls._get_dialect() not in {"postgresql", "sqlite"}:
+            # No `RETURNING` support, look for the records already logged first
+            stmt = (
+                select(*columns)
+                .where(cls.sensor_uid.in_({value["sensor_uid"] for value in values}))
+                .where(cls.timestamp >= min(value["timestamp"] for value in values))
+                .where(cls.timestamp <= max(value["timestamp"] for value in values))
+            )
+            result = await session.execute(stmt)
+            logged = {tuple(row) for row in result.all()}
+            values = [
+                value for value in values
+                if (
+                    value["timestamp"].astimezone(timezone.utc),
+                    value["ecosystem_uid"], value["sensor_uid"], value["measure"],
+                ) not in logged
+            ]
+            await cls.create_multiple(session, values, _on_conflict_do="nothing")
+            return values
+        insert_ = cls._get_insert()
+        on_conflict_do = cls._get_on_conflict_do()
+        stmt = on_conflict_do(insert_(cls).values(values), "nothing").returning(*columns)
         result = await session.execute(stmt)
-        return result.all()
+        return [row._asdict() for row in result.all()]
 
 
 sa.Index("idx_sensor_records_sensor_uid_timestamp", SensorDataRecord.sensor_uid, SensorDataRecord.timestamp)
 
 
+class SensorActivity(Base, CRUDMixin):
+    """Summary of the records logged for each sensor and measure
+
+    This small table is maintained when sensor records are logged so that the
+    sensors with data in a time window can be found without probing the
+    `sensor_records` table.
+    """
+    __tablename__ = "sensor_activity"
+    _lookup_keys = ["sensor_uid", "measure"]
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    sensor_uid: Mapped[str] = mapped_column(
+        sa.String(length=16), sa.ForeignKey("hardware.uid"))
+    measure: Mapped[str] = mapped_column(
+        sa.String(length=32), sa.ForeignKey("measures.name"))
+    first_seen: Mapped[datetime] = mapped_column(UtcDateTime)
+    last_seen: Mapped[datetime] = mapped_column(UtcDateTime, index=True)
+    count: Mapped[int] = mapped_column(default=0)
+
+    __table_args__ = (
+        UniqueConstraint(
+            "sensor_uid", "measure",
+            name="uq_sensor_activity_sensor_uid_measure"
+        ),
+    )
+
+    @classmethod
+    async def record_activity(
+            cls,
+            session: AsyncSession,
+            /,
+            records: Sequence[dict],
+    ) -> None:
+        """Update the activity of the sensors with newly logged records
+
+        :param records: dicts with at least the 'sensor_uid', 'measure' and
+        'timestamp' keys, as used to create `SensorDataRecord`.
+        """
+        activity: dict[tuple[str, str], dict] = {}
+        for record in records:
+            key = (record["sensor_uid"], record["measure"])
+            timestamp: datetime = record["timestamp"]
+            summary = activity.get(key)
+            if summary is None:
+                activity[key] = {
+                    "sensor_uid": key[0],
+                    "measure": key[1],
+                    "first_seen": timestamp,
+                    "last_seen": timestamp,
+                    "count": 1,
+                }
+            else:
+                summary["first_seen"] = min(summary["first_seen"], timestamp)
+                summary["last_seen"] = max(summary["last_seen"], timestamp)
+                summary["count"] += 1
+        if not activity:
+            return
+        # Merge the summaries in the DB so that concurrent flushes do not lose
+        #  any increment
+        mysql_like = cls._get_dialect() in {"mariadb", "mysql"}
+        insert_ = cls._get_insert()
+        stmt = insert_(cls).values([*activity.values()])
+        current = cls.__table__.c
+        new = stmt.inserted if mysql_like else stmt.excluded
+        merged = {
+            "first_seen": sa.case(
+                (new["first_seen"] < current["first_seen"], new["first_seen"]),
+                else_=current["first_seen"],
+            ),
+            "last_seen": sa.case(
+                (new["last_seen"] > current["last_seen"], new["last_seen"]),
+                else_=current["last_seen"],
+            ),
+            "count": current["count"] + new["count"],
+        }
+        if mysql_like:
+            stmt = stmt.on_duplicate_key_update(merged)
+        else:
+            stmt = stmt.on_conflict_do_update(
+                index_elements=cls._get_lookup_keys(), set_=merged)
+        await session.execute(stmt)
+
+    @classmethod
+    def generate_active_sensors_query(cls, time_window: TimeWindow) -> Select:
+        """Return a query selecting the uid of the sensors with records
+        logged during the time window"""
+        stmt = select(cls.sensor_uid)
+        if time_window.start is not None:
+            stmt = stmt.where(cls.last_seen > time_window.start)
+        if time_window.end is not None:
+            stmt = stmt.where(cls.first_seen <= time_window.end)
+        return stmt
+
+
 # ---------------------------------------------------------------------------
 #   Sensor alarms
 # ---------------------------------------------------------------------------
@@ -1629,6 +1903,18 @@ class BaseActuatorRecord(Base, CRUDMixin):
             sa.String(length=8), sa.ForeignKey("ecosystems.uid"), index=True
         )
 
+    @classmethod
+    def _get_timed_values_query(
+            cls,
+            ecosystem_uid: str,
+            actuator_type: gv.HardwareType,
+    ) -> Select:
+        return (
+            select(cls.timestamp, cls.active, cls.mode, cls.status, cls.level)
+            .where(cls.ecosystem_uid == ecosystem_uid)
+            .where(cls.type == actuator_type)
+        )
+
     @classmethod
     async def get_timed_values(
             cls,
@@ -1637,17 +1923,11 @@ class BaseActuatorRecord(Base, CRUDMixin):
             actuator_type: gv.HardwareType,
             time_window: TimeWindow,
     ) -> Sequence[Row[tuple[datetime, bool, gv.ActuatorMode, bool, float | None]]]:
-        stmt = (
-            select(cls.timestamp, cls.active, cls.mode, cls.status, cls.level)
-            .where(cls.ecosystem_uid == ecosystem_uid)
-            .where(cls.type == actuator_type)
-            .where(
-                (cls.timestamp > time_window.start)
-                & (cls.timestamp <= time_window.end)
-            )
-            .order_by(cls.timestamp.asc())
+        stmt = time_window.modify_stmt(
+            cls._get_timed_values_query(ecosystem_uid, actuator_type),
+            cls.timestamp,
         )
-        result = await session.execute(stmt)
+        result = await session.execute(stmt.order_by(cls.timestamp.asc()))
         return result.all()
 
 
@@ -1663,6 +1943,21 @@ class ActuatorRecord(BaseActuatorRecord, ArchivableMixin):
     def get_time_limit(cls) -> int:
         return current_app.config["ACTUATOR_ARCHIVING_PERIOD"] or 180
 
+    @classmethod
+    async def get_timed_values(
+            cls,
+            session: AsyncSession,
+            ecosystem_uid: str,
+            actuator_type: gv.HardwareType,
+            time_window: TimeWindow,
+    ) -> Sequence[Row[tuple[datetime, bool, gv.ActuatorMode, bool, float | None]]]:
+        return await cls.get_federated_values(
+            session,
+            query=lambda Model: Model._get_timed_values_query(ecosystem_uid, actuator_type),
+            time_window=time_window,
+            cache_key=(ecosystem_uid, actuator_type),
+        )
+
 
 # ---------------------------------------------------------------------------
 #   Gaia warnings
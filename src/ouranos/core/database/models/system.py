@@ -1,15 +1,15 @@
 from __future__ import annotations
 
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Sequence
+from typing import Any, Iterable, Optional, Sequence
 
 import sqlalchemy as sa
-from sqlalchemy import select, Row, UniqueConstraint
+from sqlalchemy import delete, select, Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.sql.functions import func
 
-from ouranos.core.database.models.abc import Base, CacheMixin, CRUDMixin
+from ouranos.core.database.models.abc import Base, CRUDMixin
 from ouranos.core.database.models import caches
 from ouranos.core.database.models.caching import cached, CachedCRUDMixin, hash_get
 from ouranos.core.database.models.types import UtcDateTime
@@ -17,6 +17,21 @@ from ouranos.core.database.models.utils import TimeWindow
 
 
 timed_value = Row[tuple[datetime, float, Optional[float], float, float, float]]
+process_timed_value = Row[tuple[str, datetime, float, float, Optional[int], int]]
+# The timestamp followed by the min, mean and max of each system metric
+hourly_timed_value = tuple[datetime | float | None, ...]
+
+system_metrics: tuple[str, ...] = (
+    "CPU_used", "CPU_temp", "RAM_process", "RAM_used", "DISK_used",
+)
+hourly_columns: tuple[str, ...] = (
+    "timestamp",
+    *(
+        f"{metric}_{stat}"
+        for metric in system_metrics
+        for stat in ("min", "mean", "max")
+    ),
+)
 
 
 # ---------------------------------------------------------------------------
@@ -33,19 +48,43 @@ class System(Base, CachedCRUDMixin):
     RAM_total: Mapped[float] = mapped_column(sa.Float(precision=2))
     DISK_total: Mapped[float] = mapped_column(sa.Float(precision=2))
 
-    async def get_recent_timed_values(
+    async def get_timed_values(
             self,
             session: AsyncSession,
+            time_window: TimeWindow,
     ) -> Sequence[timed_value]:
-        return await SystemDataCache.get_recent_timed_values(
-            session, system_uid=self.uid)
+        return await SystemDataRecord.get_timed_values(
+            session, time_window=time_window, system_uid=self.uid)
 
-    async def get_timed_values(
+    async def get_hourly_timed_values(
             self,
             session: AsyncSession,
             time_window: TimeWindow,
-    ) -> Sequence[timed_value]:
-        return await SystemDataRecord.get_timed_values(
+    ) -> list[hourly_timed_value]:
+        """Get the hourly system data, the hours not rolled up yet being
+        aggregated from the raw records"""
+        rolled_up = await SystemDataHourly.get_timed_values(
+            session, time_window=time_window, system_uid=self.uid)
+        rv: list[hourly_timed_value] = [tuple(row) for row in rolled_up]
+        if rv:
+            start = rv[-1][0] + timedelta(hours=1)
+        else:
+            start = floor_hour(time_window.start)
+        if time_window.end is None or start <= time_window.end:
+            raw_rows = await SystemDataHourly.get_raw_rows(
+                session, system_uid=self.uid, start=start, end=time_window.end)
+            rv.extend(
+                tuple(aggregate[column] for column in hourly_columns)
+                for aggregate in aggregate_hourly(raw_rows)
+            )
+        return rv
+
+    async def get_processes_timed_values(
+            self,
+            session: AsyncSession,
+            time_window: TimeWindow,
+    ) -> Sequence[process_timed_value]:
+        return await SystemProcessRecord.get_timed_values(
             session, time_window=time_window, system_uid=self.uid)
 
 
@@ -68,6 +107,12 @@ class BaseSystemData(Base):
 class SystemDataRecord(BaseSystemData, CRUDMixin):
     __tablename__ = "system_records"
     __bind_key__ = "system"
+    __table_args__ = (
+        sa.Index(
+            "ix_system_records_system_uid_timestamp",
+            "system_uid", "timestamp",
+        ),
+    )
 
     @classmethod
     @cached(caches.cache_systems_history, key_hasher=hash_get)
@@ -97,38 +142,245 @@ class SystemDataRecord(BaseSystemData, CRUDMixin):
         return result.all()
 
 
-class SystemDataCache(BaseSystemData, CacheMixin):
-    __tablename__ = "system_temp"
-    __bind_key__ = "transient"
+def floor_hour(timestamp: datetime) -> datetime:
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+def aggregate_hourly(rows: Iterable[timed_value]) -> list[dict[str, Any]]:
+    """Compute the hourly min, mean and max of each metric of raw system data
+    rows, given in chronological order"""
+    hours: dict[datetime, list[tuple]] = {}
+    for timestamp, *values in rows:
+        hours.setdefault(floor_hour(timestamp), []).append(values)
+    rv: list[dict[str, Any]] = []
+    for hour, samples in hours.items():
+        aggregate: dict[str, Any] = {"timestamp": hour, "samples": len(samples)}
+        for metric, metric_values in zip(system_metrics, zip(*samples)):
+            metric_values = [value for value in metric_values if value is not None]
+            if metric_values:
+                aggregate[f"{metric}_min"] = min(metric_values)
+                aggregate[f"{metric}_mean"] = round(
+                    sum(metric_values) / len(metric_values), 2)
+                aggregate[f"{metric}_max"] = max(metric_values)
+            else:
+                aggregate[f"{metric}_min"] = None
+                aggregate[f"{metric}_mean"] = None
+                aggregate[f"{metric}_max"] = None
+        rv.append(aggregate)
+    return rv
+
+
+class SystemDataHourly(Base, CRUDMixin):
+    """The hourly min, mean and max of the system data
+
+    The raw `SystemDataRecord` rows are rolled up once their hour is over, and
+    deleted once older than the `SYSTEM_ARCHIVING_PERIOD`.
+    """
+    __tablename__ = "system_records_hourly"
+    __bind_key__ = "system"
     __table_args__ = (
-        UniqueConstraint(
-            "system_uid",
-            name="_no_repost_constraint"
+        sa.UniqueConstraint(
+            "system_uid", "timestamp",
+            name="uq_system_records_hourly_system_uid_timestamp"
         ),
     )
+    _lookup_keys = ["system_uid", "timestamp"]
 
-    @classmethod
-    def get_ttl(cls) -> int:
-        return 90
+    id: Mapped[int] = mapped_column(primary_key=True)
+    system_uid: Mapped[str] = mapped_column(sa.ForeignKey("systems.uid"))
+    # Start of the hour
+    timestamp: Mapped[datetime] = mapped_column(UtcDateTime)
+    samples: Mapped[int] = mapped_column()
+    CPU_used_min: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    CPU_used_mean: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    CPU_used_max: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    CPU_temp_min: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    CPU_temp_mean: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    CPU_temp_max: Mapped[Optional[float]] = mapped_column(sa.Float(precision=1))
+    RAM_process_min: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    RAM_process_mean: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    RAM_process_max: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    RAM_used_min: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    RAM_used_mean: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    RAM_used_max: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    DISK_used_min: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    DISK_used_mean: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
+    DISK_used_max: Mapped[Optional[float]] = mapped_column(sa.Float(precision=2))
 
     @classmethod
-    async def get_recent_timed_values(
+    @cached(caches.cache_systems_hourly_history, key_hasher=hash_get)
+    async def get_timed_values(
             cls,
             session: AsyncSession,
-            /,
-            system_uid: str | list | None = None
+            *,
+            time_window: TimeWindow,
+            system_uid: str,
+    ) -> Sequence[Row]:
+        stmt = (
+            select(*(getattr(cls, column) for column in hourly_columns))
+            .where(cls.system_uid == system_uid)
+            .order_by(cls.timestamp.asc())
+        )
+        # The hour including the window start is included, like when the
+        #  hours are aggregated from the raw records
+        if time_window.start is not None:
+            stmt = stmt.where(cls.timestamp >= floor_hour(time_window.start))
+        if time_window.end is not None:
+            stmt = stmt.where(cls.timestamp <= time_window.end)
+        result = await session.execute(stmt)
+        return result.all()
+
+    @staticmethod
+    async def get_raw_rows(
+            session: AsyncSession,
+            *,
+            system_uid: str,
+            start: datetime,
+            end: datetime | None = None,
     ) -> Sequence[timed_value]:
-        time_limit = datetime.now(timezone.utc) - timedelta(seconds=cls.get_ttl())
+        """Get the raw system data recorded from `start`, included, to `end`,
+        excluded"""
+        record = SystemDataRecord
         stmt = (
             select(
-                cls.timestamp, cls.CPU_used, cls.CPU_temp, cls.RAM_process,
-                cls.RAM_used, cls.DISK_used,
+                record.timestamp, record.CPU_used, record.CPU_temp,
+                record.RAM_process, record.RAM_used, record.DISK_used,
             )
-            .where(cls.timestamp > time_limit)
+            .where(
+                (record.system_uid == system_uid) &
+                (record.timestamp >= start)
+            )
+            .order_by(record.timestamp.asc())
         )
-        if system_uid:
-            if isinstance(system_uid, str):
-                system_uid = [system_uid, ]
-            stmt = stmt.where(cls.system_uid.in_(system_uid))
+        if end is not None:
+            stmt = stmt.where(record.timestamp < end)
         result = await session.execute(stmt)
         return result.all()
+
+    @classmethod
+    async def _get_latest_hours(cls, session: AsyncSession) -> dict[str, datetime]:
+        stmt = (
+            select(cls.system_uid, func.max(cls.timestamp))
+            .group_by(cls.system_uid)
+        )
+        result = await session.execute(stmt)
+        return {system_uid: latest for system_uid, latest in result.all()}
+
+    @classmethod
+    async def roll_up(
+            cls,
+            session: AsyncSession,
+            *,
+            until: datetime | None = None,
+            max_hours: int = 24,
+    ) -> int:
+        """Roll up the raw system data of the hours over before `until`, now
+        by default, that have not been rolled up yet
+
+        At most `max_hours` hours of data are rolled up per system so that a
+        large backlog is caught up over several calls.
+
+        :return: the number of hourly rows created.
+        """
+        until = floor_hour(until or datetime.now(timezone.utc))
+        latest_hours = await cls._get_latest_hours(session)
+        record = SystemDataRecord
+        stmt = select(record.system_uid).distinct()
+        result = await session.execute(stmt)
+        rolled_up = 0
+        for system_uid in result.scalars().all():
+            # Skip the hours without raw data, like when the server was down
+            stmt = select(func.min(record.timestamp)).where(
+                record.system_uid == system_uid)
+            latest_hour = latest_hours.get(system_uid)
+            if latest_hour is not None:
+                stmt = stmt.where(
+                    record.timestamp >= latest_hour + timedelta(hours=1))
+            result = await session.execute(stmt)
+            first_timestamp = result.scalar()
+            if first_timestamp is None:
+                continue
+            start = floor_hour(first_timestamp)
+            if start >= until:
+                continue
+            end = min(until, start + timedelta(hours=max_hours))
+            raw_rows = await cls.get_raw_rows(
+                session, system_uid=system_uid, start=start, end=end)
+            values = [
+                {"system_uid": system_uid, **aggregate}
+                for aggregate in aggregate_hourly(raw_rows)
+            ]
+            if values:
+                await cls.create_multiple(
+                    session, values, _on_conflict_do="update")
+                rolled_up += len(values)
+        return rolled_up
+
+    @classmethod
+    async def delete_rolled_up(
+            cls,
+            session: AsyncSession,
+            *,
+            older_than: datetime,
+    ) -> None:
+        """Delete the raw system data recorded before `older_than` that has
+        been rolled up"""
+        latest_hours = await cls._get_latest_hours(session)
+        record = SystemDataRecord
+        for system_uid, latest_hour in latest_hours.items():
+            limit = min(older_than, latest_hour + timedelta(hours=1))
+            stmt = delete(record).where(
+                (record.system_uid == system_uid) &
+                (record.timestamp < limit)
+            )
+            await session.execute(stmt)
+
+
+class SystemProcessRecord(Base, CRUDMixin):
+    """The resources used by each process of the Ouranos process tree"""
+    __tablename__ = "system_process_records"
+    __bind_key__ = "system"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    system_uid: Mapped[str] = mapped_column(sa.ForeignKey("systems.uid"))
+    timestamp: Mapped[datetime] = mapped_column(UtcDateTime, index=True)
+    label: Mapped[str] = mapped_column(sa.String(64))
+    pid: Mapped[int] = mapped_column()
+    CPU_used: Mapped[float] = mapped_column(sa.Float(precision=1))
+    RAM_used: Mapped[float] = mapped_column(sa.Float(precision=3))
+    FD_count: Mapped[Optional[int]] = mapped_column()
+    thread_count: Mapped[int] = mapped_column()
+
+    @classmethod
+    async def get_timed_values(
+            cls,
+            session: AsyncSession,
+            *,
+            time_window: TimeWindow,
+            system_uid: str,
+    ) -> Sequence[process_timed_value]:
+        stmt = (
+            select(
+                cls.label, cls.timestamp, cls.CPU_used, cls.RAM_used,
+                cls.FD_count, cls.thread_count,
+            )
+            .where(
+                (cls.system_uid == system_uid) &
+                (cls.timestamp > time_window.start) &
+                (cls.timestamp <= time_window.end)
+            )
+            .order_by(cls.label.asc(), cls.timestamp.asc())
+        )
+        result = await session.execute(stmt)
+        return result.all()
+
+    @classmethod
+    async def delete_older_than(
+            cls,
+            session: AsyncSession,
+            *,
+            older_than: datetime,
+    ) -> None:
+        """Delete the process records recorded before `older_than`"""
+        stmt = delete(cls).where(cls.timestamp < older_than)
+        await session.execute(stmt)
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import datetime, timezone
+from logging import getLogger, Logger
+from typing import Any, Hashable
+
+from ouranos import current_app, db
+
+
+logger: Logger = getLogger("ouranos.core.database")
+
+
+class TouchBuffer:
+    """Buffer the updates of a "touch" column, like `last_seen`, and write them
+    in bulk
+
+    Touch columns are updated very often with a value that only matters
+    because it is the latest one. Instead of issuing an update for each touch,
+    the latest value per row is kept in memory and all the rows touched are
+    written with a single `update_multiple()` every `TOUCH_FLUSH_INTERVAL`
+    seconds.
+
+    :param model: the model owning the column. It must implement an
+    `update_multiple(session, values)` classmethod.
+    :param column: the name of the touch column.
+    :param primary_key: the name of the primary key column of the model.
+    """
+    _buffers: list[TouchBuffer] = []
+
+    def __init__(
+            self,
+            model: type,
+            column: str,
+            primary_key: str = "id",
+    ) -> None:
+        self.model = model
+        self.column = column
+        self.primary_key = primary_key
+        self._pending: dict[Hashable, datetime] = {}
+        self._task: asyncio.Task | None = None
+        self._buffers.append(self)
+
+    def __repr__(self) -> str:
+        return f"<TouchBuffer({self.model.__name__}.{self.column})>"
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def touch(self, key: Hashable, value: datetime | None = None) -> None:
+        """Record that the row with the primary key `key` was touched at
+        `value`, now by default"""
+        value = value or datetime.now(timezone.utc)
+        current = self._pending.get(key)
+        if current is None or value > current:
+            self._pending[key] = value
+
+    async def flush(self) -> int:
+        """Write the pending touches and return the number of rows updated"""
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, {}
+        values: list[dict[str, Any]] = [
+            {self.primary_key: key, self.column: value}
+            for key, value in pending.items()
+        ]
+        try:
+            async with db.scoped_session() as session:
+                await self.model.update_multiple(session, values=values)
+        except Exception as e:
+            logger.error(
+                f"Encountered an error when trying to write the buffered "
+                f"'{self.model.__name__}.{self.column}' updates. Error msg: "
+                f"`{e.__class__.__name__}: {e}`")
+            # Keep the touches for the next flush, unless touched since
+            for key, value in pending.items():
+                self.touch(key, value)
+            return 0
+        return len(values)
+
+    async def _flush_periodically(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.flush()
+
+    def start(self, interval: float | None = None) -> None:
+        """Flush the pending touches every `interval` seconds, read from the
+        config if None"""
+        if self._task is not None:
+            return
+        interval = interval or current_app.config["TOUCH_FLUSH_INTERVAL"]
+        self._task = asyncio.create_task(
+            self._flush_periodically(interval), name=f"touch-{self.column}")
+
+    async def stop(self) -> None:
+        """Stop the periodic flush and write the pending touches"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    @classmethod
+    def start_all(cls, interval: float | None = None) -> None:
+        for buffer in cls._buffers:
+            buffer.start(interval)
+
+    @classmethod
+    async def stop_all(cls) -> None:
+        for buffer in cls._buffers:
+            await buffer.stop()
+
+    @classmethod
+    async def flush_all(cls) -> int:
+        return sum([await buffer.flush() for buffer in cls._buffers])
@@ -38,5 +38,9 @@ class NotAuthorized(Exception):
     pass
 
 
+class PasswordHashingBusyError(OuranosException):
+    """Too many password hashing operations are waiting for a worker"""
+
+
 class ContractVersionError(ValueError):
     pass
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from datetime import datetime, timezone
+from logging import getLogger, Logger
+import os
+import time
+from typing import Any, Awaitable, Callable
+
+from dispatcher import AsyncDispatcher
+import numpy as np
+
+from ouranos import current_app
+
+
+logger: Logger = getLogger("ouranos.loop_monitor")
+
+
+ReportCallback = Callable[[dict[str, Any]], Awaitable[None]]
+
+
+def describe_handle(handle: asyncio.Handle) -> str:
+    """Describe the callback of an event loop handle, using the coroutine and
+    its current location when the callback is a task step"""
+    callback = getattr(handle, "_callback", None)
+    task = getattr(callback, "__self__", None)
+    if isinstance(task, asyncio.Task):
+        coro = task.get_coro()
+        description = f"task '{task.get_name()}' running `{coro.__qualname__}`"
+        frame = getattr(coro, "cr_frame", None)
+        if frame is not None:
+            description += f" ({frame.f_code.co_filename}:{frame.f_lineno})"
+        return description
+    return repr(handle)
+
+
+class SlowCallbackHook:
+    """Time the callbacks run by the asyncio event loops and report the ones
+    slower than the threshold of the monitor watching their loop
+
+    This is the slow callback detection of asyncio debug mode without the
+    other checks of the debug mode, which are too costly to be kept enabled.
+    Only the event loops implemented by asyncio use `asyncio.Handle`, the
+    callbacks run by other implementations like uvloop are not timed.
+    """
+    # Functionalities run in the same process share the same loop, the slow
+    #  callbacks are recorded by the first monitor started
+    _monitors: dict[asyncio.AbstractEventLoop, list[LoopLagMonitor]] = {}
+    _original_run: Callable[[asyncio.Handle], None] | None = None
+
+    @classmethod
+    def install(cls, monitor: LoopLagMonitor, loop: asyncio.AbstractEventLoop) -> None:
+        cls._monitors.setdefault(loop, []).append(monitor)
+        if cls._original_run is None:
+            cls._original_run = asyncio.Handle._run
+            asyncio.Handle._run = cls._timed_run
+
+    @classmethod
+    def uninstall(cls, monitor: LoopLagMonitor, loop: asyncio.AbstractEventLoop) -> None:
+        monitors = cls._monitors.get(loop, [])
+        if monitor in monitors:
+            monitors.remove(monitor)
+        if not monitors:
+            cls._monitors.pop(loop, None)
+        if not cls._monitors and cls._original_run is not None:
+            asyncio.Handle._run = cls._original_run
+            cls._original_run = None
+
+    @staticmethod
+    def _timed_run(handle: asyncio.Handle) -> None:
+        start = time.perf_counter()
+        SlowCallbackHook._original_run(handle)
+        duration = time.perf_counter() - start
+        monitors = SlowCallbackHook._monitors.get(handle._loop)
+        if monitors and duration > monitors[0].slow_callback_duration:
+            monitors[0].record_slow_callback(handle, duration)
+
+
+class LoopLagMonitor:
+    """Measure the scheduling lag of the running event loop
+
+    A task sleeps for `interval` seconds in a loop and records how late it
+    wakes up. The lag percentiles over the last `window` seconds are
+    periodically passed to the `report` callback.
+
+    The callbacks blocking the loop for more than `slow_callback_duration`
+    seconds are logged.
+
+    :param name: the name of the monitored component, like the functionality
+    name.
+    :param report: an async callback receiving the reports.
+    :param interval: the time, in seconds, between two measures. Read from
+    the `LOOP_MONITOR_INTERVAL` config if None.
+    :param slow_callback_duration: the duration, in seconds, above which a
+    callback is logged, 0 to not log them. Read from the
+    `LOOP_SLOW_CALLBACK_DURATION` config if None.
+    :param report_period: the time, in seconds, between two reports. Read
+    from the `SYSTEM_UPDATE_PERIOD` config if None.
+    :param window: the time, in seconds, covered by the percentiles.
+    """
+    def __init__(
+            self,
+            name: str,
+            report: ReportCallback | None = None,
+            *,
+            interval: float | None = None,
+            slow_callback_duration: float | None = None,
+            report_period: float | None = None,
+            window: float = 300,
+    ) -> None:
+        config = current_app.config
+        if interval is None:
+            interval = config["LOOP_MONITOR_INTERVAL"]
+        if slow_callback_duration is None:
+            slow_callback_duration = config["LOOP_SLOW_CALLBACK_DURATION"]
+        if report_period is None:
+            report_period = config["SYSTEM_UPDATE_PERIOD"]
+        self.name = name
+        self.pid = os.getpid()
+        self.interval: float = interval
+        self.slow_callback_duration: float | None = slow_callback_duration
+        self.report_period: float | None = report_period
+        self._report = report
+        self._lags: deque[float] = deque(maxlen=int(window / self.interval) + 1)
+        self._slow_callbacks: int = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def started(self) -> bool:
+        return self._task is not None
+
+    def record_slow_callback(self, handle: asyncio.Handle, duration: float) -> None:
+        self._slow_callbacks += 1
+        logger.warning(
+            f"{self.name} [{self.pid}]: {describe_handle(handle)} blocked the "
+            f"event loop for {duration:.3f} s")
+
+    def get_report(self) -> dict[str, Any]:
+        if self._lags:
+            lags = np.fromiter(self._lags, dtype=np.float64)
+            p50, p95, p99 = np.percentile(lags, (50, 95, 99)).tolist()
+            lag_max = float(lags.max())
+        else:
+            p50 = p95 = p99 = lag_max = None
+        return {
+            "name": self.name,
+            "pid": self.pid,
+            "timestamp": datetime.now(timezone.utc),
+            "samples": len(self._lags),
+            "lag_p50": p50,
+            "lag_p95": p95,
+            "lag_p99": p99,
+            "lag_max": lag_max,
+            "slow_callbacks": self._slow_callbacks,
+        }
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        last_report = loop.time()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            now = loop.time()
+            self._lags.append(max(now - start - self.interval, 0.0))
+            if (
+                    self._report is not None
+                    and self.report_period
+                    and now - last_report >= self.report_period
+            ):
+                last_report = now
+                try:
+                    await self._report(self.get_report())
+                except Exception as e:
+                    logger.error(
+                        f"Encountered an error when trying to report the event "
+                        f"loop lag of {self.name}. Error msg: "
+                        f"`{e.__class__.__name__}: {e}`")
+
+    def start(self) -> None:
+        if self._task is not None:
+            raise RuntimeError(f"The loop monitor of {self.name} is already started")
+        self._loop = asyncio.get_running_loop()
+        if self.slow_callback_duration:
+            SlowCallbackHook.install(self, self._loop)
+        self._task = asyncio.create_task(
+            self._measure(), name=f"{self.name}-loop_monitor")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        SlowCallbackHook.uninstall(self, self._loop)
+        self._loop = None
+
+
+def dispatch_reports(dispatcher: AsyncDispatcher) -> ReportCallback:
+    """Return a report callback sending the reports to the web workers, which
+    serve them with the system data"""
+    async def report(data: dict[str, Any]) -> None:
+        await dispatcher.emit(
+            "event_loop_lag",
+            data={"uid": current_app.config["API_UID"], **data},
+            namespace="application-internal",
+        )
+    return report
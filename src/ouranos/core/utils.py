@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 from datetime import datetime, timedelta, timezone
+from enum import Enum
 import json as _json
 import typing as t
 from typing import Any, Protocol
@@ -17,6 +18,13 @@ from ouranos.core.exceptions import (
 from ouranos.core.database.models.utils import TimeWindow
 
 
+try:
+    # Uses its pure-Python fallback if the C extension is not available
+    import msgpack as _msgpack
+except ImportError:
+    _msgpack = None
+
+
 class Stringable(Protocol):
     def __str__(self) -> str: ...
 
@@ -32,14 +40,55 @@ def _serializer(self, o: Any) -> dict | str:
 
 class json:
     @staticmethod
-    def dumps(obj) -> bytes:
-        return orjson.dumps(obj, default=_serializer)
+    def dumps(obj, option: int | None = None) -> bytes:
+        return orjson.dumps(obj, default=_serializer, option=option)
 
     @staticmethod
     def loads(obj) -> t.Any:
         return orjson.loads(obj)
 
 
+def _msgpack_serializer(o: Any) -> Any:
+    if isinstance(o, datetime):
+        # Aware datetimes are natively packed as timestamps, naive ones are UTC
+        return o.replace(tzinfo=timezone.utc)
+    if isinstance(o, Enum):
+        return o.value
+    if isinstance(o, Row):
+        return o.tuple()
+    if hasattr(o, "__html__"):
+        return str(o.__html__())
+    raise TypeError(f"Object of type {o.__class__.__name__} is not serializable")
+
+
+class msgpack:
+    """MessagePack counterpart of `json`
+
+    Datetimes are packed with the compact timestamp extension type and unpacked
+    as aware UTC datetimes. Requires the optional `msgpack` package.
+    """
+    available: bool = _msgpack is not None
+
+    @staticmethod
+    def dumps(obj) -> bytes:
+        return _msgpack.packb(obj, default=_msgpack_serializer, datetime=True)
+
+    @staticmethod
+    def loads(obj) -> t.Any:
+        return _msgpack.unpackb(obj, timestamp=3)
+
+
+def rows_to_tuples(rows: t.Iterable[Row | tuple]) -> list[tuple]:
+    """Convert rows to plain tuples in bulk so that orjson can serialize them
+    natively, without calling `_serializer` for each row"""
+    return list(map(tuple, rows))
+
+
+def rows_to_dicts(rows: t.Iterable[Row]) -> list[dict]:
+    """Convert rows to plain dicts in bulk"""
+    return [row._asdict() for row in rows]
+
+
 def setup_loop():
     try:
         import uvloop
@@ -9,8 +9,11 @@ from typing import ClassVar, Type
 
 from ouranos import db, scheduler, setup_loop
 from ouranos.core.config import ConfigDict
+from ouranos.core.config.consts import ROOT_PID_ENV_VAR
 from ouranos.core.database.init import (
     check_db_revision, create_db_tables, insert_default_data)
+from ouranos.core.dispatchers import DispatcherFactory
+from ouranos.core.loop_monitor import dispatch_reports, LoopLagMonitor
 from ouranos.sdk.runner import Runner, runner
 
 
@@ -62,6 +65,10 @@ class Functionality(ABC):
         self.config: ConfigDict = config
         self._status: bool = False
         self._error_logged: bool = False
+        self.loop_monitor: LoopLagMonitor | None = None
+        # The first functionality created is the root of the process tree,
+        #  the ones created in its subprocesses inherit its pid
+        os.environ.setdefault(ROOT_PID_ENV_VAR, str(os.getpid()))
 
         if microservice is not None:
             self._is_microservice = microservice
@@ -119,6 +126,23 @@ class Functionality(ABC):
             for engine in db.engines.values():
                 await engine.dispose()
 
+    def _start_loop_monitor(self) -> None:
+        """Start measuring the event loop lag, if enabled."""
+        if not self.config["LOOP_MONITOR_INTERVAL"]:
+            return
+        self.loop_monitor = LoopLagMonitor(
+            self.name,
+            dispatch_reports(DispatcherFactory.get("application-internal")),
+            interval=self.config["LOOP_MONITOR_INTERVAL"],
+            slow_callback_duration=self.config["LOOP_SLOW_CALLBACK_DURATION"],
+        )
+        self.loop_monitor.start()
+
+    async def _stop_loop_monitor(self) -> None:
+        if self.loop_monitor is not None:
+            await self.loop_monitor.stop()
+            self.loop_monitor = None
+
     async def initialize(self) -> None:
         """Hook for subclasses to initialize resources."""
         pass
@@ -152,6 +176,7 @@ class Functionality(ABC):
             await self._clear_common()
             raise
 
+        self._start_loop_monitor()
         self._status = True
         self.logger.info(f"Ouranos' {self.__class__.__name__} started successfully [{pid}]")
 
@@ -164,6 +189,7 @@ class Functionality(ABC):
         self.logger.info(f"Stopping Ouranos' {self.__class__.__name__} [{pid}]")
 
         try:
+            await self._stop_loop_monitor()
             await self.shutdown()
             await self.post_shutdown()
         except asyncio.CancelledError as e:
@@ -1,9 +1,11 @@
 # Strange bug: cannot use future annotations, somehow it enters in conflict with
 #  FastAPI (via pydantic ?)
 from datetime import datetime, timedelta, timezone
-from hashlib import sha512
-from typing import Awaitable, Callable, cast, Optional, Self, Union
+from hashlib import blake2b, sha512
+import time
+from typing import Awaitable, Callable, cast, NamedTuple, Optional, Self, Union
 
+from cachetools import TLRUCache
 from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security.http import HTTPBasic, HTTPBearer
 from fastapi.security.utils import get_authorization_scheme_param
@@ -13,8 +15,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ouranos import current_app
 from ouranos.core.config.consts import (
     LOGIN_NAME, SESSION_FRESHNESS, SESSION_TOKEN_VALIDITY)
+from ouranos.core.database.models import caches
 from ouranos.core.database.models.app import (
     anonymous_user, Permission, User, UserMixin)
+from ouranos.core.dispatchers import DispatcherFactory
 from ouranos.core.exceptions import (
     ExpiredTokenError, InvalidTokenError, TokenError)
 from ouranos.core.utils import Tokenizer
@@ -117,6 +121,90 @@ class SessionInfo(BaseModel):
         return cls(**Tokenizer.loads(token))
 
 
+# Maximum time, in seconds, a verified session is kept
+VERIFIED_SESSION_TTL = 300
+
+
+class _VerifiedSession(NamedTuple):
+    session_info: SessionInfo
+    user_agent: Optional[str]
+
+
+def _verified_session_ttu(
+        _key: bytes,
+        verified_session: _VerifiedSession,
+        now: float,
+) -> float:
+    return min(
+        verified_session.session_info.exp.timestamp(),
+        now + VERIFIED_SESSION_TTL,
+    )
+
+
+class VerifiedSessionCache:
+    """Cache of the session tokens already verified
+
+    The tokens are keyed by their digest and kept until they expire, so that
+    authenticated requests skip the token signature verification and the
+    session id hashing. The users are cached by `User.get()`, their changes
+    are broadcast to all the web workers through the dispatcher with
+    `broadcast_user_update()`.
+    """
+    _sessions: TLRUCache = TLRUCache(
+        maxsize=256, ttu=_verified_session_ttu, timer=time.time)
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        return blake2b(token.encode("utf-8"), digest_size=16).digest()
+
+    @classmethod
+    def get_session_info(
+            cls,
+            token: str,
+            user_agent: Optional[str],
+    ) -> Optional[SessionInfo]:
+        verified_session = cls._sessions.get(cls._digest(token))
+        if verified_session is None:
+            return None
+        if (
+                verified_session.user_agent != user_agent
+                and not current_app.config["TESTING"]
+        ):
+            return None
+        # Return a copy as the session info can be refreshed by the routes
+        return verified_session.session_info.model_copy()
+
+    @classmethod
+    def set_session_info(
+            cls,
+            token: str,
+            user_agent: Optional[str],
+            session_info: SessionInfo,
+    ) -> None:
+        cls._sessions[cls._digest(token)] = _VerifiedSession(
+            session_info.model_copy(), user_agent)
+
+    @staticmethod
+    def invalidate_user(user_id: int) -> None:
+        # `User.update()` only invalidates the users cache of the local worker
+        caches.cache_users.pop(user_id, None)
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._sessions.clear()
+
+
+async def broadcast_user_update(user_id: int) -> None:
+    """Invalidate the snapshots of the user in all the web workers"""
+    VerifiedSessionCache.invalidate_user(user_id)
+    dispatcher = DispatcherFactory.get("application-internal")
+    await dispatcher.emit(
+        "user_updated",
+        data={"user_id": user_id},
+        namespace="application-internal",
+    )
+
+
 class Authenticator:
     __slots__ = "login_manager", "request", "response"
 
@@ -137,7 +225,7 @@ class Authenticator:
             password: str,
     ) -> User:
         user = await self.login_manager.get_user(session, user_id=username)
-        if not user.check_password(password):
+        if not await user.check_password(password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Incorrect email or password",
@@ -217,10 +305,13 @@ def get_session_info(
 ) -> Optional[SessionInfo]:
     if auth.credentials is None:
         return None
+    token = auth.credentials
+    user_agent = request.headers.get("user-agent")
+    session_info = VerifiedSessionCache.get_session_info(token, user_agent)
+    if session_info is not None:
+        return session_info
     try:
-        token = auth.credentials
         session_info = SessionInfo.from_token(token)
-        user_agent = request.headers.get("user-agent")
         session_id = create_session_id(user_agent)
         if session_id != session_info.id and not current_app.config["TESTING"]:
             raise TokenError
@@ -228,6 +319,7 @@ def get_session_info(
         response.delete_cookie(LOGIN_NAME.COOKIE.value, httponly=True)
         return None
     else:
+        VerifiedSessionCache.set_session_info(token, user_agent, session_info)
         return session_info
 
 
@@ -253,9 +345,7 @@ async def get_current_user(
 ) -> UserMixin:
     if session_info is None:
         return anonymous_user
-    user_id = session_info.user_id
-    user = await login_manager.get_user(session, user_id)
-    return user
+    return await login_manager.get_user(session, session_info.user_id)
 
 
 async def user_can(user: UserMixin, permission: Permission):
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+import hashlib
+from typing import Any, Iterable, Mapping
+
+from fastapi import HTTPException, Request, Response, status
+
+
+def _parse_etags(header: str) -> set[str]:
+    return {etag.strip() for etag in header.split(",") if etag.strip()}
+
+
+def _parse_http_date(header: str) -> datetime | None:
+    try:
+        return parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return None
+
+
+class ConditionalRequest:
+    """Dependency handling the `If-None-Match` and `If-Modified-Since` headers
+
+    Routes call `evaluate()` with the validators of the resource before
+    fetching and serializing it. If the client's copy is still valid, a 304
+    response is returned. Otherwise, the `ETag` and `Last-Modified` headers are
+    added to the response.
+    """
+    def __init__(self, request: Request, response: Response) -> None:
+        self._request = request
+        self._response = response
+        self.headers: dict[str, str] = {}
+
+    def _compute_etag(
+            self,
+            versions: Mapping[str, str],
+            last_modified: datetime | None,
+            extra: Iterable[Any],
+    ) -> str:
+        url = self._request.url
+        parts = [
+            url.path,
+            *sorted(self._request.query_params.multi_items()),
+            *(
+                f"{resource}:{version}"
+                for resource, version in sorted(versions.items())
+            ),
+            last_modified.isoformat() if last_modified else "",
+            *extra,
+        ]
+        digest = hashlib.blake2b(
+            "|".join(str(part) for part in parts).encode("utf-8"), digest_size=12)
+        # Weak validator as the body is re-encoded by the compression middleware
+        return f'W/"{digest.hexdigest()}"'
+
+    def _is_not_modified(self, etag: str, last_modified: datetime | None) -> bool:
+        if_none_match = self._request.headers.get("if-none-match")
+        if if_none_match is not None:
+            etags = _parse_etags(if_none_match)
+            if "*" in etags:
+                return True
+            # Weak comparison
+            return etag.removeprefix("W/") in {e.removeprefix("W/") for e in etags}
+        if_modified_since = self._request.headers.get("if-modified-since")
+        if if_modified_since is not None and last_modified is not None:
+            since = _parse_http_date(if_modified_since)
+            if since is None:
+                return False
+            if since.tzinfo is None:
+                since = since.replace(tzinfo=timezone.utc)
+            return last_modified.replace(microsecond=0) <= since
+        return False
+
+    def evaluate(
+            self,
+            *,
+            versions: Mapping[str, str] | None = None,
+            last_modified: datetime | None = None,
+            extra: Iterable[Any] = (),
+            etag: str | None = None,
+    ) -> None:
+        """Raise a 304 'Not Modified' HTTPException if the client's copy of the
+        resource is still valid
+
+        :param versions: the versions of the resources the resource depends
+        on, as returned by `ResourceVersion.get_versions()`.
+        :param last_modified: the time of the latest change of the resource,
+        typically the timestamp of the latest record of a series.
+        :param extra: other values the resource depends on.
+        :param etag: the validator of the resource when it is already known,
+        like the one of a published snapshot. It replaces the computed one.
+        """
+        if etag is None:
+            etag = self._compute_etag(versions or {}, last_modified, extra)
+        self.headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if last_modified is not None:
+            self.headers["Last-Modified"] = format_datetime(
+                last_modified.astimezone(timezone.utc), usegmt=True)
+        if self._is_not_modified(etag, last_modified):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers=self.headers,
+            )
+        # Only used when the route does not return a Response by itself
+        self._response.headers.update(self.headers)
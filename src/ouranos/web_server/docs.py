@@ -80,6 +80,11 @@ tags_metadata = [
         "name": "gaia/ecosystem/sensor",
         "description": "Consult Gaia's sensors info and data",
     },
+    {
+        "name": "gaia/ecosystem/export",
+        "description": "Export Gaia's sensors and actuators history, including "
+                       "archived data. Rem: it requires to be logged in",
+    },
     {
         "name": "gaia/ecosystem/image_info",
         "description": "Information about the camera images available on the "
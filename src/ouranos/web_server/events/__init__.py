@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from http.cookies import SimpleCookie
 from logging import getLogger, Logger
 
@@ -10,20 +10,62 @@ from socketio import AsyncNamespace, AsyncManager, AsyncServer
 from socketio.exceptions import ConnectionRefusedError
 
 from ouranos import current_app, db
-from ouranos.core.database.models.app import anonymous_user, Permission, User
-from ouranos.core.database.models.gaia import Ecosystem
+from ouranos.core.database.models.app import (
+    anonymous_user, Permission, user_last_seen)
+from ouranos.core.database.models.gaia import (
+    ActuatorState, Ecosystem, SensorDataCache)
 from ouranos.core.exceptions import TokenError
 from ouranos.web_server.auth import (
-    create_session_id, login_manager, LOGIN_NAME, SessionInfo)
+    create_session_id, login_manager, LOGIN_NAME, SessionInfo,
+    VerifiedSessionCache)
+from ouranos.web_server.events.coalescing import EmitCoalescer, KeyFunc
 from ouranos.web_server.events.decorators import permission_required
+from ouranos.web_server.events.encoding import (
+    emit_encoded, encode, encoded_room, Encoding, parse_contract,
+    ROOM_ENCODING_SEPARATOR)
+from ouranos.web_server.system_data import SystemDataBuffers
 
 
 ADMIN_ROOM = "administrator"
 CAMERA_STREAM_ROOM = "camera_stream"
+ECOSYSTEM_ROOM_PREFIX = "ecosystem:"
 
 logger: Logger = getLogger("aggregator.socketio")
 
 
+def ecosystem_room(ecosystem_uid: str) -> str:
+    """Name of the room receiving the data of the ecosystem `ecosystem_uid`"""
+    return f"{ECOSYSTEM_ROOM_PREFIX}{ecosystem_uid}"
+
+
+def _room_refusal_reason(room_name: str, action: str) -> str | None:
+    """Reason why a client cannot join or leave `room_name` by itself, if any
+
+    The encoded rooms are entered according to the encoding negotiated while
+    connecting, a client asking for one directly could otherwise receive the
+    data of a room it is not allowed in, like 'administrator#msgpack'.
+    """
+    if ROOM_ENCODING_SEPARATOR in room_name:
+        return f"Room names cannot contain '{ROOM_ENCODING_SEPARATOR}'."
+    if room_name == ADMIN_ROOM:
+        if action == "join":
+            return "Admin room can only be entered while connecting."
+        return "Admin room is only left after disconnection."
+    return None
+
+
+def split_per_ecosystem(
+        data: list[dict],
+        uid_key: str = "uid",
+) -> dict[str, list[dict]]:
+    """Split a payload covering several ecosystems into one payload per
+    ecosystem"""
+    rv: dict[str, list[dict]] = {}
+    for item in data:
+        rv.setdefault(item[uid_key], []).append(item)
+    return rv
+
+
 class ClientEvents(AsyncNamespace):
     def __init__(self, namespace=None):
         super().__init__(namespace=namespace)
@@ -50,15 +92,20 @@ class ClientEvents(AsyncNamespace):
     def ouranos_dispatcher(self, dispatcher: AsyncDispatcher):
         self._ouranos_dispatcher = dispatcher
 
-    def _check_client_contract(self, auth: dict | None = None) -> None:
-        """Reject the connection if the client's SocketIO contract is incompatible."""
+    def _check_client_contract(self, auth: dict | None = None) -> Encoding:
+        """Reject the connection if the client's SocketIO contract is incompatible.
+
+        Return the encoding negotiated for the data events.
+        """
         auth = auth or {}
-        client_contract: int | None = auth.get("socketio_contract")
+        client_contract: int | str | None = auth.get("socketio_contract")
         if client_contract is None:
-            return  # Unversioned client, nothing to enforce ... yet
+            return Encoding.json  # Unversioned client, nothing to enforce ... yet
         own_contract = current_app.config["SOCKETIO_CONTRACT"]
+        encoding = Encoding.json
         try:
-            compatible = int(client_contract) == own_contract
+            version, encoding = parse_contract(client_contract)
+            compatible = version == own_contract
         except (TypeError, ValueError):
             compatible = False
         if not compatible:
@@ -71,13 +118,20 @@ class ClientEvents(AsyncNamespace):
                     "client_contract": client_contract,
                 },
             )
+        return encoding
+
+    async def _get_encoding(self, sid) -> Encoding:
+        sio_session = await self.get_session(sid)
+        return Encoding(sio_session.get("encoding", Encoding.json))
 
     async def on_connect(self, sid, environ, auth: dict | None = None):
-        self._check_client_contract(auth)
+        encoding = self._check_client_contract(auth)
         cookie = SimpleCookie(environ.get("HTTP_COOKIE", ""))
         session_cookie = cookie.get(LOGIN_NAME.COOKIE.value)
         if session_cookie is None:
-            await self.save_session(sid, {"user_id": anonymous_user.id})
+            await self.save_session(
+                sid, {"user_id": anonymous_user.id, "encoding": encoding})
+            await self.enter_room(sid, encoded_room(None, encoding))
             return True  # anonymous users are allowed to connect
 
         try:
@@ -93,9 +147,10 @@ class ClientEvents(AsyncNamespace):
         # Get the user and save its ID to the session
         async with db.scoped_session() as session:
             user = await login_manager.get_user(session, session_info.user_id)
-        await self.save_session(sid, {"user_id": user.id})
+        await self.save_session(sid, {"user_id": user.id, "encoding": encoding})
+        await self.enter_room(sid, encoded_room(None, encoding))
         if user.can(Permission.ADMIN):
-            await self.enter_room(sid, ADMIN_ROOM)
+            await self.enter_room(sid, encoded_room(ADMIN_ROOM, encoding))
         return True
 
     async def on_ping(self, sid):
@@ -105,7 +160,8 @@ class ClientEvents(AsyncNamespace):
         logger.debug(f"Received deprecated 'on_login' event from sid '{sid}'")
 
     async def on_logout(self, sid, token: str):
-        await self.server.leave_room(sid, ADMIN_ROOM)
+        encoding = await self._get_encoding(sid)
+        await self.server.leave_room(sid, encoded_room(ADMIN_ROOM, encoding))
         logger.debug(f"Received deprecated 'on_logout' event from sid '{sid}'")
 
     async def on_user_heartbeat(self, sid, token: str | None = None):
@@ -113,51 +169,115 @@ class ClientEvents(AsyncNamespace):
         user_id = sio_session.get('user_id', None)
         if user_id is None:
             return
-        async with db.scoped_session() as session:
-            await User.update(
-                session,
-                user_id=user_id,
-                values={"last_seen": datetime.now(timezone.utc)}
-            )
+        user_last_seen.touch(user_id)
         await self.emit(
             "user_heartbeat_ack",
             to=sid,
             namespace="/",
         )
 
-    async def on_join_room(self, sid, room_name: str) -> None:
-        if room_name == ADMIN_ROOM:
+    async def on_join_room(
+            self,
+            sid,
+            room_name: str,
+            snapshot: bool = False,
+    ) -> None:
+        reason = _room_refusal_reason(room_name, "join")
+        if reason is not None:
             await self.emit(
                 "join_room_ack",
                 data={
                     "result": gv.Result.failure,
-                    "reason": "Admin room can only be entered while connecting."
+                    "reason": reason,
                 },
                 namespace="/",
                 room=sid
             )
             return
-        await self.server.enter_room(sid, room_name)
+        encoding = await self._get_encoding(sid)
+        await self.server.enter_room(sid, encoded_room(room_name, encoding))
         await self.emit(
             "join_room_ack",
             data={"result": gv.Result.success,},
             namespace="/",
             room=sid
         )
+        if snapshot and room_name.startswith(ECOSYSTEM_ROOM_PREFIX):
+            await self._send_ecosystem_snapshot(
+                sid, room_name.removeprefix(ECOSYSTEM_ROOM_PREFIX), encoding)
+
+    async def _send_ecosystem_snapshot(
+            self,
+            sid,
+            ecosystem_uid: str,
+            encoding: Encoding = Encoding.json,
+    ) -> None:
+        """Send the current state of the ecosystem to a client joining its room
+        so that it does not have to wait for the next updates
+
+        The payloads have the same shape as the ones dispatched by the
+        aggregator once serialized.
+        """
+        time_limit = (
+            datetime.now(timezone.utc)
+            - timedelta(seconds=SensorDataCache.get_ttl())
+        )
+        async with db.scoped_session() as session:
+            sensors_data = await SensorDataCache.get_multiple(
+                session, ecosystem_uid=ecosystem_uid)
+            actuators_state = await ActuatorState.get_multiple(
+                session, ecosystem_uid=ecosystem_uid)
+        current_sensors_data = [
+            {
+                "ecosystem_uid": record.ecosystem_uid,
+                "sensor_uid": record.sensor_uid,
+                "measure": record.measure,
+                "value": record.value,
+                "timestamp": record.timestamp.isoformat(),
+            }
+            for record in sensors_data
+            if record.timestamp > time_limit
+        ]
+        if current_sensors_data:
+            await self.emit(
+                "current_sensors_data",
+                data=encode(current_sensors_data, encoding),
+                namespace="/",
+                room=sid,
+            )
+        if actuators_state:
+            await self.emit(
+                "actuators_data",
+                data=encode([
+                    {
+                        "ecosystem_uid": state.ecosystem_uid,
+                        "type": state.type.name,
+                        "active": state.active,
+                        "mode": state.mode.name,
+                        "status": state.status,
+                        "level": state.level,
+                    }
+                    for state in actuators_state
+                ], encoding),
+                namespace="/",
+                room=sid,
+            )
 
     async def on_leave_room(self, sid, room_name: str) -> None:
-        if room_name == ADMIN_ROOM:
+        reason = _room_refusal_reason(room_name, "leave")
+        if reason is not None:
             await self.emit(
                 "leave_room_ack",
                 data={
                     "result": gv.Result.failure,
-                    "reason": "Admin room is only left after disconnection."
+                    "reason": reason,
                 },
                 namespace="/",
                 room=sid
             )
             return
-        await self.server.leave_room(sid, room_name)
+        encoding = await self._get_encoding(sid)
+        await self.server.leave_room(sid, encoded_room(room_name, encoding))
         await self.emit(
             "leave_room_ack",
             data={"result": gv.Result.success,},
@@ -212,116 +332,173 @@ class ClientEvents(AsyncNamespace):
         )
 
 
+def _sensor_key(record: dict) -> tuple[str, str]:
+    return record["sensor_uid"], record["measure"]
+
+
+def _actuator_key(record: dict) -> str:
+    return record["type"]
+
+
+def _ecosystem_key(payload: dict) -> str:
+    return payload["uid"]
+
+
+def _engine_key(payload: dict) -> str:
+    return payload["engine_uid"]
+
+
 class DispatcherEvents(AsyncEventHandler):
-    def __init__(self, sio_manager: AsyncManager):
+    def __init__(
+            self,
+            sio_manager: AsyncManager,
+            coalescing_window: float | None = None,
+    ):
         super().__init__()
         self.sio_manager = sio_manager
+        if coalescing_window is None:
+            coalescing_window = current_app.config["SIO_COALESCING_WINDOW"]
+        self.coalescer = EmitCoalescer(sio_manager, coalescing_window)
+
+    async def _emit_per_ecosystem(
+            self,
+            event: str,
+            data: list[dict],
+            uid_key: str = "uid",
+            coalesce_key: KeyFunc | None = None,
+    ) -> None:
+        """Emit the part of `data` related to each ecosystem to its room
+
+        If `coalesce_key` is provided, the live updates are coalesced and only
+        the latest value of each key is emitted once per coalescing window.
+        """
+        for ecosystem_uid, payload in split_per_ecosystem(data, uid_key).items():
+            room = ecosystem_room(ecosystem_uid)
+            if coalesce_key is not None:
+                await self.coalescer.emit(event, payload, coalesce_key, room=room)
+            else:
+                await emit_encoded(self.sio_manager, event, payload, room=room)
 
     # ---------------------------------------------------------------------------
     #   Events Aggregator -> Web workers -> Web clients
     # ---------------------------------------------------------------------------
     async def on_weather_current(self, sid, data):
         logger.debug("Dispatching 'weather_current' to clients")
-        await self.sio_manager.emit("weather_current", data=data, namespace="/")
+        await emit_encoded(self.sio_manager, "weather_current", data)
 
     async def on_weather_hourly(self, sid, data):
         logger.debug("Dispatching 'weather_hourly' to clients")
-        await self.sio_manager.emit("weather_hourly", data=data, namespace="/")
+        await emit_encoded(self.sio_manager, "weather_hourly", data)
 
     async def on_weather_daily(self, sid, data):
         logger.debug("Dispatching 'weather_daily' to clients")
-        await self.sio_manager.emit("weather_daily", data=data, namespace="/")
+        await emit_encoded(self.sio_manager, "weather_daily", data)
 
     async def on_sun_times(self, sid, data):
         logger.debug("Dispatching 'sun_times' to clients")
-        await self.sio_manager.emit("sun_times", data=data, namespace="/")
+        await emit_encoded(self.sio_manager, "sun_times", data)
 
     async def on_ecosystems_heartbeat(self, sid, data):
         logger.debug("Dispatching 'ecosystem_heartbeat' to clients")
-        await self.sio_manager.emit("ecosystems_heartbeat", data=data, namespace="/")
+        await self.coalescer.emit("ecosystems_heartbeat", [data], _engine_key)
 
     async def on_base_info(self, sid, data):
         logger.debug("Dispatching 'base_info' to clients")
-        await self.sio_manager.emit("base_info", data=data, namespace="/")
+        await self._emit_per_ecosystem("base_info", data)
 
     async def on_hardware(self, sid, data):
         logger.debug("Dispatching 'hardware' to clients")
-        await self.sio_manager.emit("hardware", data=data, namespace="/")
+        await self._emit_per_ecosystem("hardware", data)
 
     async def on_environmental_parameters(self, sid, data):
         logger.debug("Dispatching 'environmental_parameters' to clients")
-        await self.sio_manager.emit("environmental_parameters", data=data, namespace="/")
+        await self._emit_per_ecosystem("environmental_parameters", data)
 
     async def on_chaos_parameters(self, sid, data):
         logger.debug("Dispatching 'chaos_parameters' to clients")
-        await self.sio_manager.emit("chaos_parameters", data=data, namespace="/")
+        await self._emit_per_ecosystem("chaos_parameters", data)
 
     async def on_nycthemeral_info(self, sid, data):
         logger.debug("Dispatching 'nycthemeral_info' to clients")
-        await self.sio_manager.emit("nycthemeral_info", data=data, namespace="/")
+        await self._emit_per_ecosystem("nycthemeral_info", data)
 
     async def on_ecosystem_status(self, sid, data):
         logger.debug("Dispatching 'ecosystem_status' to clients")
-        await self.sio_manager.emit("ecosystem_status", data=data, namespace="/")
+        await self._emit_per_ecosystem(
+            "ecosystem_status", data, coalesce_key=_ecosystem_key)
 
     async def on_current_sensors_data(self, sid, data):
         logger.debug("Dispatching 'current_sensors_data' to clients")
-        await self.sio_manager.emit("current_sensors_data", data=data, namespace="/")
+        await self._emit_per_ecosystem(
+            "current_sensors_data", data, uid_key="ecosystem_uid",
+            coalesce_key=_sensor_key)
 
     async def on_historic_sensors_data_update(self, sid, data):
         logger.debug("Dispatching 'historic_sensors_data_update' to clients")
-        await self.sio_manager.emit(
-            "historic_sensors_data_update", data=data, namespace="/")
+        await self._emit_per_ecosystem(
+            "historic_sensors_data_update", data, uid_key="ecosystem_uid")
 
     async def on_light_data(self, sid, data):
         logger.debug("Dispatching 'light_data' to clients")
-        await self.sio_manager.emit("light_data", data=data, namespace="/")
+        await self._emit_per_ecosystem("light_data", data)
 
     async def on_actuators_data(self, sid, data):
         logger.debug("Dispatching 'actuator_data' to clients")
-        await self.sio_manager.emit("actuators_data", data=data, namespace="/")
+        await self._emit_per_ecosystem(
+            "actuators_data", data, uid_key="ecosystem_uid",
+            coalesce_key=_actuator_key)
 
     async def on_management(self, sid, data: list[gv.ManagementConfigPayloadDict]):
         logger.debug("Dispatching 'management' to clients")
 
         rv = []
         async with db.scoped_session() as session:
-            for payload in data:
-                payload_data = payload["data"]
-                uid: str = payload["uid"]
-                # Add extra functionalities required
-                payload_data["switches"] = payload_data["climate"] or payload_data["light"]
-                payload_data["ecosystem_data"] = \
-                    await Ecosystem.check_if_recent_sensor_data(
-                    session, uid=uid, level=gv.HardwareLevel.ecosystem),
-                payload_data["environment_data"] = \
-                    await Ecosystem.check_if_recent_sensor_data(
-                        session, uid=uid, level=gv.HardwareLevel.environment)
-                payload_data["plants_data"] = \
-                    await Ecosystem.check_if_recent_sensor_data(
-                        session, uid=uid, level=gv.HardwareLevel.plants)
-                rv.append({
-                    "uid": uid,
-                    "data": payload_data,
-                })
-        await self.sio_manager.emit("management", data=rv, namespace="/")
+            data_functionalities = await Ecosystem.get_data_functionalities(
+                session, uids=[payload["uid"] for payload in data])
+        for payload in data:
+            payload_data = payload["data"]
+            uid: str = payload["uid"]
+            # Add extra functionalities required
+            payload_data["switches"] = payload_data["climate"] or payload_data["light"]
+            functionalities = data_functionalities.get(uid, {})
+            for key in ("ecosystem_data", "environment_data", "plants_data"):
+                payload_data[key] = functionalities.get(key, False)
+            rv.append({
+                "uid": uid,
+                "data": payload_data,
+            })
+        await self._emit_per_ecosystem("management", rv)
 
     async def on_health_data(self, sid, data):
         logger.debug("Dispatching 'health_data' to clients")
-        await self.sio_manager.emit("health_data", data=data, namespace="/")
+        await self._emit_per_ecosystem("health_data", data)
 
     # ---------------------------------------------------------------------------
     #   Events Stream aggregator -> Web workers -> Web clients
     # ---------------------------------------------------------------------------
     async def on_picture_arrays(self, sid, data: dict) -> None:
         logger.debug("Dispatching picture updated to clients")
-        await self.sio_manager.emit(
-            "pictures_update", data=data, namespace="/", room=CAMERA_STREAM_ROOM)
+        await emit_encoded(
+            self.sio_manager, "pictures_update", data, room=CAMERA_STREAM_ROOM)
 
     # ---------------------------------------------------------------------------
     #   Events Base web server ->  Web workers -> Admin web clients
     # ---------------------------------------------------------------------------
     async def on_current_server_data(self, sid, data):
+        SystemDataBuffers.append(data)
         logger.debug("Dispatching 'current_server_data' to clients")
-        await self.sio_manager.emit(
-            "current_server_data", data=data, namespace="/", room=ADMIN_ROOM)
+        await emit_encoded(
+            self.sio_manager, "current_server_data", data, room=ADMIN_ROOM)
+
+    async def on_event_loop_lag(self, sid, data):
+        SystemDataBuffers.set_event_loop_report(data)
+        logger.debug("Dispatching 'event_loop_lag' to clients")
+        await emit_encoded(
+            self.sio_manager, "event_loop_lag", data, room=ADMIN_ROOM)
+
+    # ---------------------------------------------------------------------------
+    #   Events Web worker -> Web workers
+    # ---------------------------------------------------------------------------
+    async def on_user_updated(self, sid, data: dict) -> None:
+        logger.debug(f"Invalidating the snapshots of user {data['user_id']}")
+        VerifiedSessionCache.invalidate_user(data["user_id"])
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import asyncio
+from logging import getLogger, Logger
+from typing import Callable, Hashable
+
+from socketio import AsyncManager
+
+from ouranos.web_server.events.encoding import emit_encoded
+
+
+logger: Logger = getLogger("aggregator.socketio")
+
+
+KeyFunc = Callable[[dict], Hashable]
+
+
+class EmitCoalescer:
+    """Merge the updates of an event sent to a room during a time window
+
+    The first update received for an event and a room opens a window. Until
+    it closes, the updates are merged by key, only the latest value of each key
+    being kept. A single message containing the list of these values is then
+    emitted.
+
+    :param sio_manager: the Socket.IO manager used to emit the messages.
+    :param window: the length of the window, in seconds. If 0, updates are
+    emitted as soon as they are received.
+    """
+    def __init__(self, sio_manager: AsyncManager, window: float) -> None:
+        self.sio_manager = sio_manager
+        self.window = window
+        self._buffers: dict[tuple[str, str | None], dict[Hashable, dict]] = {}
+        self._flush_tasks: set[asyncio.Task] = set()
+
+    async def emit(
+            self,
+            event: str,
+            data: list[dict],
+            key: KeyFunc,
+            room: str | None = None,
+    ) -> None:
+        if not self.window:
+            await emit_encoded(self.sio_manager, event, data, room=room)
+            return
+        buffer_key = (event, room)
+        buffer = self._buffers.get(buffer_key)
+        if buffer is None:
+            buffer = self._buffers[buffer_key] = {}
+            task = asyncio.create_task(
+                self._flush_later(buffer_key), name=f"coalesce-{event}")
+            self._flush_tasks.add(task)
+            task.add_done_callback(self._flush_tasks.discard)
+        for item in data:
+            buffer[key(item)] = item
+
+    async def _flush_later(self, buffer_key: tuple[str, str | None]) -> None:
+        await asyncio.sleep(self.window)
+        await self._flush(buffer_key)
+
+    async def _flush(self, buffer_key: tuple[str, str | None]) -> None:
+        buffer = self._buffers.pop(buffer_key, None)
+        if not buffer:
+            return
+        event, room = buffer_key
+        try:
+            await emit_encoded(
+                self.sio_manager, event, [*buffer.values()], room=room)
+        except Exception as e:
+            logger.error(
+                f"Encountered an error when trying to emit coalesced "
+                f"'{event}' updates. Error msg: `{e.__class__.__name__}: {e}`")
+
+    async def flush(self) -> None:
+        """Emit all the pending updates without waiting for their window to
+        close"""
+        for task in [*self._flush_tasks]:
+            task.cancel()
+        for buffer_key in [*self._buffers.keys()]:
+            await self._flush(buffer_key)
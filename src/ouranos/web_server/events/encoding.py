@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from enum import StrEnum
+from typing import Any
+
+from socketio import AsyncManager
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+from ouranos.core.utils import msgpack
+
+
+# Room entered by all the JSON clients, used instead of the whole namespace so
+#  that MessagePack clients do not receive the JSON-encoded broadcasts
+BROADCAST_ROOM = "broadcast"
+# Separates the name of a room from the encoding of the messages sent to it
+ROOM_ENCODING_SEPARATOR = "#"
+
+
+class Encoding(StrEnum):
+    json = "json"
+    msgpack = "msgpack"
+
+
+def parse_contract(contract: int | str) -> tuple[int, Encoding]:
+    """Parse the `socketio_contract` sent by a client while connecting
+
+    The contract is either a version number, or a version number followed by
+    the encoding requested, like '2+msgpack'. MessagePack is only granted if
+    the server is able to encode it, the client gets JSON otherwise.
+
+    :raises ValueError: if the contract cannot be parsed.
+    """
+    version, _, encoding_name = str(contract).partition("+")
+    encoding = Encoding(encoding_name) if encoding_name else Encoding.json
+    if encoding is Encoding.msgpack and not msgpack.available:
+        encoding = Encoding.json
+    return int(version), encoding
+
+
+def encoded_room(room: str | None, encoding: Encoding) -> str:
+    """Name of the room to enter to receive the messages sent to `room` with
+    the given encoding"""
+    room = room or BROADCAST_ROOM
+    if encoding is Encoding.json:
+        return room
+    return f"{room}{ROOM_ENCODING_SEPARATOR}{encoding}"
+
+
+def encode(data: Any, encoding: Encoding) -> Any:
+    if encoding is Encoding.msgpack:
+        return msgpack.dumps(data)
+    return data
+
+
+def _has_participants(sio_manager: AsyncManager, room: str) -> bool:
+    # The managers shared by several servers only know their own clients
+    if isinstance(sio_manager, AsyncPubSubManager):
+        return True
+    return next(sio_manager.get_participants("/", room), None) is not None
+
+
+async def emit_encoded(
+        sio_manager: AsyncManager,
+        event: str,
+        data: Any,
+        room: str | None = None,
+) -> None:
+    """Emit `data` to the JSON and to the MessagePack clients of `room`
+
+    MessagePack-encoded data is sent as a Socket.IO binary attachment. It is
+    only packed if the MessagePack room has members.
+    """
+    await sio_manager.emit(
+        event, data=data, namespace="/", room=encoded_room(room, Encoding.json))
+    msgpack_room = encoded_room(room, Encoding.msgpack)
+    if msgpack.available and _has_participants(sio_manager, msgpack_room):
+        await sio_manager.emit(
+            event, data=msgpack.dumps(data), namespace="/", room=msgpack_room)
@@ -3,31 +3,25 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 import logging
 import time as ctime
-from typing import Any
 
 from brotli_asgi import BrotliMiddleware
 from fastapi import APIRouter, FastAPI, HTTPException, Request, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse as BaseResponse
 from fastapi.staticfiles import StaticFiles
 from socketio import AsyncManager, AsyncServer
 from socketio.asgi import ASGIApp
 
 from ouranos import current_app
 from ouranos.core.caches import CacheFactory
+from ouranos.core.database.touch import TouchBuffer
 from ouranos.core.dispatchers import DispatcherFactory
+from ouranos.core.exceptions import PasswordHashingBusyError
+from ouranos.core.loop_monitor import dispatch_reports, LoopLagMonitor
 from ouranos.core.plugins_manager import PluginManager
-from ouranos.core.utils import check_secret_key, json
+from ouranos.core.utils import check_secret_key
 from ouranos.web_server.docs import description, tags_metadata
-
-
-class JSONResponse(BaseResponse):
-    # Customize based on fastapi.responses.ORJSONResponse
-
-    media_type = "application/json"
-
-    def render(self, content: Any) -> bytes:
-        return json.dumps(content)
+from ouranos.web_server.response_cache import ResponseCache
+from ouranos.web_server.responses import JSONResponse
 
 
 def create_sio_manager(config: dict | None = None):
@@ -78,11 +72,25 @@ def create_app(config: dict | None = None) -> FastAPI:
     @asynccontextmanager
     async def lifespan(app_: FastAPI):
         logger.info("Ouranos web server worker successfully started")
-        if not sky_watcher_cache.is_init:
-            await sky_watcher_cache.init()
+        await sky_watcher_cache.init()
+        await ResponseCache.init()
         await dispatcher.start(retry=True, block=False)
+        TouchBuffer.start_all()
+        loop_monitor: LoopLagMonitor | None = None
+        if config["LOOP_MONITOR_INTERVAL"]:
+            loop_monitor = LoopLagMonitor(
+                "web_worker", dispatch_reports(dispatcher),
+                interval=config["LOOP_MONITOR_INTERVAL"],
+                slow_callback_duration=config["LOOP_SLOW_CALLBACK_DURATION"],
+            )
+            loop_monitor.start()
         yield
+        if loop_monitor is not None:
+            await loop_monitor.stop()
+        await TouchBuffer.stop_all()
         await dispatcher.stop()
+        await ResponseCache.close()
+        await CacheFactory.close_all()
 
     app = FastAPI(
         title=config.get("APP_NAME"),
@@ -96,6 +104,19 @@ def create_app(config: dict | None = None) -> FastAPI:
         lifespan=lifespan,
     )
 
+    # Routes hashing or verifying passwords are rejected when the hashing
+    #  pool is saturated
+    @app.exception_handler(PasswordHashingBusyError)
+    async def password_hashing_busy_handler(
+            request: Request,
+            exc: PasswordHashingBusyError,
+    ) -> JSONResponse:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"detail": "Too many passwords are being processed, retry later"},
+            headers={"Retry-After": "1"},
+        )
+
     # Set up CORS
     allowed_origins = []
     allowed_origins_regex = None
@@ -0,0 +1,333 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+import asyncio
+import hashlib
+from logging import getLogger, Logger
+from pathlib import Path
+import time
+from typing import Any, Iterable, NamedTuple
+
+import aiosqlite
+import brotli
+from fastapi import Request, Response
+
+from ouranos import current_app
+
+
+# Same as the compression middleware
+BROTLI_QUALITY = 5
+BROTLI_MINIMUM_SIZE = 400
+
+logger: Logger = getLogger("ouranos.web_server")
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    br_body: bytes | None
+
+
+# ---------------------------------------------------------------------------
+#   Backends
+# ---------------------------------------------------------------------------
+class ResponseCacheBackend(ABC):
+    """A store for serialized responses shared by the web server workers"""
+
+    async def init(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    @abstractmethod
+    async def get(self, key: str) -> CachedBody | None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: CachedBody, ttl: int) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        raise NotImplementedError
+
+
+_create_query = """
+  CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    body BLOB NOT NULL,
+    br_body BLOB,
+    expires REAL NOT NULL
+  )
+"""
+_columns_query = "SELECT name FROM pragma_table_info('responses')"
+_drop_query = "DROP TABLE IF EXISTS responses"
+_get_query = "SELECT body, br_body FROM responses WHERE key = ? AND expires > ?"
+_set_query = (
+    "REPLACE INTO responses (key, body, br_body, expires) VALUES (?, ?, ?, ?)"
+)
+_remove_expired_query = "DELETE FROM responses WHERE expires <= ?"
+_clear_query = "DELETE FROM responses"
+
+
+class SQLiteResponseCacheBackend(ResponseCacheBackend):
+    """Store the responses in a SQLite file shared by the workers of a host
+
+    Each worker keeps its own connection opened, WAL mode allows the workers
+    to read while another one writes.
+    """
+    remove_expired_every: int = 64
+
+    def __init__(self, file_path: Path | str) -> None:
+        self._path = Path(file_path)
+        self._connection: aiosqlite.Connection | None = None
+        self._connection_lock = asyncio.Lock()
+        self._writes: int = 0
+
+    async def init(self) -> None:
+        async with self._connection_lock:
+            if self._connection is not None:
+                return
+            connection = await aiosqlite.connect(self._path, timeout=5)
+            await connection.execute("PRAGMA journal_mode=WAL")
+            await connection.execute("PRAGMA synchronous=NORMAL")
+            # Tables created by older versions have a `tags` column, their
+            #  content is dropped
+            cursor = await connection.execute(_columns_query)
+            columns = {row[0] for row in await cursor.fetchall()}
+            if "tags" in columns:
+                await connection.execute(_drop_query)
+            await connection.execute(_create_query)
+            await connection.commit()
+            self._connection = connection
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def _get_connection(self) -> aiosqlite.Connection:
+        # The connection is lazily opened by workers that did not go through
+        #  the lifespan, like the test clients
+        if self._connection is None:
+            await self.init()
+        return self._connection
+
+    async def get(self, key: str) -> CachedBody | None:
+        connection = await self._get_connection()
+        cursor = await connection.execute(_get_query, (key, time.time()))
+        row = await cursor.fetchone()
+        if row is None:
+            return None
+        return CachedBody(*row)
+
+    async def set(self, key: str, value: CachedBody, ttl: int) -> None:
+        connection = await self._get_connection()
+        now = time.time()
+        await connection.execute(
+            _set_query, (key, value.body, value.br_body, now + ttl))
+        self._writes += 1
+        if self._writes >= self.remove_expired_every:
+            await connection.execute(_remove_expired_query, (now, ))
+            self._writes = 0
+        await connection.commit()
+
+    async def clear(self) -> None:
+        connection = await self._get_connection()
+        await connection.execute(_clear_query)
+        await connection.commit()
+
+
+class RedisResponseCacheBackend(ResponseCacheBackend):
+    """Store the responses in Redis, which can be shared by several hosts"""
+    prefix: str = "ouranos:responses:"
+
+    def __init__(self, url: str) -> None:
+        try:
+            import redis.asyncio as redis
+        except ImportError:
+            raise RuntimeError(
+                "redis is not installed. Run `pip install redis` in your "
+                "virtual env to use Redis as the response cache."
+            )
+        self._redis = redis.from_url(url)
+
+    async def close(self) -> None:
+        await self._redis.aclose()
+
+    async def get(self, key: str) -> CachedBody | None:
+        body, br_body = await self._redis.hmget(
+            f"{self.prefix}{key}", ["body", "br_body"])
+        if body is None:
+            return None
+        return CachedBody(body, br_body or None)
+
+    async def set(self, key: str, value: CachedBody, ttl: int) -> None:
+        full_key = f"{self.prefix}{key}"
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                full_key,
+                mapping={"body": value.body, "br_body": value.br_body or b""})
+            pipe.expire(full_key, ttl)
+            await pipe.execute()
+
+    async def clear(self) -> None:
+        async for key in self._redis.scan_iter(f"{self.prefix}*"):
+            await self._redis.delete(key)
+
+
+class ResponseCache:
+    """Access point to the response cache backend configured with
+    `RESPONSE_CACHE_URL`"""
+    _backend: ResponseCacheBackend | None = None
+
+    @classmethod
+    def get_backend(cls) -> ResponseCacheBackend | None:
+        if cls._backend is None:
+            url: str | None = current_app.config["RESPONSE_CACHE_URL"]
+            if not url:
+                return None
+            if url.startswith("sqlite://"):
+                file_name = url.removeprefix("sqlite://") or "responses.sqlite"
+                cls._backend = SQLiteResponseCacheBackend(
+                    current_app.cache_dir / file_name)
+            elif url.startswith("redis://"):
+                cls._backend = RedisResponseCacheBackend(url)
+            else:
+                raise ValueError(
+                    "'RESPONSE_CACHE_URL' is not set to a supported protocol, "
+                    "choose from 'sqlite://' or 'redis://'"
+                )
+        return cls._backend
+
+    @classmethod
+    async def init(cls) -> None:
+        backend = cls.get_backend()
+        if backend is not None:
+            await backend.init()
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._backend is not None:
+            await cls._backend.close()
+            cls._backend = None
+
+
+# ---------------------------------------------------------------------------
+#   Route helpers
+# ---------------------------------------------------------------------------
+def _accepts_brotli(request: Request) -> bool:
+    return "br" in request.headers.get("accept-encoding", "")
+
+
+def encoded_response(
+        request: Request,
+        body: bytes,
+        br_body: bytes | None,
+        headers: dict[str, str] | None = None,
+) -> Response:
+    """Send a serialized JSON body as-is, or its Brotli-encoded variant if
+    the client accepts it"""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    if br_body is not None and _accepts_brotli(request):
+        # The compression middleware lets encoded responses through
+        headers["Content-Encoding"] = "br"
+        body = br_body
+    return Response(body, media_type="application/json", headers=headers)
+
+
+class CachedResponse:
+    """A response possibly served from the shared response cache
+
+    The cache is only an optimization: if the backend fails, like when the
+    SQLite file is locked or Redis is unreachable, the error is logged and the
+    response is computed and served without being cached.
+    """
+    def __init__(
+            self,
+            request: Request,
+            backend: ResponseCacheBackend | None,
+            ttl: int,
+    ) -> None:
+        self._request = request
+        self._backend = backend
+        self.ttl = ttl
+
+    def _make_key(self, key_parts: Iterable[Any]) -> str:
+        parts = [
+            self._request.url.path,
+            *sorted(self._request.query_params.multi_items()),
+            *key_parts,
+        ]
+        return hashlib.blake2b(
+            "|".join(str(part) for part in parts).encode("utf-8"),
+            digest_size=16,
+        ).hexdigest()
+
+    def _to_response(
+            self,
+            cached: CachedBody,
+            headers: dict[str, str] | None,
+    ) -> Response:
+        return encoded_response(
+            self._request, cached.body, cached.br_body, headers)
+
+    async def get(
+            self,
+            *key_parts: Any,
+            headers: dict[str, str] | None = None,
+    ) -> Response | None:
+        """Return the cached response, if any
+
+        :param key_parts: values the response depends on that are not part of
+        the request URL, like the rounded time window.
+        :param headers: headers to add to the response.
+        """
+        if self._backend is None:
+            return None
+        try:
+            cached = await self._backend.get(self._make_key(key_parts))
+        except Exception as e:
+            logger.error(
+                f"Encountered an error when trying to get a cached response "
+                f"for '{self._request.url.path}'. Error msg: "
+                f"`{e.__class__.__name__}: {e}`")
+            return None
+        if cached is None:
+            return None
+        return self._to_response(cached, headers)
+
+    async def set(
+            self,
+            body: bytes,
+            *key_parts: Any,
+            headers: dict[str, str] | None = None,
+    ) -> Response:
+        """Store the serialized response and return it"""
+        br_body = None
+        if len(body) >= BROTLI_MINIMUM_SIZE:
+            br_body = brotli.compress(body, quality=BROTLI_QUALITY)
+        cached = CachedBody(body, br_body)
+        if self._backend is not None:
+            try:
+                await self._backend.set(self._make_key(key_parts), cached, self.ttl)
+            except Exception as e:
+                logger.error(
+                    f"Encountered an error when trying to cache the response "
+                    f"for '{self._request.url.path}'. Error msg: "
+                    f"`{e.__class__.__name__}: {e}`")
+        return self._to_response(cached, headers)
+
+
+class cached_response:  # noqa: N801
+    """Dependency providing a `CachedResponse` for the route
+
+    :param ttl: the time, in seconds, the responses are kept. Responses are
+    never invalidated: the key parts must include the versions of the data
+    they depend on.
+    """
+    def __init__(self, ttl: int) -> None:
+        self.ttl = ttl
+
+    def __call__(self, request: Request) -> CachedResponse:
+        return CachedResponse(request, ResponseCache.get_backend(), self.ttl)
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Any
+
+from fastapi.responses import JSONResponse as BaseResponse
+import orjson
+from pydantic import BaseModel, TypeAdapter
+
+from ouranos.core.utils import json
+
+
+class JSONResponse(BaseResponse):
+    # Customize based on fastapi.responses.ORJSONResponse
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content)
+
+
+class PrevalidatedJSONResponse(JSONResponse):
+    """A response whose content already has the shape of the route
+    `response_model`
+
+    Returning it from a route skips FastAPI's response model validation and
+    serialization: the content is directly encoded by orjson, which natively
+    handles tuples, dataclasses, enums and datetimes. UTC datetimes are
+    rendered with a 'Z' suffix like pydantic does.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, option=orjson.OPT_UTC_Z)
+
+
+def prevalidated_response(
+        response_model: type[BaseModel],
+        content: dict[str, Any],
+        **kwargs: Any,
+) -> PrevalidatedJSONResponse:
+    """Create a `PrevalidatedJSONResponse` with the default values of the
+    `response_model` fields missing from `content`
+
+    The content must only contain values orjson can serialize natively and that
+    are rendered the same way by the `response_model`. Rows fetched from the
+    database should be converted with `rows_to_tuples()` or projected on
+    dataclasses beforehand.
+    """
+    for name, field in response_model.model_fields.items():
+        if name not in content and not field.is_required():
+            content[name] = field.get_default(call_default_factory=True)
+    return PrevalidatedJSONResponse(content, **kwargs)
+
+
+@lru_cache(maxsize=32)
+def _get_type_adapter(response_model: Any) -> TypeAdapter:
+    return TypeAdapter(response_model)
+
+
+def serialize_response(response_model: Any, content: Any) -> bytes:
+    """Validate and serialize `content` to JSON the same way FastAPI does with
+    the route `response_model`"""
+    adapter = _get_type_adapter(response_model)
+    validated = adapter.validate_python(content, from_attributes=True)
+    return adapter.dump_json(validated)
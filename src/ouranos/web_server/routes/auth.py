@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-from datetime import datetime, timezone
 from logging import getLogger, Logger
 from typing import Annotated
 
@@ -12,10 +11,11 @@ from gaia_validators import safe_enum_from_name
 
 from ouranos.core.config.consts import REGISTRATION_TOKEN_VALIDITY, TOKEN_SUBS
 from ouranos.core.database.models.app import (
-    RoleName, User, UserMixin, UserTokenInfoDict)
+    RoleName, User, user_last_seen, UserMixin, UserTokenInfoDict)
 from ouranos.web_server.auth import (
-    Authenticator, basic_auth, check_token, get_current_user, get_session_info,
-    is_admin, login_manager, refresh_session_cookie_expiration, SessionInfo)
+    Authenticator, basic_auth, broadcast_user_update, check_token,
+    get_current_user, get_session_info, is_admin, login_manager,
+    refresh_session_cookie_expiration, SessionInfo)
 from ouranos.web_server.dependencies import get_session
 from ouranos.web_server.validate.auth import (
     LoginInfo, UserCreationPayload, UserInvitationPayload,
@@ -80,17 +80,12 @@ async def update_current_user_last_seen(
         *,
         response: Response,
         current_user: UserMixin = Depends(get_current_user),  # Cannot use Annotated here
-        session: Annotated[AsyncSession, Depends(get_session)],
 ):
     if current_user.is_anonymous:
         # Nothing to update for an anonymous user
         response.status_code = status.HTTP_204_NO_CONTENT
         return
-    await User.update(
-        session,
-        user_id=current_user.id,
-        values={"last_seen": datetime.now(timezone.utc)}
-    )
+    user_last_seen.touch(current_user.id)
 
 
 @router.get("/refresh_session")
@@ -179,7 +174,7 @@ async def confirm_account(
         ],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
-    check_token(token, TOKEN_SUBS.CONFIRMATION.value)
+    token_payload = check_token(token, TOKEN_SUBS.CONFIRMATION.value)
     try:
         await User.confirm(session, token)
     except ValueError as e:
@@ -188,6 +183,9 @@ async def confirm_account(
             detail=str(e)
         )
     else:
+        # The other workers reload the user once notified, commit first
+        await session.commit()
+        await broadcast_user_update(token_payload["user_id"])
         return "Your account has been confirmed."
 
 
@@ -203,7 +201,7 @@ async def reset_password(
         ],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
-    check_token(token, TOKEN_SUBS.RESET_PASSWORD.value)
+    token_payload = check_token(token, TOKEN_SUBS.RESET_PASSWORD.value)
     try:
         await User.reset_password(session, token, payload.password)
     except ValueError as e:
@@ -212,6 +210,8 @@ async def reset_password(
             detail=str(e) if not e.args else e.args[0]  # There should be a single error
         )
     else:
+        await session.commit()
+        await broadcast_user_update(token_payload["user_id"])
         return "Your password has been changed."
 
 
@@ -2,6 +2,7 @@ from fastapi import APIRouter
 
 from ouranos.web_server.routes.gaia.ecosystem import router as ecosystem_router
 from ouranos.web_server.routes.gaia.engine import router as engine_router
+from ouranos.web_server.routes.gaia.export import router as export_router
 from ouranos.web_server.routes.gaia.hardware import router as hardware_router
 from ouranos.web_server.routes.gaia.pictures import router as pictures_router
 from ouranos.web_server.routes.gaia.sensor import router as sensor_router
@@ -15,6 +16,7 @@ router = APIRouter(
 
 router.include_router(ecosystem_router)
 router.include_router(engine_router)
+router.include_router(export_router)
 router.include_router(hardware_router)
 router.include_router(pictures_router)
 router.include_router(sensor_router)
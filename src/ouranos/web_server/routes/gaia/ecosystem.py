@@ -3,7 +3,7 @@ from __future__ import annotations
 from enum import StrEnum
 from typing import Annotated
 
-from datetime import timedelta
+from datetime import datetime, timedelta, timezone
 from fastapi import (
     APIRouter, Body, Depends, HTTPException, Path, Query, status)
 import humanize
@@ -14,13 +14,18 @@ import gaia_validators as gv
 from gaia_validators import safe_enum_from_name
 
 from ouranos.core.database.models.gaia import (
-    Ecosystem, EnvironmentParameter, NycthemeralCycle, WeatherEvent)
+    ActuatorState, Ecosystem, EnvironmentParameter, NycthemeralCycle,
+    ResourceVersion, WeatherEvent)
 from ouranos.core.database.models.utils import TimeWindow
 from ouranos.core.dispatchers import DispatcherFactory
+from ouranos.core.utils import rows_to_tuples
 from ouranos.web_server.auth import is_operator
+from ouranos.web_server.conditional import ConditionalRequest
 from ouranos.web_server.dependencies import get_session, get_time_window
+from ouranos.web_server.responses import prevalidated_response
 from ouranos.web_server.routes.gaia.utils import (
-    ecosystem_or_abort, eids_desc, emit_crud_event, euid_desc, in_config_desc)
+    ecosystem_or_abort, eids_desc, emit_crud_event, euid_desc,
+    group_by_ecosystem, in_config_desc)
 from ouranos.web_server.validate.gaia.ecosystem import (
     EcosystemCreationPayload, EcosystemBaseInfoUpdatePayload, EcosystemInfo,
     EcosystemManagementUpdatePayload, EcosystemManagementInfo, ManagementInfo,
@@ -215,6 +220,16 @@ async def delete_ecosystem(
 #   Rem: there is no 'post' method as management dict is automatically created
 #        upon ecosystem creation
 # ------------------------------------------------------------------------------
+# The resources versions the ecosystems functionalities depend on
+MANAGEMENT_VERSIONS = ("base_info", "management", "actuators_data", "sensors_data")
+
+
+def _functionalities_period() -> str:
+    # Recent data and pictures also expire with time, limit the validity of
+    #  the functionalities to one hour
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H")
+
+
 @router.get("/managements_available", response_model=list[ManagementInfo])
 async def get_managements_available():
     return [
@@ -228,14 +243,16 @@ async def get_ecosystems_management(
         *,
         ecosystems_id: Annotated[list[str] | None, Query(description=eids_desc)] = None,
         in_config: Annotated[bool | None, Query(description=in_config_desc)] = None,
+        conditional: Annotated[ConditionalRequest, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, MANAGEMENT_VERSIONS)
+    conditional.evaluate(
+        versions=versions, extra=(_functionalities_period(),))
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
-    response = [
-        await ecosystem.get_functionalities(session)
-        for ecosystem in ecosystems
-    ]
+    response = await Ecosystem.get_functionalities_multiple(
+        session, ecosystems=ecosystems)
     return response
 
 
@@ -243,8 +260,12 @@ async def get_ecosystems_management(
             response_model=EcosystemManagementInfo)
 async def get_ecosystem_management(
         ecosystem_uid: Annotated[str, Path(description=euid_desc)],
+        conditional: Annotated[ConditionalRequest, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, MANAGEMENT_VERSIONS)
+    conditional.evaluate(
+        versions=versions, extra=(_functionalities_period(),))
     ecosystem = await ecosystem_or_abort(session, ecosystem_uid)
     response = await ecosystem.get_functionalities(session)
     return response
@@ -295,17 +316,16 @@ async def get_ecosystems_lighting(
 ):
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
-    response = []
-    for ecosystem in ecosystems:
-        lighting = await NycthemeralCycle.get(session, ecosystem_uid=ecosystem.uid)
-        if lighting is not None:
-            response.append(
-                {
-                    "uid": ecosystem.uid,
-                    "name": ecosystem.name,
-                    **lighting.to_dict()
-                }
-            )
+    lightings = group_by_ecosystem(await NycthemeralCycle.get_multiple(
+        session, ecosystem_uid=[ecosystem.uid for ecosystem in ecosystems]))
+    response = [
+        {
+            "uid": ecosystem.uid,
+            "name": ecosystem.name,
+            **lightings[ecosystem.uid][0].to_dict()
+        } for ecosystem in ecosystems
+        if ecosystem.uid in lightings
+    ]
     return response
 
 
@@ -377,12 +397,15 @@ async def get_ecosystems_environment_parameters(
 ):
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
+    environment_parameters = group_by_ecosystem(
+        await EnvironmentParameter.get_multiple(
+            session, ecosystem_uid=[ecosystem.uid for ecosystem in ecosystems],
+            parameter=parameters))
     response = [
         {
             "uid": ecosystem.uid,
             "name": ecosystem.name,
-            "environment_parameters": await EnvironmentParameter.get_multiple(
-            session, ecosystem_uid=ecosystem.uid, parameter=parameters)
+            "environment_parameters": environment_parameters.get(ecosystem.uid, [])
         } for ecosystem in ecosystems
     ]
     return response
@@ -545,12 +568,14 @@ async def get_ecosystems_weather_events(
 ):
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
+    weather_events = group_by_ecosystem(await WeatherEvent.get_multiple(
+        session, ecosystem_uid=[ecosystem.uid for ecosystem in ecosystems],
+        parameter=parameters))
     response = [
         {
             "uid": ecosystem.uid,
             "name": ecosystem.name,
-            "weather_events": await WeatherEvent.get_multiple(
-            session, ecosystem_uid=ecosystem.uid, parameter=parameters)
+            "weather_events": weather_events.get(ecosystem.uid, [])
         } for ecosystem in ecosystems
     ]
     return response
@@ -708,11 +733,13 @@ async def get_ecosystems_actuators_status(
 ):
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
+    actuators_state = group_by_ecosystem(await ActuatorState.get_multiple(
+        session, ecosystem_uid=[ecosystem.uid for ecosystem in ecosystems]))
     response = [
         {
             "uid": ecosystem.uid,
             "name": ecosystem.name,
-            "actuators_state": await ecosystem.get_actuators_state(session)
+            "actuators_state": actuators_state.get(ecosystem.uid, [])
         } for ecosystem in ecosystems
     ]
     return response
@@ -745,20 +772,27 @@ async def get_ecosystem_actuator_records(
             TimeWindow,
             Depends(get_time_window(rounding=10, grace_time=60)),
         ],
+        conditional: Annotated[ConditionalRequest, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
     actuator_type = safe_enum_from_name(gv.HardwareType, actuator_type.name)
     ecosystem = await ecosystem_or_abort(session, ecosystem_uid)
+    last_id, last_timestamp = await ecosystem.get_timed_values_last_change(
+        session, actuator_type, time_window)
+    conditional.evaluate(
+        last_modified=last_timestamp,
+        extra=(time_window.start, time_window.end, last_id))
     response = {
         "uid": ecosystem.uid,
         "name": ecosystem.name,
-        "actuator_type": actuator_type,
+        "actuator_type": actuator_type.name,
         "span": (time_window.start, time_window.end),
-        "values": await ecosystem.get_timed_values(
-            session, actuator_type, time_window),
-        # order is added by the serializer
+        "values": rows_to_tuples(await ecosystem.get_timed_values(
+            session, actuator_type, time_window)),
+        # order is added from the response model
     }
-    return response
+    return prevalidated_response(
+        EcosystemActuatorRecords, response, headers=conditional.headers)
 
 
 @router.put("/u/{ecosystem_uid}/turn_actuator/u/{actuator_type}",
@@ -0,0 +1,321 @@
+from __future__ import annotations
+
+import csv
+from datetime import datetime
+from enum import Enum, StrEnum
+from io import StringIO
+from typing import Annotated, AsyncIterator, Callable, Iterable
+import zlib
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import gaia_validators as gv
+from gaia_validators import safe_enum_from_name
+
+from ouranos import db, json
+from ouranos.core.database.compression import decode_timed_values
+from ouranos.core.database.models.archives import (
+    ActuatorRecordArchive, SensorDataArchiveBlock, SensorDataRecordArchive,
+    utc_date)
+from ouranos.core.database.models.gaia import (
+    ActuatorRecord, Ecosystem, SensorDataRecord)
+from ouranos.core.database.models.utils import TimeWindow
+from ouranos.web_server.auth import is_authenticated
+from ouranos.web_server.dependencies import get_session, get_time_window
+from ouranos.web_server.routes.gaia.ecosystem import HardwareTypeName
+from ouranos.web_server.routes.gaia.utils import eids_desc
+
+
+router = APIRouter(
+    prefix="/ecosystem",
+    responses={404: {"description": "Not found"}},
+    tags=["gaia/ecosystem/export"],
+)
+
+
+# Number of rows fetched from the database cursor at once
+EXPORT_CHUNK_SIZE = 2000
+
+
+class ExportFormat(StrEnum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+format_desc = "The export format, either 'ndjson' or 'csv'"
+gzip_desc = "Compress the export as a gzip file"
+sensors_uid_desc = "A list of sensor uids to export. By default, all of them"
+measures_desc = "A list of measures to export. By default, all of them"
+actuator_types_desc = "A list of actuator types to export. By default, all of them"
+
+
+_media_types: dict[ExportFormat, str] = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+sensor_columns = ("timestamp", "ecosystem_uid", "sensor_uid", "measure", "value")
+actuator_columns = ("timestamp", "ecosystem_uid", "type", "active", "mode", "status", "level")
+
+
+async def _get_ecosystems_uid(
+        session: AsyncSession,
+        ecosystems_id: list[str] | None,
+) -> list[str]:
+    ecosystems = await Ecosystem.get_multiple_by_id(
+        session, ecosystems_id=ecosystems_id)
+    if not ecosystems:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No ecosystem(s) found"
+        )
+    return [ecosystem.uid for ecosystem in ecosystems]
+
+
+def _sensor_stmt(
+        model: type[SensorDataRecord] | type[SensorDataRecordArchive],
+        ecosystems_uid: list[str],
+        sensors_uid: list[str] | None,
+        measures: list[str] | None,
+        time_window: TimeWindow,
+) -> Select:
+    stmt = (
+        select(*[getattr(model, column) for column in sensor_columns])
+        .where(model.ecosystem_uid.in_(ecosystems_uid))
+        .where(
+            (model.timestamp > time_window.start)
+            & (model.timestamp <= time_window.end)
+        )
+        .order_by(model.timestamp.asc(), model.id.asc())
+    )
+    if sensors_uid:
+        stmt = stmt.where(model.sensor_uid.in_(sensors_uid))
+    if measures:
+        stmt = stmt.where(model.measure.in_(measures))
+    return stmt
+
+
+def _sensor_blocks_stmt(
+        ecosystems_uid: list[str],
+        sensors_uid: list[str] | None,
+        measures: list[str] | None,
+        time_window: TimeWindow,
+) -> Select:
+    Block = SensorDataArchiveBlock
+    stmt = (
+        select(
+            Block.ecosystem_uid, Block.sensor_uid, Block.measure, Block.start,
+            Block.resolution, Block.encoded_timestamps, Block.encoded_values,
+        )
+        .where(Block.ecosystem_uid.in_(ecosystems_uid))
+        .where(Block.day >= utc_date(time_window.start))
+        .where(Block.day <= utc_date(time_window.end))
+        .order_by(Block.day.asc(), Block.id.asc())
+    )
+    if sensors_uid:
+        stmt = stmt.where(Block.sensor_uid.in_(sensors_uid))
+    if measures:
+        stmt = stmt.where(Block.measure.in_(measures))
+    return stmt
+
+
+def _decode_sensor_blocks(time_window: TimeWindow) -> Callable[[Iterable[tuple]], list[tuple]]:
+    def decode(blocks: Iterable[tuple]) -> list[tuple]:
+        return [
+            (timestamp, ecosystem_uid, sensor_uid, measure, value)
+            for ecosystem_uid, sensor_uid, measure, *encoded in blocks
+            for timestamp, value in decode_timed_values(*encoded)
+            if time_window.start < timestamp <= time_window.end
+        ]
+    return decode
+
+
+def _actuator_stmt(
+        model: type[ActuatorRecord] | type[ActuatorRecordArchive],
+        ecosystems_uid: list[str],
+        actuator_types: list[gv.HardwareType],
+        time_window: TimeWindow,
+) -> Select:
+    stmt = (
+        select(*[getattr(model, column) for column in actuator_columns])
+        .where(model.ecosystem_uid.in_(ecosystems_uid))
+        .where(
+            (model.timestamp > time_window.start)
+            & (model.timestamp <= time_window.end)
+        )
+        .order_by(model.timestamp.asc(), model.id.asc())
+    )
+    if actuator_types:
+        stmt = stmt.where(model.type.in_(actuator_types))
+    return stmt
+
+
+def _format_value(value):
+    if isinstance(value, Enum):
+        return value.name
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _encode_ndjson(columns: tuple[str, ...], rows: Iterable[tuple]) -> bytes:
+    return b"".join(
+        json.dumps({
+            column: _format_value(value)
+            for column, value in zip(columns, row)
+        }) + b"\n"
+        for row in rows
+    )
+
+
+def _encode_csv(rows: Iterable[tuple]) -> bytes:
+    buffer = StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows(
+        [_format_value(value) for value in row]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+# A statement to stream, and optionally a function converting the rows fetched
+#  into rows matching the exported columns
+ExportSource = tuple[Select, Callable[[Iterable[tuple]], list[tuple]] | None]
+
+
+async def _stream_rows(
+        columns: tuple[str, ...],
+        sources: Iterable[ExportSource],
+        export_format: ExportFormat,
+        compress: bool,
+) -> AsyncIterator[bytes]:
+    compressor = zlib.compressobj(wbits=31) if compress else None
+
+    def process(chunk: bytes) -> bytes:
+        if compressor is None:
+            return chunk
+        return compressor.compress(chunk)
+
+    if export_format == ExportFormat.csv:
+        header = StringIO()
+        csv.writer(header).writerow(columns)
+        yield process(header.getvalue().encode("utf-8"))
+
+    # The session is opened here as the generator outlives the request handler
+    async with db.scoped_session() as session:
+        for stmt, convert in sources:
+            stmt = stmt.execution_options(yield_per=EXPORT_CHUNK_SIZE)
+            result = await session.stream(stmt)
+            async for partition in result.partitions():
+                if convert is not None:
+                    partition = convert(partition)
+                if export_format == ExportFormat.ndjson:
+                    chunk = _encode_ndjson(columns, partition)
+                else:
+                    chunk = _encode_csv(partition)
+                chunk = process(chunk)
+                if chunk:
+                    yield chunk
+    if compressor is not None:
+        yield compressor.flush()
+
+
+def _export_response(
+        name: str,
+        columns: tuple[str, ...],
+        sources: Iterable[ExportSource],
+        export_format: ExportFormat,
+        compress: bool,
+) -> StreamingResponse:
+    filename = f"{name}.{export_format}"
+    if compress:
+        media_type = "application/gzip"
+        filename += ".gz"
+    else:
+        media_type = _media_types[export_format]
+    return StreamingResponse(
+        _stream_rows(columns, sources, export_format, compress),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/sensor/data/export",
+            response_class=StreamingResponse,
+            dependencies=[Depends(is_authenticated)])
+async def export_sensors_data(
+        *,
+        ecosystems_id: Annotated[list[str] | None, Query(description=eids_desc)] = None,
+        sensors_uid: Annotated[list[str] | None, Query(description=sensors_uid_desc)] = None,
+        measures: Annotated[list[str] | None, Query(description=measures_desc)] = None,
+        export_format: Annotated[
+            ExportFormat,
+            Query(alias="format", description=format_desc),
+        ] = ExportFormat.ndjson,
+        gzip: Annotated[bool, Query(description=gzip_desc)] = False,
+        time_window: Annotated[
+            TimeWindow,
+            Depends(get_time_window(rounding=10, grace_time=60, max_window_length=None)),
+        ],
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    ecosystems_uid = await _get_ecosystems_uid(session, ecosystems_id)
+    # Archived records are older than the recent ones, stream them first
+    sources: list[ExportSource] = [
+        (
+            _sensor_stmt(
+                SensorDataRecordArchive, ecosystems_uid, sensors_uid, measures,
+                time_window),
+            None,
+        ),
+        (
+            _sensor_blocks_stmt(ecosystems_uid, sensors_uid, measures, time_window),
+            _decode_sensor_blocks(time_window),
+        ),
+        (
+            _sensor_stmt(
+                SensorDataRecord, ecosystems_uid, sensors_uid, measures,
+                time_window),
+            None,
+        ),
+    ]
+    return _export_response(
+        "sensors_data", sensor_columns, sources, export_format, gzip)
+
+
+@router.get("/actuator/data/export",
+            response_class=StreamingResponse,
+            dependencies=[Depends(is_authenticated)])
+async def export_actuators_data(
+        *,
+        ecosystems_id: Annotated[list[str] | None, Query(description=eids_desc)] = None,
+        actuator_types: Annotated[
+            list[HardwareTypeName] | None,
+            Query(description=actuator_types_desc),
+        ] = None,
+        export_format: Annotated[
+            ExportFormat,
+            Query(alias="format", description=format_desc),
+        ] = ExportFormat.ndjson,
+        gzip: Annotated[bool, Query(description=gzip_desc)] = False,
+        time_window: Annotated[
+            TimeWindow,
+            Depends(get_time_window(rounding=10, grace_time=60, max_window_length=None)),
+        ],
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    ecosystems_uid = await _get_ecosystems_uid(session, ecosystems_id)
+    actuator_types = [
+        safe_enum_from_name(gv.HardwareType, actuator_type.name)
+        for actuator_type in actuator_types or []
+    ]
+    sources: list[ExportSource] = [
+        (_actuator_stmt(model, ecosystems_uid, actuator_types, time_window), None)
+        for model in (ActuatorRecordArchive, ActuatorRecord)
+    ]
+    return _export_response(
+        "actuators_data", actuator_columns, sources, export_format, gzip)
@@ -8,8 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import gaia_validators as gv
 
-from ouranos.core.database.models.gaia import Hardware
+from ouranos.core.database.models.gaia import Hardware, ResourceVersion
 from ouranos.web_server.auth import is_operator
+from ouranos.web_server.conditional import ConditionalRequest
 from ouranos.web_server.dependencies import get_session
 from ouranos.web_server.routes.gaia.utils import (
     ecosystem_or_abort, eids_desc, emit_crud_event, euid_desc, h_level_desc,
@@ -25,6 +26,11 @@ router = APIRouter(
 )
 
 
+# The resources versions the hardware info depends on ('last_log' is updated
+#  when sensors and health data are logged)
+HARDWARE_VERSIONS = ("hardware", "sensors_data", "health_data")
+
+
 async def hardware_or_abort(
         session: AsyncSession,
         hardware_uid: str
@@ -62,8 +68,11 @@ async def get_multiple_hardware(
             Query(description="A list of precise hardware model"),
         ] = None,
         in_config: Annotated[bool | None, Query(description=in_config_desc)] = None,
+        conditional: Annotated[ConditionalRequest, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, HARDWARE_VERSIONS)
+    conditional.evaluate(versions=versions)
     hardware = await Hardware.get_multiple(
         session, uid=hardware_uid, ecosystem_uid=ecosystems_uid, level=hardware_level,
         type=hardware_type, model=hardware_model, in_config=in_config)
@@ -97,8 +106,11 @@ async def get_ecosystem_hardware(
             Query(description="A list of types of hardware"),
         ] = None,
         in_config: Annotated[bool | None, Query(description=in_config_desc)] = None,
+        conditional: Annotated[ConditionalRequest, Depends()],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, HARDWARE_VERSIONS)
+    conditional.evaluate(versions=versions)
     ecosystem = await ecosystem_or_abort(session, ecosystem_uid)
     hardware = await ecosystem.get_hardware(
         session, hardware_type=hardware_type, in_config=in_config)
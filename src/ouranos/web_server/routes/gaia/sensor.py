@@ -7,14 +7,21 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 import gaia_validators as gv
 
-from ouranos.core.database.models.gaia import Ecosystem, Measure, Sensor
+from ouranos.core.database.models.gaia import (
+    Ecosystem, Measure, ResourceVersion, Sensor, SensorDataCache)
 from ouranos.core.database.models.utils import TimeWindow
+from ouranos.core.utils import rows_to_tuples
+from ouranos.web_server.conditional import ConditionalRequest
 from ouranos.web_server.dependencies import get_session, get_time_window
+from ouranos.web_server.response_cache import CachedResponse, cached_response
+from ouranos.web_server.responses import (
+    PrevalidatedJSONResponse, prevalidated_response, serialize_response)
 from ouranos.web_server.routes.gaia.utils import (
-    ecosystem_or_abort, eids_desc, euid_desc, h_level_desc, in_config_desc)
+    ecosystem_or_abort, eids_desc, euid_desc, group_by_ecosystem, h_level_desc,
+    in_config_desc)
 from ouranos.web_server.validate.gaia.sensor import (
     EcosystemSensorData, SensorMeasureCurrentTimedValue,
-    SensorMeasureHistoricTimedValue, SensorSkeletonInfo)
+    SensorMeasureHistoricTimedValue, SensorRecordProjection, SensorSkeletonInfo)
 
 
 router = APIRouter(
@@ -27,6 +34,15 @@ router = APIRouter(
 id_desc = "An ecosystem id, either its uid or its name"
 
 
+# The resources versions the sensors skeleton depends on
+SKELETON_VERSIONS = ("hardware", "sensors_data")
+
+# The keys of the cached responses include the versions of the resources and
+#  the latest record id, they do not need to be invalidated
+skeleton_cache = cached_response(ttl=900)
+historic_data_cache = cached_response(ttl=600)
+
+
 async def sensor_or_abort(
         session: AsyncSession,
         sensor_uid: str
@@ -59,8 +75,17 @@ async def get_ecosystems_sensors_skeleton(
             TimeWindow,
             Depends(get_time_window(rounding=10, grace_time=60)),
         ],
+        conditional: Annotated[ConditionalRequest, Depends()],
+        cache: Annotated[CachedResponse, Depends(skeleton_cache)],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, SKELETON_VERSIONS)
+    conditional.evaluate(
+        versions=versions, extra=(time_window.start, time_window.end))
+    cache_key = (time_window.start, time_window.end, *versions.values())
+    cached = await cache.get(*cache_key, headers=conditional.headers)
+    if cached is not None:
+        return cached
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
     response = [
@@ -68,7 +93,9 @@ async def get_ecosystems_sensors_skeleton(
             session, time_window=time_window, level=level)
         for ecosystem in ecosystems
     ]
-    return response
+    return await cache.set(
+        serialize_response(list[SensorSkeletonInfo], response),
+        *cache_key, headers=conditional.headers)
 
 
 @router.get("/u/{ecosystem_uid}/sensor/skeleton",
@@ -84,12 +111,23 @@ async def get_ecosystem_sensors_skeleton(
             TimeWindow,
             Depends(get_time_window(rounding=10, grace_time=60)),
         ],
+        conditional: Annotated[ConditionalRequest, Depends()],
+        cache: Annotated[CachedResponse, Depends(skeleton_cache)],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
+    versions = await ResourceVersion.get_versions(session, SKELETON_VERSIONS)
+    conditional.evaluate(
+        versions=versions, extra=(time_window.start, time_window.end))
+    cache_key = (time_window.start, time_window.end, *versions.values())
+    cached = await cache.get(*cache_key, headers=conditional.headers)
+    if cached is not None:
+        return cached
     ecosystem = await ecosystem_or_abort(session, ecosystem_uid)
     response = await ecosystem.get_sensors_data_skeleton(
         session, time_window=time_window, level=level)
-    return response
+    return await cache.set(
+        serialize_response(SensorSkeletonInfo, response),
+        *cache_key, headers=conditional.headers)
 
 
 @router.get("/sensor/data/current", response_model=list[EcosystemSensorData])
@@ -101,14 +139,17 @@ async def get_current_data(
 ):
     ecosystems = await Ecosystem.get_multiple_by_id(
         session, ecosystems_id=ecosystems_id, in_config=in_config)
+    current_data = group_by_ecosystem(await SensorDataCache.get_recent(
+        session, ecosystem_uid=[ecosystem.uid for ecosystem in ecosystems]))
     response = [
         {
             "uid": ecosystem.uid,
             "name": ecosystem.name,
-            "values": await ecosystem.get_current_data(session)
+            "values": SensorRecordProjection.from_entities(
+                current_data.get(ecosystem.uid, [])),
         } for ecosystem in ecosystems
     ]
-    return response
+    return PrevalidatedJSONResponse(response)
 
 
 @router.get("/u/{ecosystem_uid}/sensor/data/current",
@@ -150,11 +191,12 @@ async def get_sensor_current_data(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This measure is not available for this sensor"
         )
+    current_data["values"] = rows_to_tuples(current_data["values"])
     response = {
         "uid": sensor.uid,
         **current_data,
     }
-    return response
+    return prevalidated_response(SensorMeasureCurrentTimedValue, response)
 
 
 @router.get("/u/{ecosystem_uid}/sensor/u/{hardware_uid}/data/{measure}/historic",
@@ -170,10 +212,21 @@ async def get_sensor_historic_data(
             TimeWindow,
             Depends(get_time_window(rounding=10, grace_time=60, max_window_length=31)),
         ],
+        conditional: Annotated[ConditionalRequest, Depends()],
+        cache: Annotated[CachedResponse, Depends(historic_data_cache)],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
     await ecosystem_or_abort(session, ecosystem_uid)
     sensor = await sensor_or_abort(session, hardware_uid)
+    last_id, last_timestamp = await sensor.get_historic_data_last_change(
+        session, measure=measure, time_window=time_window)
+    conditional.evaluate(
+        last_modified=last_timestamp,
+        extra=(time_window.start, time_window.end, last_id))
+    cache_key = (time_window.start, time_window.end, last_id)
+    cached = await cache.get(*cache_key, headers=conditional.headers)
+    if cached is not None:
+        return cached
     historic_data = await sensor.get_historic_data(
         session, measure=measure, time_window=time_window)
     if historic_data is None:
@@ -181,8 +234,10 @@ async def get_sensor_historic_data(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="This measure is not available for this sensor"
         )
+    historic_data["values"] = rows_to_tuples(historic_data["values"])
     response = {
         "uid": sensor.uid,
         **historic_data,
     }
-    return response
+    body = prevalidated_response(SensorMeasureHistoricTimedValue, response).body
+    return await cache.set(body, *cache_key, headers=conditional.headers)
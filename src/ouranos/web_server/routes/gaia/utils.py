@@ -1,4 +1,4 @@
-from typing import Any
+from typing import Any, Iterable, TypeVar
 
 from fastapi import HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -21,6 +21,18 @@ in_config_desc = (
     "files")
 
 
+_Row = TypeVar("_Row")
+
+
+def group_by_ecosystem(rows: Iterable[_Row]) -> dict[str, list[_Row]]:
+    """Group the rows fetched for several ecosystems at once by their
+    `ecosystem_uid`"""
+    rv: dict[str, list[_Row]] = {}
+    for row in rows:
+        rv.setdefault(row.ecosystem_uid, []).append(row)  # ty: ignore[unresolved-attribute]
+    return rv
+
+
 async def ecosystem_or_abort(
         session: AsyncSession,
         ecosystem_uid: str,
@@ -2,12 +2,16 @@ from __future__ import annotations
 
 from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends, Query, Response
+from fastapi import (
+    APIRouter, Depends, HTTPException, Query, Request, Response, status)
 
 import gaia_validators as gv
 
-from ouranos.core.caches import CacheFactory
+from ouranos.core.caches import (
+    CacheFactory, forecast_snapshot_key, Snapshot, snapshot_key, weather_timings)
 from ouranos.core.database.models.app import ServiceName
+from ouranos.web_server.conditional import ConditionalRequest
+from ouranos.web_server.response_cache import encoded_response
 from ouranos.web_server.routes.services.utils import service_enabled
 from ouranos.web_server.validate.weather import (
     CurrentWeatherInfo, DailyWeatherInfo, HourlyWeatherInfo, WeatherInfo)
@@ -29,60 +33,101 @@ router = APIRouter(
 sky_watcher_cache = CacheFactory.get("sky_watcher")
 
 
-# TODO: fix this, it should not be needed
-async def init_cache_if_needed():
-    if not sky_watcher_cache.is_init:
-        await sky_watcher_cache.init()
+async def get_location(
+        engine_uid: Annotated[
+            str | None,
+            Query(description="The uid of the engine owning the place"),
+        ] = None,
+        place: Annotated[
+            str | None,
+            Query(description="The name of a place registered by the engine. "
+                              "The home coordinates are used if not provided"),
+        ] = None,
+) -> str | None:
+    if engine_uid is None and place is None:
+        return None
+    if engine_uid is None or place is None:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Both 'engine_uid' and 'place' are required to select a place",
+        )
+    places_locations = await sky_watcher_cache.get("places_locations", {})
+    try:
+        return places_locations[f"{engine_uid}/{place}"]
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Place not found",
+        )
+
+
+async def snapshot_response(
+        key: str,
+        request: Request,
+        conditional: ConditionalRequest,
+) -> Response:
+    """Serve a snapshot published by the `SkyWatcher`, or an empty response
+    if there is none"""
+    snapshot: Snapshot | None = await sky_watcher_cache.get(key, None)
+    if snapshot is None:
+        return Response(status_code=204)
+    conditional.evaluate(
+        etag=snapshot.etag, last_modified=snapshot.last_modified)
+    return encoded_response(
+        request, snapshot.body, snapshot.br_body, conditional.headers)
 
 
 @router.get("/sun_times", response_model=list[gv.SunTimes])
-async def get_sun_times():
-    await init_cache_if_needed()
-    response = await sky_watcher_cache.get("sun_times", None)
-    if response:
-        return response
-    return Response(status_code=204)
+async def get_sun_times(
+        request: Request,
+        conditional: Annotated[ConditionalRequest, Depends()],
+        location: Annotated[str | None, Depends(get_location)],
+):
+    return await snapshot_response(
+        snapshot_key("sun_times", location), request, conditional)
 
 
 @router.get("/forecast", response_model=WeatherInfo)
 async def get_forecast(
+        request: Request,
+        conditional: Annotated[ConditionalRequest, Depends()],
+        location: Annotated[str | None, Depends(get_location)],
         exclude: Annotated[list[excluded_timings] | None, Query(description="List of forecast to exclude")] = None,
 ):
-    await init_cache_if_needed()
     if exclude is None:
         exclude = []
-    response = {
-        timing: await sky_watcher_cache.get(f"weather_{timing}", None)
-            if timing not in exclude else None
-        for timing in ["currently", "hourly", "daily"]
-    }
-    if any(value for value in response.values()):
-        return response
-    return Response(status_code=204)
+    timings = [timing for timing in weather_timings if timing not in exclude]
+    if not timings:
+        return Response(status_code=204)
+    return await snapshot_response(
+        forecast_snapshot_key(timings, location), request, conditional)
 
 
 @router.get("/forecast/currently", response_model=CurrentWeatherInfo)
-async def get_current_forecast():
-    await init_cache_if_needed()
-    response = await sky_watcher_cache.get("weather_currently", None)
-    if response:
-        return response
-    return Response(status_code=204)
+async def get_current_forecast(
+        request: Request,
+        conditional: Annotated[ConditionalRequest, Depends()],
+        location: Annotated[str | None, Depends(get_location)],
+):
+    return await snapshot_response(
+        snapshot_key("weather_currently", location), request, conditional)
 
 
 @router.get("/forecast/hourly", response_model=list[HourlyWeatherInfo])
-async def get_hourly_forecast():
-    await init_cache_if_needed()
-    response = await sky_watcher_cache.get("weather_hourly", None)
-    if response:
-        return response
-    return Response(status_code=204)
+async def get_hourly_forecast(
+        request: Request,
+        conditional: Annotated[ConditionalRequest, Depends()],
+        location: Annotated[str | None, Depends(get_location)],
+):
+    return await snapshot_response(
+        snapshot_key("weather_hourly", location), request, conditional)
 
 
 @router.get("/forecast/daily", response_model=list[DailyWeatherInfo])
-async def get_daily_forecast():
-    await init_cache_if_needed()
-    response = await sky_watcher_cache.get("weather_daily", None)
-    if response:
-        return response
-    return Response(status_code=204)
+async def get_daily_forecast(
+        request: Request,
+        conditional: Annotated[ConditionalRequest, Depends()],
+        location: Annotated[str | None, Depends(get_location)],
+):
+    return await snapshot_response(
+        snapshot_key("weather_daily", location), request, conditional)
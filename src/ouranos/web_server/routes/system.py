@@ -1,14 +1,26 @@
+from datetime import datetime, timedelta, timezone
 from typing import Annotated
 
 from fastapi import APIRouter, Depends, HTTPException, Path, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from ouranos import current_app
+from ouranos.core.database.models.abc import ArchivableMixin
+from ouranos.core.database.models.archives import ArchiveWatermark
 from ouranos.core.database.models.system import System
 from ouranos.core.database.models.utils import TimeWindow
+from ouranos.core.utils import rows_to_tuples
 from ouranos.web_server.auth import is_admin
 from ouranos.web_server.dependencies import get_session, get_time_window
+from ouranos.web_server.responses import prevalidated_response
+from ouranos.web_server.system_data import SystemDataBuffers
 from ouranos.web_server.validate.system import (
-    CurrentSystemData, HistoricSystemData, SystemInfo)
+    ArchivingInfo, CurrentProcessesData, CurrentSystemData, EventLoopLag,
+    HistoricProcessesData, HistoricSystemData, SystemInfo)
+
+
+# Longer time windows are served from the hourly roll-ups
+RAW_DATA_MAX_WINDOW = timedelta(days=7)
 
 
 router = APIRouter(
@@ -32,6 +44,16 @@ async def system_or_abort(
     )
 
 
+def use_hourly_data(time_window: TimeWindow) -> bool:
+    """Whether the time window is too long, or too old to still have the raw
+    data, to be served from the raw system data"""
+    if time_window.end - time_window.start > RAW_DATA_MAX_WINDOW:
+        return True
+    archiving_period = current_app.config["SYSTEM_ARCHIVING_PERIOD"] or 90
+    raw_data_limit = datetime.now(timezone.utc) - timedelta(days=archiving_period)
+    return time_window.start < raw_data_limit
+
+
 @router.get("", response_model=list[SystemInfo])
 async def get_systems(
         session: Annotated[AsyncSession, Depends(get_session)],
@@ -40,6 +62,37 @@ async def get_systems(
     return system
 
 
+@router.get("/archiving", response_model=list[ArchivingInfo])
+async def get_archiving_progress(
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    watermarks = {
+        watermark.table_name: watermark
+        for watermark in await ArchiveWatermark.get_multiple(session)
+    }
+    response = []
+    for Model in ArchivableMixin.__subclasses__():
+        if not hasattr(Model, "__table__"):
+            continue
+        table = Model.get_archive_table()
+        cutoff = Model.get_archive_cutoff()
+        oldest = await Model.get_oldest_timestamp(session)
+        watermark = watermarks.get(table)
+        response.append({
+            "table": table,
+            "cutoff": cutoff,
+            "oldest_record": oldest,
+            "lag": (
+                (cutoff - oldest).total_seconds()
+                if oldest is not None and oldest < cutoff
+                else 0.0
+            ),
+            "archived_until": watermark.last_timestamp if watermark else None,
+            "completed": watermark.completed if watermark else None,
+        })
+    return response
+
+
 @router.get("/{system_uid}", response_model=SystemInfo)
 async def get_system(
         system_uid: Annotated[str, Path(description="A server uid")],
@@ -58,14 +111,14 @@ async def get_current_system_data(
     response = {
         "uid": system.uid,
         "hostname": system.hostname,
-        "values": await system.get_recent_timed_values(session),
-        # order is added by the serializer
+        "values": SystemDataBuffers.get_recent(system.uid),
+        # order is added from the response model
         "totals": {
             "DISK_total": system.DISK_total,
             "RAM_total": system.RAM_total,
         }
     }
-    return response
+    return prevalidated_response(CurrentSystemData, response)
 
 
 @router.get("/{system_uid}/data/historic", response_model=HistoricSystemData)
@@ -73,7 +126,8 @@ async def get_historic_system_data(
         system_uid: Annotated[str, Path(description="A server uid")],
         time_window: Annotated[
             TimeWindow,
-            Depends(get_time_window(rounding=10, grace_time=60)),
+            Depends(get_time_window(
+                rounding=10, grace_time=60, max_window_length=None)),
         ],
         session: Annotated[AsyncSession, Depends(get_session)],
 ):
@@ -82,11 +136,86 @@ async def get_historic_system_data(
         "uid": system.uid,
         "hostname": system.hostname,
         "span": (time_window.start, time_window.end),
-        "values": await system.get_timed_values(session, time_window),
-        # order is added by the serializer
+        # order is added from the response model
         "totals": {
             "DISK_total": system.DISK_total,
             "RAM_total": system.RAM_total,
         }
     }
-    return response
+    if use_hourly_data(time_window):
+        rows = await system.get_hourly_timed_values(session, time_window)
+        # The hourly columns are the timestamp then the min, mean and max of
+        #  each metric
+        for key, offset in (("minimums", 1), ("values", 2), ("maximums", 3)):
+            response[key] = [
+                (row[0], *row[offset::3]) for row in rows
+            ]
+        response["resolution"] = "hourly"
+    else:
+        response["values"] = rows_to_tuples(
+            await system.get_timed_values(session, time_window))
+        response["resolution"] = "raw"
+    return prevalidated_response(HistoricSystemData, response)
+
+
+@router.get(
+    "/{system_uid}/data/processes/current",
+    response_model=CurrentProcessesData,
+)
+async def get_current_processes_data(
+        system_uid: Annotated[str, Path(description="A server uid")],
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    system = await system_or_abort(session, uid=system_uid)
+    timestamp, processes = SystemDataBuffers.get_processes(system.uid) or (None, [])
+    response = {
+        "uid": system.uid,
+        "timestamp": timestamp,
+        "values": [
+            (
+                process["label"], process["pid"], process["CPU_used"],
+                process["RAM_used"], process["FD_count"], process["thread_count"],
+            )
+            for process in processes
+        ],
+        # order is added from the response model
+    }
+    return prevalidated_response(CurrentProcessesData, response)
+
+
+@router.get(
+    "/{system_uid}/data/processes/historic",
+    response_model=HistoricProcessesData,
+)
+async def get_historic_processes_data(
+        system_uid: Annotated[str, Path(description="A server uid")],
+        time_window: Annotated[
+            TimeWindow,
+            Depends(get_time_window(rounding=10, grace_time=60)),
+        ],
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    system = await system_or_abort(session, uid=system_uid)
+    series: dict[str, list[tuple]] = {}
+    for label, *values in await system.get_processes_timed_values(
+            session, time_window):
+        series.setdefault(label, []).append(tuple(values))
+    response = {
+        "uid": system.uid,
+        "span": (time_window.start, time_window.end),
+        "series": series,
+        # order is added from the response model
+    }
+    return prevalidated_response(HistoricProcessesData, response)
+
+
+@router.get(
+    "/{system_uid}/data/event_loops",
+    response_model=list[EventLoopLag],
+)
+async def get_event_loops_lag(
+        system_uid: Annotated[str, Path(description="A server uid")],
+        session: Annotated[AsyncSession, Depends(get_session)],
+):
+    system = await system_or_abort(session, uid=system_uid)
+    return SystemDataBuffers.get_event_loop_reports(system.uid)
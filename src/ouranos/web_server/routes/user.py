@@ -10,7 +10,9 @@ from fastapi import (
 
 from ouranos.core.config.consts import REGISTRATION_TOKEN_VALIDITY
 from ouranos.core.database.models.app import Permission, User, UserMixin
-from ouranos.web_server.auth import get_current_user, is_admin
+from ouranos.core.exceptions import PasswordHashingBusyError
+from ouranos.web_server.auth import (
+    broadcast_user_update, get_current_user, is_admin)
 from ouranos.web_server.dependencies import get_session
 from ouranos.web_server.routes.utils import http_datetime
 from ouranos.web_server.validate.user import UserDescription, UserUpdatePayload
@@ -124,7 +126,13 @@ async def update_user(
     }
     try:
         await User.update(session, user_id=user.id, values=user_dict)
+        # The other workers reload the user once notified, commit first
+        await session.commit()
+        await broadcast_user_update(user.id)
         return f"Successfully updated {username}'s info"
+    except PasswordHashingBusyError:
+        # Answered by the application exception handler
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
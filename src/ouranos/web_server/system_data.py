@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+from datetime import datetime, timezone
+import math
+import time
+
+import numpy as np
+
+from ouranos import current_app
+
+
+# Same order as `CurrentSystemData.order`
+system_data_dtype = np.dtype([
+    ("timestamp", "f8"),
+    ("CPU_used", "f8"),
+    ("CPU_temp", "f8"),
+    ("RAM_process", "f8"),
+    ("RAM_used", "f8"),
+    ("DISK_used", "f8"),
+])
+_value_fields: tuple[str, ...] = system_data_dtype.names[1:]
+
+timed_value = tuple[datetime, float, float | None, float, float, float]
+
+
+def _to_timestamp(timestamp: datetime | str) -> float:
+    if isinstance(timestamp, str):
+        timestamp = datetime.fromisoformat(timestamp)
+    return timestamp.timestamp()
+
+
+class SystemDataRingBuffer:
+    """A fixed-size buffer of the latest system data samples
+
+    Samples are stored in a numpy structured array used as a ring: once full,
+    each new sample overwrites the oldest one. Missing values, like the CPU
+    temperature on some hosts, are stored as NaN.
+    """
+    def __init__(self, capacity: int) -> None:
+        self._data: np.ndarray = np.zeros(capacity, dtype=system_data_dtype)
+        self._next: int = 0
+        self._size: int = 0
+
+    @property
+    def capacity(self) -> int:
+        return self._data.shape[0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, data: dict) -> None:
+        sample = self._data[self._next]
+        sample["timestamp"] = _to_timestamp(data["timestamp"])
+        for field in _value_fields:
+            value = data.get(field)
+            sample[field] = np.nan if value is None else value
+        self._next = (self._next + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _ordered(self) -> np.ndarray:
+        if self._size < self.capacity:
+            return self._data[:self._size]
+        return np.roll(self._data, -self._next)
+
+    def get_recent(self, max_age: float) -> list[timed_value]:
+        """Return the samples taken less than `max_age` seconds ago, oldest
+        first"""
+        data = self._ordered()
+        data = data[data["timestamp"] > time.time() - max_age]
+        return [
+            (
+                datetime.fromtimestamp(row[0], tz=timezone.utc),
+                *(None if math.isnan(value) else value for value in row[1:]),
+            )
+            for row in data.tolist()
+        ]
+
+
+class SystemDataBuffers:
+    """The system data ring buffers of the web worker, one per system
+
+    The buffers are filled with the 'current_server_data' events dispatched by
+    the system monitor and are served by the current system data route, so
+    that the recent samples never go through the database.
+    """
+    max_age: int = 90  # in sec
+    _buffers: dict[str, SystemDataRingBuffer] = {}
+    # Only the latest sample of the per-process resources is kept
+    _processes: dict[str, tuple[float, list[dict]]] = {}
+    # Latest event loop lag report of each component, by `(name, pid)`
+    _event_loops: dict[str, dict[tuple[str, int], dict]] = {}
+
+    @classmethod
+    def _get_capacity(cls) -> int:
+        update_period = current_app.config["SYSTEM_UPDATE_PERIOD"] or 1
+        return math.ceil(cls.max_age / update_period) + 1
+
+    @classmethod
+    def append(cls, data: dict) -> None:
+        uid = data["uid"]
+        buffer = cls._buffers.get(uid)
+        if buffer is None:
+            buffer = cls._buffers[uid] = SystemDataRingBuffer(cls._get_capacity())
+        buffer.append(data)
+        if "processes" in data:
+            cls._processes[uid] = (
+                _to_timestamp(data["timestamp"]), data["processes"])
+
+    @classmethod
+    def get_recent(cls, uid: str) -> list[timed_value]:
+        buffer = cls._buffers.get(uid)
+        if buffer is None:
+            return []
+        return buffer.get_recent(cls.max_age)
+
+    @classmethod
+    def get_processes(cls, uid: str) -> tuple[datetime, list[dict]] | None:
+        """Return the latest per-process sample, if recent enough"""
+        timestamp, processes = cls._processes.get(uid, (None, None))
+        if timestamp is None or timestamp <= time.time() - cls.max_age:
+            return None
+        return datetime.fromtimestamp(timestamp, tz=timezone.utc), processes
+
+    @classmethod
+    def set_event_loop_report(cls, report: dict) -> None:
+        reports = cls._event_loops.setdefault(report["uid"], {})
+        reports[(report["name"], report["pid"])] = {
+            **report,
+            "timestamp": _to_timestamp(report["timestamp"]),
+        }
+
+    @classmethod
+    def get_event_loop_reports(cls, uid: str) -> list[dict]:
+        """Return the latest event loop lag reports of the components still
+        reporting, sorted by component name"""
+        time_limit = time.time() - cls.max_age
+        reports = cls._event_loops.get(uid, {})
+        for key in [
+            key for key, report in reports.items()
+            if report["timestamp"] <= time_limit
+        ]:
+            del reports[key]
+        return [
+            {
+                **report,
+                "timestamp": datetime.fromtimestamp(
+                    report["timestamp"], tz=timezone.utc),
+            }
+            for report in sorted(
+                reports.values(), key=lambda r: (r["name"], r["pid"]))
+        ]
+
+    @classmethod
+    def clear(cls) -> None:
+        cls._buffers.clear()
+        cls._processes.clear()
+        cls._event_loops.clear()
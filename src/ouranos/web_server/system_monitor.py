@@ -2,16 +2,18 @@ from __future__ import annotations
 
 import asyncio
 from asyncio import Event, Task
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from logging import getLogger, Logger
+import multiprocessing
 import os
+import re
 import psutil
 import time as ctime
 
-from ouranos import current_app, db
-from ouranos.core.config.consts import START_TIME
+from ouranos import current_app, db, scheduler
+from ouranos.core.config.consts import ROOT_PID_ENV_VAR, START_TIME
 from ouranos.core.database.models.system import (
-    System, SystemDataCache, SystemDataRecord)
+    System, SystemDataHourly, SystemDataRecord, SystemProcessRecord)
 from ouranos.core.dispatchers import DispatcherFactory
 
 
@@ -30,10 +32,106 @@ else:
         )
 
 
+# Default name of the processes spawned by multiprocessing, used by uvicorn
+#  for its workers
+_DEFAULT_PROCESS_NAME = re.compile(r"^SpawnProcess-(\d+)$")
+
+
+def _find_root_process(process: psutil.Process) -> psutil.Process:
+    """Return the process Ouranos was started with, as recorded in the
+    environment by the first functionality created, or `process` itself"""
+    try:
+        root_pid = int(os.environ[ROOT_PID_ENV_VAR])
+    except (KeyError, ValueError):
+        return process
+    if root_pid == process.pid:
+        return process
+    try:
+        # The recorded pid could have been reused by an unrelated process
+        for parent in process.parents():
+            if parent.pid == root_pid:
+                return parent
+    except psutil.Error:
+        pass
+    return process
+
+
+class ProcessTree:
+    """Sample the resources used by each process of the Ouranos process tree
+
+    The tree contains the process Ouranos was started with and all its
+    descendants: the functionalities run in subprocesses, the web workers and
+    the processes spawned by the plugins. Each process is labelled with the
+    name of its functionality when it is known.
+    """
+    def __init__(self, root: psutil.Process | None = None) -> None:
+        self.root: psutil.Process = root or _find_root_process(current_process)
+        # `cpu_percent()` measures the CPU used since its previous call on
+        #  the same `Process` object
+        self._processes: dict[int, psutil.Process] = {}
+
+    def _discover(self) -> list[psutil.Process]:
+        try:
+            tree = [self.root, *self.root.children(recursive=True)]
+        except psutil.Error:
+            tree = [current_process]
+        processes: dict[int, psutil.Process] = {}
+        for process in tree:
+            known = self._processes.get(process.pid)
+            # Pids can be reused, `Process.__eq__` also compares creation time
+            processes[process.pid] = known if known == process else process
+        self._processes = processes
+        return [*processes.values()]
+
+    def _get_label(self, process: psutil.Process, names: dict[int, str]) -> str:
+        if process.pid == self.root.pid:
+            return "main"
+        if process.pid == current_process.pid:
+            return multiprocessing.current_process().name
+        name = names.get(process.pid)
+        if name is None:
+            return f"{process.name()}-{process.pid}"
+        default_name = _DEFAULT_PROCESS_NAME.match(name)
+        if default_name:
+            return f"web_worker-{default_name.group(1)}"
+        return name
+
+    def sample(self, names: dict[int, str] | None = None) -> list[dict]:
+        """Sample the resources used by each process of the tree
+
+        :param names: the names of the processes spawned by this process
+        with multiprocessing, by pid.
+        """
+        names = names or {}
+        samples = []
+        for process in self._discover():
+            try:
+                with process.oneshot():
+                    try:
+                        fd_count = process.num_fds()
+                    except AttributeError:  # Not available on Windows
+                        fd_count = None
+                    samples.append({
+                        "label": self._get_label(process, names),
+                        "pid": process.pid,
+                        "CPU_used": process.cpu_percent(),
+                        "RAM_used": round(
+                            process.memory_info().rss/(1024*1024*1024), 3),
+                        "FD_count": fd_count,
+                        "thread_count": process.num_threads(),
+                    })
+            except psutil.Error:
+                # The process exited or cannot be accessed
+                continue
+        samples.sort(key=lambda sample: sample["label"])
+        return samples
+
+
 class SystemMonitor:
     def __init__(self):
         self.logger: Logger = getLogger("ouranos.aggregator")
         self.dispatcher = DispatcherFactory.get("application-internal")
+        self.process_tree = ProcessTree()
         self._stop_event: Event = Event()
         self._task: Task | None = None
 
@@ -48,6 +146,21 @@ class SystemMonitor:
     def task(self, task: Task | None):
         self._task = task
 
+    def _sample(self, process_names: dict[int, str]) -> dict:
+        # psutil calls can block for a while, they are run in a thread
+        mem = psutil.virtual_memory()
+        mem_proc = current_process.memory_info()
+        disk = psutil.disk_usage("/")
+        return {
+            "timestamp": datetime.now(timezone.utc),
+            "CPU_used": psutil.cpu_percent(),
+            "CPU_temp": get_temp(),
+            "RAM_used": round(mem[3]/(1024*1024*1024), 2),
+            "RAM_process": round(mem_proc.rss/(1024*1024*1024), 2),
+            "DISK_used": round(disk[1]/(1024*1024*1024), 2),
+            "processes": self.process_tree.sample(process_names),
+        }
+
     async def loop(self) -> None:
         update_period = current_app.config.get("SYSTEM_UPDATE_PERIOD")
         logging_period = current_app.config.get("SYSTEM_LOGGING_PERIOD")
@@ -56,37 +169,60 @@ class SystemMonitor:
         while not self._stop_event.is_set():
             start = ctime.time()
             uid = current_app.config["API_UID"]
-            mem = psutil.virtual_memory()
-            mem_proc = current_process.memory_info()
-            disk = psutil.disk_usage("/")
-            common_data = {
-                "timestamp": datetime.now(timezone.utc),
-                "CPU_used": psutil.cpu_percent(),
-                "CPU_temp": get_temp(),
-                "RAM_used": round(mem[3]/(1024*1024*1024), 2),
-                "RAM_process": round(mem_proc.rss/(1024*1024*1024), 2),
-                "DISK_used": round(disk[1]/(1024*1024*1024), 2),
+            process_names = {
+                process.pid: process.name
+                for process in multiprocessing.active_children()
             }
+            common_data = await asyncio.to_thread(self._sample, process_names)
+            processes = common_data.pop("processes")
+            # The web workers keep the recent samples in memory
             await self.dispatcher.emit(
                 "current_server_data",
-                data={"uid": uid, **common_data},
+                data={"uid": uid, **common_data, "processes": processes},
                 namespace="application-internal",
             )
-            async with db.scoped_session() as session:
-                await SystemDataCache.insert_data(
-                    session, {"system_uid": uid, **common_data})
             if logging_period and datetime.now().minute % logging_period == 0:
                 if not logged:
                     async with db.scoped_session() as session:
                         self.logger.debug("Logging system resources")
                         await SystemDataRecord.create_multiple(
                             session, {"system_uid": uid, **common_data})
+                        if processes:
+                            await SystemProcessRecord.create_multiple(
+                                session, [
+                                    {
+                                        "system_uid": uid,
+                                        "timestamp": common_data["timestamp"],
+                                        **process,
+                                    }
+                                    for process in processes
+                                ])
                 logged = True
             else:
                 logged = False
             time_for_loop = ctime.time() - start
             await asyncio.sleep(update_period-time_for_loop)
 
+    async def roll_up_data(self) -> None:
+        """Roll up the system data of the past hours and delete the raw data
+        and the process records older than the `SYSTEM_ARCHIVING_PERIOD`"""
+        archiving_period = current_app.config["SYSTEM_ARCHIVING_PERIOD"] or 90
+        older_than = datetime.now(timezone.utc) - timedelta(days=archiving_period)
+        try:
+            async with db.scoped_session() as session:
+                rolled_up = await SystemDataHourly.roll_up(session)
+                await SystemDataHourly.delete_rolled_up(
+                    session, older_than=older_than)
+                await SystemProcessRecord.delete_older_than(
+                    session, older_than=older_than)
+        except Exception as e:
+            self.logger.error(
+                f"Encountered an error when trying to roll up the system "
+                f"data. Error msg: `{e.__class__.__name__}: {e}`")
+        else:
+            if rolled_up:
+                self.logger.debug(f"Rolled up {rolled_up} hours of system data")
+
     async def start(self) -> None:
         async with db.scoped_session() as session:
             await System.update_or_create(
@@ -104,10 +240,17 @@ class SystemMonitor:
         if update_period is not None:
             self._stop_event.clear()
             self.task = asyncio.ensure_future(self.loop())
+        scheduler.add_job(
+            self.roll_up_data,
+            "cron", minute="5", max_instances=1, coalesce=True,
+            misfire_grace_time=30 * 60, id="system_monitor-roll_up",
+            replace_existing=True,
+        )
 
     async def stop(self) -> None:
+        if scheduler.get_job("system_monitor-roll_up"):
+            scheduler.remove_job("system_monitor-roll_up")
         self._stop_event.set()
-        self.task.cancel()
-        self.task = None
-        async with db.scoped_session() as session:
-            await SystemDataCache.clear(session)
+        if self._task is not None:
+            self.task.cancel()
+            self.task = None
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+from dataclasses import dataclass
 from datetime import datetime
+from typing import Iterable, Self
 
 from pydantic import Field
 
@@ -44,6 +46,27 @@ SensorRecordModel = sqlalchemy_to_pydantic(
 )
 
 
+@dataclass(slots=True)
+class SensorRecordProjection:
+    """Projection of a sensor record with the fields of `SensorRecordModel`,
+    natively serialized by orjson"""
+    timestamp: datetime
+    ecosystem_uid: str
+    sensor_uid: str
+    measure: str
+    value: float
+
+    @classmethod
+    def from_entities(cls, entities: Iterable) -> list[Self]:
+        return [
+            cls(
+                entity.timestamp, entity.ecosystem_uid, entity.sensor_uid,
+                entity.measure, entity.value,
+            )
+            for entity in entities
+        ]
+
+
 class EcosystemSensorData(BaseModel):
     uid: str
     name: str
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 from typing_extensions import TypedDict
 
 from ouranos.core.validate.base import BaseModel
@@ -33,3 +33,58 @@ class CurrentSystemData(BaseModel):
 
 class HistoricSystemData(CurrentSystemData):
     span: tuple[datetime, datetime]
+    # Long or old time windows are served from the hourly roll-ups. The
+    #  values are then the hourly means
+    resolution: Literal["raw", "hourly"] = "raw"
+    minimums: Optional[list[
+        tuple[datetime, Optional[float], Optional[float], Optional[float],
+              Optional[float], Optional[float]]
+    ]] = None
+    maximums: Optional[list[
+        tuple[datetime, Optional[float], Optional[float], Optional[float],
+              Optional[float], Optional[float]]
+    ]] = None
+
+
+class CurrentProcessesData(BaseModel):
+    uid: str
+    timestamp: Optional[datetime]
+    values: list[
+        tuple[str, int, float, float, Optional[int], int]
+    ]
+    order: tuple[str, str, str, str, str, str] = (
+        "label", "pid", "CPU_used", "RAM_used", "FD_count", "thread_count",
+    )
+
+
+class HistoricProcessesData(BaseModel):
+    uid: str
+    span: tuple[datetime, datetime]
+    series: dict[
+        str,
+        list[tuple[datetime, float, float, Optional[int], int]]
+    ]
+    order: tuple[str, str, str, str, str] = (
+        "timestamp", "CPU_used", "RAM_used", "FD_count", "thread_count",
+    )
+
+
+class EventLoopLag(BaseModel):
+    name: str
+    pid: int
+    timestamp: datetime
+    samples: int
+    lag_p50: Optional[float]
+    lag_p95: Optional[float]
+    lag_p99: Optional[float]
+    lag_max: Optional[float]
+    slow_callbacks: int
+
+
+class ArchivingInfo(BaseModel):
+    table: str
+    cutoff: datetime
+    oldest_record: Optional[datetime]
+    lag: float
+    archived_until: Optional[datetime]
+    completed: Optional[bool]
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
+from datetime import datetime, timedelta, timezone
 import logging
 import types
 
+import pytest
+from sqlalchemy import select
+
+from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
+
 from ouranos.aggregator.archiver import Archiver
 from ouranos.core.database.models.abc import ArchivableMixin
+from ouranos.core.database.models.archives import (
+    ArchiveWatermark, SensorDataArchiveBlock, SensorDataRecordArchive)
+from ouranos.core.database.models import caches
+from ouranos.core.database.models.gaia import SensorDataRecord
+from ouranos.core.database.models.utils import TimeWindow
+
+from tests.class_fixtures import HardwareAware
+import tests.data.gaia as g_data
 
 
 class _FakeArchivable(ArchivableMixin):
@@ -78,3 +92,227 @@ def test_map_archives_warns_on_missing_archive_table(monkeypatch, caplog):
 
     assert "fake_archive" not in mapping
     assert "fake_archive" in caplog.text
+
+
+# ---------------------------------------------------------------------------
+#   _archive
+# ---------------------------------------------------------------------------
+archive_table = SensorDataRecordArchive.__tablename__
+
+
+async def _add_old_records(db: AsyncSQLAlchemyWrapper, number: int) -> list[datetime]:
+    old = (
+        datetime.now(timezone.utc)
+        - timedelta(days=SensorDataRecord.get_time_limit() + 1)
+    ).replace(microsecond=0)
+    timestamps = [old + timedelta(minutes=i) for i in range(number)]
+    async with db.scoped_session() as session:
+        await SensorDataRecord.create_multiple(session, [
+            {
+                "ecosystem_uid": g_data.ecosystem_uid,
+                "sensor_uid": g_data.hardware_uid,
+                "measure": "temperature",
+                "timestamp": timestamp,
+                "value": float(i),
+            }
+            for i, timestamp in enumerate(timestamps)
+        ])
+    return timestamps
+
+
+def _sensor_record(timestamp: datetime, value: float) -> dict:
+    return {
+        "ecosystem_uid": g_data.ecosystem_uid,
+        "sensor_uid": g_data.hardware_uid,
+        "measure": "temperature",
+        "timestamp": timestamp,
+        "value": value,
+    }
+
+
+async def _seed_federated(
+        db: AsyncSQLAlchemyWrapper,
+        *,
+        archived: list[dict],
+        recent: list[dict],
+        legacy: list[dict] | None = None,
+) -> None:
+    """Replace the sensor data, in the recent and archive tables, by the
+    records given and mark the archived ones as such"""
+    async with db.scoped_session() as session:
+        for Model in (
+                SensorDataRecord, SensorDataArchiveBlock, SensorDataRecordArchive,
+                ArchiveWatermark,
+        ):
+            await session.execute(Model.__table__.delete())
+        if legacy:
+            await SensorDataRecordArchive.create_multiple(session, legacy)
+        await SensorDataArchiveBlock.add_records(
+            session, [types.SimpleNamespace(**record) for record in archived])
+        await ArchiveWatermark.update_or_create(
+            session, table_name=archive_table,
+            values={
+                "cutoff": archived[-1]["timestamp"] + timedelta(seconds=1),
+                "last_timestamp": archived[-1]["timestamp"],
+                "last_id": 0,
+                "completed": True,
+            },
+        )
+        if recent:
+            await SensorDataRecord.create_multiple(session, recent)
+    caches.cache_archive_watermarks.clear()
+    caches.cache_archived_values.clear()
+    caches.cache_sensors_value.clear()
+
+
+async def _count(db: AsyncSQLAlchemyWrapper, Model) -> int:
+    async with db.scoped_session() as session:
+        result = await session.execute(select(Model.id))
+        return len(result.all())
+
+
+async def _archived_count(db: AsyncSQLAlchemyWrapper) -> int:
+    async with db.scoped_session() as session:
+        result = await session.execute(select(SensorDataArchiveBlock.count))
+        return sum(result.scalars().all())
+
+
+@pytest.mark.asyncio
+class TestArchive(HardwareAware):
+    async def test_archive_in_chunks(self, db: AsyncSQLAlchemyWrapper):
+        await _add_old_records(db, 5)
+        async with db.scoped_session() as session:
+            await SensorDataRecord.create_multiple(session, {
+                "ecosystem_uid": g_data.ecosystem_uid,
+                "sensor_uid": g_data.hardware_uid,
+                "measure": "temperature",
+                "timestamp": datetime.now(timezone.utc),
+                "value": 42.0,
+            })
+
+        archiver = Archiver()
+        archiver.chunk_size = 2
+        await archiver._archive(archive_table, SensorDataRecord, SensorDataRecordArchive)
+
+        assert await _count(db, SensorDataRecord) == 1
+        assert await _archived_count(db) == 5
+        # All the records were taken the same day, or two if around midnight
+        assert await _count(db, SensorDataArchiveBlock) in (1, 2)
+        async with db.scoped_session() as session:
+            watermark = await ArchiveWatermark.get(session, table_name=archive_table)
+        assert watermark.completed
+
+    async def test_archive_resume(self, db: AsyncSQLAlchemyWrapper):
+        async with db.scoped_session() as session:
+            await session.execute(SensorDataRecord.__table__.delete())
+            await session.execute(SensorDataArchiveBlock.__table__.delete())
+        timestamps = await _add_old_records(db, 4)
+        async with db.scoped_session() as session:
+            result = await session.execute(
+                select(SensorDataRecord).order_by(SensorDataRecord.timestamp.asc()))
+            records = result.scalars().all()
+            # Simulate a run interrupted after copying the first two rows but
+            #  before deleting them
+            await SensorDataArchiveBlock.add_records(session, records[:2])
+            await ArchiveWatermark.update_or_create(
+                session, table_name=archive_table,
+                values={
+                    "cutoff": timestamps[-1] + timedelta(seconds=1),
+                    "last_timestamp": records[1].timestamp,
+                    "last_id": records[1].id,
+                    "completed": False,
+                },
+            )
+
+        archiver = Archiver()
+        await archiver._archive(archive_table, SensorDataRecord, SensorDataRecordArchive)
+
+        assert await _count(db, SensorDataRecord) == 0
+        assert await _archived_count(db) == 4
+        async with db.scoped_session() as session:
+            watermark = await ArchiveWatermark.get(session, table_name=archive_table)
+        assert watermark.completed
+        assert watermark.last_timestamp == timestamps[-1]
+
+    async def test_archive_step(self, db: AsyncSQLAlchemyWrapper):
+        async with db.scoped_session() as session:
+            await session.execute(SensorDataRecord.__table__.delete())
+            await session.execute(SensorDataArchiveBlock.__table__.delete())
+        await _add_old_records(db, 3)
+
+        archiver = Archiver(ingest_backlog=lambda: 42)
+        # Ingestion is busy: nothing should be archived
+        await archiver.archive_step()
+        assert await _count(db, SensorDataRecord) == 3
+
+        archiver.ingest_backlog = lambda: 0
+        archiver.chunk_size = 2
+        await archiver.archive_step()
+        assert await _count(db, SensorDataRecord) == 0
+        assert await _archived_count(db) == 3
+        assert archiver.progress[archive_table]["lag"] == 0.0
+
+    async def test_federated_values(self, db: AsyncSQLAlchemyWrapper):
+        now = datetime.now(timezone.utc)
+        old = (
+            now - timedelta(days=SensorDataRecord.get_time_limit() + 1)
+        ).replace(microsecond=0)
+        await _seed_federated(
+            db,
+            # Older data is still in the legacy archive table
+            legacy=[_sensor_record(old - timedelta(hours=1), -1.0)],
+            archived=[
+                _sensor_record(old + timedelta(minutes=i), float(i))
+                for i in range(3)
+            ],
+            recent=[_sensor_record(now, 42.0)],
+        )
+
+        time_window = TimeWindow(
+            now - timedelta(days=SensorDataRecord.get_time_limit() + 2),
+            now + timedelta(minutes=1),
+        )
+        async with db.scoped_session() as session:
+            values = await SensorDataRecord.get_timed_values(
+                session, sensor_uid=g_data.hardware_uid, measure_name="temperature",
+                time_window=time_window)
+        assert [value[1] for value in values] == [-1.0, 0.0, 1.0, 2.0, 42.0]
+        timestamps = [value[0] for value in values]
+        assert timestamps == sorted(timestamps)
+
+    async def test_federated_values_overlap(self, db: AsyncSQLAlchemyWrapper):
+        now = datetime.now(timezone.utc)
+        old = (
+            now - timedelta(days=SensorDataRecord.get_time_limit() + 1)
+        ).replace(microsecond=0)
+        archived = [
+            _sensor_record(old + timedelta(minutes=i), value)
+            for i, value in enumerate((0.0, 21.12345, 2.0))
+        ]
+        await _seed_federated(
+            db,
+            archived=archived,
+            # The second row is being archived: it is in both tables
+            recent=[archived[1], _sensor_record(now, 42.0)],
+        )
+
+        time_window = TimeWindow(
+            now - timedelta(days=SensorDataRecord.get_time_limit() + 2),
+            now + timedelta(minutes=1),
+        )
+
+        async def get_values() -> list:
+            async with db.scoped_session() as session:
+                return await SensorDataRecord.get_timed_values(
+                    session, sensor_uid=g_data.hardware_uid,
+                    measure_name="temperature", time_window=time_window)
+
+        values = await get_values()
+        # Archived values are quantized, the copies are matched on timestamps
+        assert [value[0] for value in values] == [
+            *(record["timestamp"] for record in archived), now]
+        assert [value[1] for value in values] == pytest.approx(
+            [0.0, 21.12345, 2.0, 42.0], abs=0.0005)
+        caches.cache_sensors_value.clear()
+        # The archived days are now served from the cache
+        assert await get_values() == values
@@ -23,8 +23,9 @@ from ouranos.aggregator.events import GaiaEvents
 from ouranos.aggregator.sky_watcher import SkyWatcher
 from ouranos.core.database.models.gaia import (
     ActuatorRecord, ActuatorState, Chaos, CrudRequest, Ecosystem, Engine,
-    EnvironmentParameter, Hardware, NycthemeralCycle, Place, Plant, SensorAlarm,
-    SensorDataCache, SensorDataRecord, WeatherEvent)
+    EnvironmentParameter, Hardware, NycthemeralCycle, Place, Plant,
+    ResourceVersion, SensorActivity, SensorAlarm, SensorDataCache,
+    SensorDataRecord, WeatherEvent)
 from ouranos.core.exceptions import NotRegisteredError
 from ouranos.core.utils import create_time_window
 
@@ -632,6 +633,7 @@ class TestInitializationDataExchange(EcosystemAware):
         - Hardware details are correctly stored in the database
         - Hardware measures are properly associated
         - No events are emitted (as per design)
+        - The hardware version shared with the web workers is bumped
         - Invalid payloads raise appropriate exceptions
         """
         # Set up the session with init_data
@@ -669,9 +671,15 @@ class TestInitializationDataExchange(EcosystemAware):
                 == sorted(input_data.groups)
             )
             assert "__type__" not in input_data.groups
+            # The version shared with the web workers has been bumped
+            versions = await ResourceVersion.get_versions(session, ["hardware"])
+            assert versions["hardware"] != "0"
 
         # Test the behavior when receiving hardware data with existing uid
         await events_handler.on_hardware(g_data.engine_sid, [g_data.hardware_payload])
+        async with db.scoped_session() as session:
+            new_versions = await ResourceVersion.get_versions(session, ["hardware"])
+        assert new_versions["hardware"] != versions["hardware"]
 
         # Verify that the wrong payload raises an exception
         with pytest.raises(ValidationError):
@@ -952,9 +960,16 @@ class TestEcosystemBackground(HardwareAware):
             assert alarm_data.timestamp_from == g_data.sensors_data["timestamp"]
             assert alarm_data.timestamp_to == g_data.sensors_data["timestamp"]
 
+            activity = await SensorActivity.get(
+                session, sensor_uid=g_data.hardware_uid, measure=g_data.measure_name)
+            assert activity.first_seen == g_data.sensors_data["timestamp"]
+            assert activity.last_seen == g_data.sensors_data["timestamp"]
+            assert activity.count == 1
+
         async with db.scoped_session() as session:
             await SensorDataCache.clear(session)
             await session.execute(delete(SensorDataRecord))
+            await session.execute(delete(SensorActivity))
 
     async def test_on_health_data(
             self,
@@ -968,6 +983,7 @@ class TestEcosystemBackground(HardwareAware):
         - Health data is properly stored in the database
         - Sensor readings are correctly associated with ecosystems
         - Timestamps and values are preserved
+        - The records received twice are only accounted once in the activity
         - Invalid payloads raise appropriate exceptions
         """
         await events_handler.on_health_data(
@@ -983,6 +999,17 @@ class TestEcosystemBackground(HardwareAware):
             assert health_record.measure == input_data.measure
             assert health_record.timestamp == input_data.timestamp
             assert health_record.value == input_data.value
+            activity = await SensorActivity.get(
+                session, sensor_uid=input_data.sensor_uid, measure=input_data.measure)
+            count = activity.count
+
+        # Health data received twice is not accounted twice
+        await events_handler.on_health_data(
+            g_data.engine_sid, [g_data.health_data_payload])
+        async with db.scoped_session() as session:
+            activity = await SensorActivity.get(
+                session, sensor_uid=input_data.sensor_uid, measure=input_data.measure)
+            assert activity.count == count
 
         wrong_payload = {}
         with pytest.raises(ValidationError):
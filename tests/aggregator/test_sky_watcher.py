@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from aiohttp import web
+import pytest
+
+import gaia_validators as gv
+
+from ouranos.aggregator import sky_watcher as sky_watcher_module
+from ouranos.aggregator.sky_watcher import (
+    location_key, OpenWeatherMapClient, SkyWatcher, WeatherData)
+
+from tests.data.weather import owm_onecall_response
+
+
+coordinates = gv.Coordinates(latitude=42, longitude=0)
+
+
+class OpenWeatherMapStandIn:
+    """A local HTTP server replaying a recorded One Call API response
+
+    :param statuses: the status codes of the first responses, the recorded
+    response is sent once they are all used.
+    :param delay: the time, in seconds, taken to answer each request.
+    """
+    def __init__(self, statuses: list[int] | None = None, delay: float = 0.0) -> None:
+        self.statuses = [*(statuses or [])]
+        self.delay = delay
+        self.requests: list[web.Request] = []
+        self.peers: set[tuple] = set()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests.append(request)
+        self.peers.add(request.transport.get_extra_info("peername"))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self.statuses:
+            return web.json_response({"cod": 0}, status=self.statuses.pop(0))
+        return web.json_response(owm_onecall_response)
+
+    @asynccontextmanager
+    async def serve(self) -> AsyncIterator[str]:
+        app = web.Application()
+        app.router.add_get("/data/3.0/onecall", self.handle)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = runner.addresses[0][:2]
+        try:
+            yield f"http://{host}:{port}/data/3.0/onecall"
+        finally:
+            await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_get_weather_data():
+    stand_in = OpenWeatherMapStandIn()
+    async with stand_in.serve() as url:
+        client = OpenWeatherMapClient("key", url=url)
+        try:
+            weather_data = await client.get_weather_data(coordinates)
+            await client.get_weather_data(coordinates)
+        finally:
+            await client.close()
+
+    assert weather_data.current.temperature == 17.12
+    assert weather_data.current.summary == "scattered clouds"
+    assert weather_data.hourly[1].precipitation_probability == 0.32
+    assert weather_data.daily[0].temperature_min == 10.52
+    assert weather_data.daily[0].temperature_max == 19.87
+    assert stand_in.requests[0].query["appid"] == "key"
+    assert float(stand_in.requests[0].query["lat"]) == coordinates.latitude
+    # The connection is kept alive between the fetches
+    assert len(stand_in.requests) == 2
+    assert len(stand_in.peers) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_weather_data_retry():
+    stand_in = OpenWeatherMapStandIn(statuses=[503, 429])
+    async with stand_in.serve() as url:
+        client = OpenWeatherMapClient("key", url=url, backoff_base=0.01)
+        try:
+            weather_data = await client.get_weather_data(coordinates)
+        finally:
+            await client.close()
+
+    assert weather_data.current.temperature == 17.12
+    assert len(stand_in.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_get_weather_data_no_retry_on_client_error():
+    stand_in = OpenWeatherMapStandIn(statuses=[401])
+    async with stand_in.serve() as url:
+        client = OpenWeatherMapClient("wrong_key", url=url, backoff_base=0.01)
+        try:
+            with pytest.raises(ConnectionError):
+                await client.get_weather_data(coordinates)
+        finally:
+            await client.close()
+
+    assert len(stand_in.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_get_weather_data_time_budget():
+    stand_in = OpenWeatherMapStandIn(delay=0.5)
+    async with stand_in.serve() as url:
+        client = OpenWeatherMapClient(
+            "key", url=url, request_timeout=0.2, time_budget=0.3,
+            backoff_base=0.01)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        try:
+            with pytest.raises(ConnectionError):
+                await client.get_weather_data(coordinates)
+        finally:
+            await client.close()
+        # The second attempt is cut short by the budget
+        assert loop.time() - start < 0.45
+
+    assert len(stand_in.requests) == 2
+
+
+def test_location_key():
+    close_place = gv.Coordinates(latitude=42.001, longitude=0.002)
+    other_place = gv.Coordinates(latitude=42.5, longitude=0.0)
+    assert location_key(close_place) == location_key(coordinates)
+    assert location_key(other_place) != location_key(coordinates)
+
+
+@pytest.mark.asyncio
+async def test_fetch_weather_data_invalid(
+        sky_watcher: SkyWatcher,
+        monkeypatch: pytest.MonkeyPatch,
+):
+    get_weather_test_data = sky_watcher_module.get_weather_test_data
+
+    async def invalid_for_other_place(
+            place_coordinates: gv.Coordinates,
+            api_key: str,
+    ) -> WeatherData:
+        if location_key(place_coordinates) != location_key(coordinates):
+            return WeatherData.model_validate({"current": {}})
+        return await get_weather_test_data(place_coordinates, api_key)
+
+    monkeypatch.setattr(
+        sky_watcher_module, "get_weather_test_data", invalid_for_other_place)
+    other_place = gv.Coordinates(latitude=42.5, longitude=0.0)
+    # A malformed response only affects its own location
+    results = await asyncio.gather(
+        sky_watcher._fetch_weather_data(coordinates),
+        sky_watcher._fetch_weather_data(other_place),
+    )
+    assert isinstance(results[0], WeatherData)
+    assert results[1] is None
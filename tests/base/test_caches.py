@@ -0,0 +1,116 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from ouranos.core.caches import aioCache
+
+
+@pytest.mark.asyncio
+async def test_get_many_set_many(tmp_path: Path):
+    cache = aioCache(tmp_path / "cache.sqlite")
+    try:
+        await cache.set_many({"a": 1, "b": [1, 2]})
+        assert await cache.get_many(["a", "b", "c"]) == {"a": 1, "b": [1, 2]}
+        assert await cache.get("c", None) is None
+        with pytest.raises(KeyError):
+            await cache.get("c")
+        assert sorted([key async for key in cache.keys()]) == ["a", "b"]
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_ttl(tmp_path: Path):
+    cache = aioCache(tmp_path / "cache.sqlite", default_ttl=0.1)
+    try:
+        await cache.set("short", 1)
+        await cache.set("long", 2, ttl=60)
+        assert await cache.get("short") == 1
+        await asyncio.sleep(0.15)
+        assert await cache.get_many(["short", "long"]) == {"long": 2}
+        assert [key async for key in cache.keys()] == ["long"]
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_local_layer(tmp_path: Path):
+    # Two caches on the same file behave like two processes
+    writer = aioCache(tmp_path / "cache.sqlite")
+    reader = aioCache(tmp_path / "cache.sqlite")
+    try:
+        await writer.set("key", "old")
+        assert await reader.get("key") == "old"
+
+        executed = []
+        execute = reader._connection.execute
+
+        async def counting_execute(*args, **kwargs):
+            executed.append(args[0])
+            return await execute(*args, **kwargs)
+
+        reader._connection.execute = counting_execute
+        for _ in range(10):
+            assert await reader.get("key") == "old"
+        assert executed == []
+
+        # The writes of the other process are seen
+        await writer.set("key", "new")
+        assert await reader.get("key") == "new"
+        # The writes of the same process do not drop the local values
+        await reader.set("other", 1)
+        executed.clear()
+        assert await reader.get_many(["key", "other"]) == {"key": "new", "other": 1}
+        assert not [query for query in executed if "SELECT" in query]
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_write_during_read(tmp_path: Path):
+    cache = aioCache(tmp_path / "cache.sqlite")
+    try:
+        await cache.set("key", "old")
+        cache._local.clear()
+
+        execute = cache._connection.execute
+
+        async def racing_execute(query, *args, **kwargs):
+            cursor = await execute(query, *args, **kwargs)
+            if query.startswith("SELECT key, value"):
+                fetchall = cursor.fetchall
+
+                async def racing_fetchall():
+                    rows = await fetchall()
+                    # A write lands once the read got its rows
+                    await cache.set("key", "new")
+                    return rows
+
+                cursor.fetchall = racing_fetchall
+            return cursor
+
+        cache._connection.execute = racing_execute
+        assert await cache.get("key") == "old"
+        cache._connection.execute = execute
+        # The stale value read did not replace the one written
+        assert await cache.get("key") == "new"
+    finally:
+        await cache.close()
+
+
+@pytest.mark.asyncio
+async def test_delete_missing_key(tmp_path: Path):
+    cache = aioCache(tmp_path / "cache.sqlite")
+    other = aioCache(tmp_path / "cache.sqlite")
+    try:
+        with pytest.raises(KeyError):
+            await cache.delete("missing")
+        assert not cache._connection.in_transaction
+        # The file is not left locked for the other processes
+        await other.set("key", "value")
+        assert await cache.get("key") == "value"
+    finally:
+        await cache.close()
+        await other.close()
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from ouranos.core.database.compression import (
+    decode_timed_values, encode_timed_values)
+
+
+start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+timestamps = [start + timedelta(minutes=10 * i, seconds=i % 3) for i in range(144)]
+values = [21.5 + (i % 12) * 0.25 - (i % 5) * 0.013 for i in range(144)]
+
+
+def test_round_trip():
+    encoded = encode_timed_values(timestamps, values, resolution=0.001)
+    assert encoded.start == start
+    assert encoded.count == len(timestamps)
+
+    decoded = decode_timed_values(
+        encoded.start, encoded.resolution, encoded.timestamps, encoded.values)
+    assert [value[0] for value in decoded] == timestamps
+    assert [value[1] for value in decoded] == pytest.approx(values, abs=0.0005)
+
+
+def test_compression_ratio():
+    encoded = encode_timed_values(timestamps, values)
+    # A row-based storage uses at least 16 bytes per record for the timestamp
+    #  and the value only
+    assert len(encoded.timestamps) + len(encoded.values) < len(values) * 16 / 4
+
+
+def test_encode_failures():
+    with pytest.raises(ValueError):
+        encode_timed_values([], [])
+    with pytest.raises(ValueError):
+        encode_timed_values(timestamps, values[:-1])
+    with pytest.raises(ValueError):
+        encode_timed_values(timestamps[::-1], values)
+
+
+def test_round_trip_non_finite():
+    for invalid in (float("nan"), float("inf"), float("-inf")):
+        with pytest.raises(ValueError):
+            encode_timed_values(timestamps, [*values[:-1], invalid])
+
+    # Negative and large values are kept
+    extremes = [-40.0, 0.0, 1e6, -1e6, 0.001] * 4
+    encoded = encode_timed_values(timestamps[:len(extremes)], extremes)
+    decoded = decode_timed_values(
+        encoded.start, encoded.resolution, encoded.timestamps, encoded.values)
+    assert [value[1] for value in decoded] == pytest.approx(extremes, abs=0.0005)
@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+import pytest
+
+from ouranos.core.loop_monitor import LoopLagMonitor
+
+
+async def blocking_job() -> None:
+    await asyncio.sleep(0.02)
+    time.sleep(0.15)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor():
+    original_run = asyncio.Handle._run
+    reports = []
+
+    async def report(data: dict) -> None:
+        reports.append(data)
+
+    monitor = LoopLagMonitor(
+        "test", report, interval=0.01, slow_callback_duration=0.1,
+        report_period=0.05)
+    monitor.start()
+    try:
+        await asyncio.sleep(0.05)
+        await asyncio.create_task(blocking_job(), name="blocking_job")
+        await asyncio.sleep(0.1)
+    finally:
+        await monitor.stop()
+
+    result = monitor.get_report()
+    assert result["name"] == "test"
+    assert result["samples"] > 0
+    assert result["lag_max"] >= 0.1
+    assert result["lag_p50"] < 0.1
+    # The blocking task was caught by the slow callback hook
+    assert result["slow_callbacks"] == 1
+    assert reports
+    # The hook is removed with the last monitor
+    assert asyncio.Handle._run is original_run
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_monitor_no_slow_callback_hook():
+    original_run = asyncio.Handle._run
+    monitor = LoopLagMonitor(
+        "test", interval=0.01, slow_callback_duration=0, report_period=1)
+    monitor.start()
+    try:
+        assert asyncio.Handle._run is original_run
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+    assert monitor.get_report()["slow_callbacks"] == 0
@@ -1,5 +1,5 @@
 import pytest
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from unittest.mock import patch
 from typing import Optional
 
@@ -11,7 +11,7 @@ from sqlalchemy.sql import desc, func
 
 from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 
-from ouranos.core.database.models.abc import Base, CRUDMixin
+from ouranos.core.database.models.abc import Base, CacheMixin, CRUDMixin
 from ouranos.core.database.models.caching import CachedCRUDMixin, create_hashable_key
 from ouranos.core.database.models.types import UtcDateTime
 
@@ -50,6 +50,18 @@ class ModelCached(ModelSingleKey, CachedCRUDMixin):
     _cache = TTLCache(maxsize=2, ttl=60)
 
 
+class ModelShortLived(Base, CacheMixin):
+    __tablename__ = "test_short_lived"
+    _lookup_keys = ["name"]
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    name: Mapped[str] = mapped_column(unique=True)
+
+    @classmethod
+    def get_ttl(cls) -> int:
+        return 60
+
+
 @pytest.mark.asyncio
 class TestCRUDMixinSingleKey:
     async def test_create_and_get(self, db: AsyncSQLAlchemyWrapper):
@@ -366,3 +378,28 @@ class TestCachedCRUDMixin:
             # Verify that delete resets the cache
             await ModelCached.delete(session, name="Eve")
             assert len(ModelCached._cache) == 0
+
+
+@pytest.mark.asyncio
+class TestCacheMixin:
+    async def test_sweep_expired(self, db: AsyncSQLAlchemyWrapper):
+        now = datetime.now(timezone.utc)
+        async with db.scoped_session() as session:
+            await ModelShortLived.insert_data(
+                session,
+                [
+                    {"name": "fresh", "timestamp": now},
+                    {"name": "expired", "timestamp": now - timedelta(seconds=120)},
+                ],
+            )
+
+            # Expired rows are filtered out on read but not removed
+            recent = await ModelShortLived.get_recent(session)
+            assert [obj.name for obj in recent] == ["fresh"]
+            assert len(await ModelShortLived.get_multiple(session)) == 2
+
+        # The sweeper removes them
+        assert await ModelShortLived.sweep_expired() == 1
+        async with db.scoped_session() as session:
+            remaining = await ModelShortLived.get_multiple(session)
+            assert [obj.name for obj in remaining] == ["fresh"]
@@ -1,8 +1,15 @@
+import asyncio
+from datetime import datetime, timezone
+import time
+
 import pytest
 
 from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 
-from ouranos.core.database.models.app import User
+from ouranos.core.database.models.app import (
+    argon2_hasher, PasswordHashingPool, User)
+from ouranos.core.database.touch import TouchBuffer
+from ouranos.core.exceptions import PasswordHashingBusyError
 
 
 @pytest.mark.asyncio
@@ -37,3 +44,95 @@ class TestUser:
 
             user = await User.get(session, 42)
             assert user is None
+
+    async def test_touch_buffer(self, db: AsyncSQLAlchemyWrapper):
+        async with db.scoped_session() as session:
+            await User.create(
+                session,
+                values={
+                    "username": "touchedUser",
+                    "email": "touchedUser@fakemail.com",
+                    "password": "Password1!",
+                }
+            )
+            user = await User.get_by(session, username="touchedUser")
+
+        buffer = TouchBuffer(User, "last_seen")
+        try:
+            latest = datetime(2030, 1, 2, tzinfo=timezone.utc)
+            buffer.touch(user.id, datetime(2030, 1, 1, tzinfo=timezone.utc))
+            buffer.touch(user.id, latest)
+            # Older touches received late are ignored
+            buffer.touch(user.id, datetime(2029, 1, 1, tzinfo=timezone.utc))
+            assert buffer.pending == 1
+
+            assert await buffer.flush() == 1
+            assert buffer.pending == 0
+            assert await buffer.flush() == 0
+
+            async with db.scoped_session() as session:
+                user = await User.get(session, user.id)
+            assert user.last_seen == latest
+        finally:
+            TouchBuffer._buffers.remove(buffer)
+
+
+@pytest.mark.asyncio
+class TestPasswordHashing:
+    async def test_check_password(self, db: AsyncSQLAlchemyWrapper):
+        async with db.scoped_session() as session:
+            await User.create(
+                session,
+                values={
+                    "username": "hashedUser",
+                    "email": "hashedUser@fakemail.com",
+                    "password": "Password1!",
+                }
+            )
+            user = await User.get_by(session, username="hashedUser")
+            assert await user.check_password("Password1!")
+            assert not await user.check_password("WrongPassword1!")
+
+    async def test_event_loop_responsive(self):
+        pool = PasswordHashingPool(workers=2)
+        password_hash = argon2_hasher.hash("Password1!")
+        start = time.perf_counter()
+        argon2_hasher.verify(password_hash, "Password1!")
+        verification_time = time.perf_counter() - start
+        max_lag = 0.0
+        stop = asyncio.Event()
+
+        async def ticker():
+            nonlocal max_lag
+            interval = 0.005
+            while not stop.is_set():
+                start = time.perf_counter()
+                await asyncio.sleep(interval)
+                max_lag = max(max_lag, time.perf_counter() - start - interval)
+
+        ticker_task = asyncio.create_task(ticker())
+        try:
+            # A burst of logins
+            results = await asyncio.gather(*[
+                pool.verify(password_hash, "Password1!") for _ in range(16)
+            ])
+        finally:
+            stop.set()
+            await ticker_task
+            pool.shutdown()
+        assert all(results)
+        # Verifying in the event loop would block it for 16 verifications
+        assert max_lag < verification_time / 2
+
+    async def test_queue_timeout(self):
+        pool = PasswordHashingPool(workers=1, queue_timeout=0.001)
+        try:
+            results = await asyncio.gather(
+                *[pool.hash("Password1!") for _ in range(4)],
+                return_exceptions=True,
+            )
+        finally:
+            pool.shutdown()
+        rejected = [r for r in results if isinstance(r, PasswordHashingBusyError)]
+        assert rejected
+        assert len(rejected) < len(results)
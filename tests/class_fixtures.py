@@ -11,15 +11,17 @@ from ouranos.core.database.models.app import (
     WikiTopic)
 from ouranos.core.database.models.gaia import (
     ActuatorRecord, ActuatorState, Ecosystem, Engine, EnvironmentParameter,
-    GaiaWarning, Hardware, NycthemeralCycle, Plant, SensorDataCache,
-    SensorDataRecord, WeatherEvent)
+    GaiaWarning, Hardware, NycthemeralCycle, Plant, SensorActivity,
+    SensorDataCache, SensorDataRecord, WeatherEvent)
 from ouranos.core.database.models.system import (
-    System, SystemDataCache, SystemDataRecord)
+    System, SystemDataRecord, SystemProcessRecord)
+from ouranos.web_server.system_data import SystemDataBuffers
 
 import tests.data.app as a_data
 from tests.data.auth import admin, operator, user
 import tests.data.gaia as g_data
-from tests.data.system import system_dict, system_data_dict
+from tests.data.system import (
+    event_loop_report, system_dict, system_data_dict, system_processes_list)
 
 
 class EngineAware:
@@ -103,6 +105,7 @@ class SensorsAware(HardwareAware):
             adapted_sensor_record["timestamp"] = (
                     g_data.sensors_data["timestamp"] - timedelta(hours=1))
             await SensorDataRecord.create_multiple(session, adapted_sensor_record)
+            await SensorActivity.record_activity(session, [adapted_sensor_record])
 
 
 class ActuatorsAware(HardwareAware):
@@ -143,11 +146,24 @@ class SystemAware:
             await System.create(session, uid=uid, values=system)
 
             adapted_system_record = system_data_dict.copy()
-            await SystemDataCache.insert_data(session, adapted_system_record)
+            SystemDataBuffers.append({
+                "uid": uid,
+                **adapted_system_record,
+                "processes": system_processes_list,
+            })
+            SystemDataBuffers.set_event_loop_report(event_loop_report)
 
             adapted_system_record["timestamp"] = (
                     system_data_dict["timestamp"] - timedelta(hours=1))
             await SystemDataRecord.create_multiple(session, adapted_system_record)
+            await SystemProcessRecord.create_multiple(session, [
+                {
+                    "system_uid": uid,
+                    "timestamp": adapted_system_record["timestamp"],
+                    **process,
+                }
+                for process in system_processes_list
+            ])
 
 
 class UsersAware:
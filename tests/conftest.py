@@ -23,6 +23,8 @@ def config(tmp_path_factory):
     }
     Config.SENSOR_LOGGING_PERIOD = 1
     Config.SYSTEM_LOGGING_PERIOD = 1
+    # Cached responses would outlive the databases dropped between test classes
+    Config.RESPONSE_CACHE_URL = None
 
     Config.FRONTEND_URL = "http://127.0.0.1:42424"
     Config.MAIL_SERVER = "127.0.0.1"
@@ -56,3 +58,7 @@ async def db(config: ConfigDict):
     for key, value in caches.__dict__.items():
         if key.startswith("cache_"):
             value.clear()
+    from ouranos.web_server.auth import VerifiedSessionCache
+    VerifiedSessionCache.clear()
+    from ouranos.web_server.system_data import SystemDataBuffers
+    SystemDataBuffers.clear()
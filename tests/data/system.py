@@ -21,3 +21,37 @@ system_data_dict = {
     "RAM_process": 0.15,
     "DISK_used": 1.25,
 }
+
+
+system_processes_list = [
+    {
+        "label": "main",
+        "pid": 4242,
+        "CPU_used": 2.5,
+        "RAM_used": 0.125,
+        "FD_count": 32,
+        "thread_count": 8,
+    },
+    {
+        "label": "web_worker-1",
+        "pid": 4243,
+        "CPU_used": 1.5,
+        "RAM_used": 0.0625,
+        "FD_count": None,
+        "thread_count": 4,
+    },
+]
+
+
+event_loop_report = {
+    "uid": system_dict["uid"],
+    "name": "aggregator",
+    "pid": 4244,
+    "timestamp": datetime.now(timezone.utc),
+    "samples": 600,
+    "lag_p50": 0.0005,
+    "lag_p95": 0.002,
+    "lag_p99": 0.01,
+    "lag_max": 0.25,
+    "slow_callbacks": 1,
+}
@@ -0,0 +1,114 @@
+# Response of the OpenWeatherMap One Call API 3.0, recorded with
+#  `exclude=minutely` and `units=metric`, and trimmed to two hours and two days
+owm_onecall_response = {
+    "lat": 42.0,
+    "lon": 0.0,
+    "timezone": "Europe/Madrid",
+    "timezone_offset": 7200,
+    "current": {
+        "dt": 1760781600,
+        "sunrise": 1760767320,
+        "sunset": 1760807158,
+        "temp": 17.12,
+        "feels_like": 16.55,
+        "pressure": 1018,
+        "humidity": 68,
+        "dew_point": 11.16,
+        "uvi": 2.31,
+        "clouds": 40,
+        "visibility": 10000,
+        "wind_speed": 2.57,
+        "wind_deg": 250,
+        "weather": [
+            {"id": 802, "main": "Clouds", "description": "scattered clouds", "icon": "03d"},
+        ],
+    },
+    "hourly": [
+        {
+            "dt": 1760781600,
+            "temp": 17.12,
+            "feels_like": 16.55,
+            "pressure": 1018,
+            "humidity": 68,
+            "dew_point": 11.16,
+            "uvi": 2.31,
+            "clouds": 40,
+            "visibility": 10000,
+            "wind_speed": 2.57,
+            "wind_deg": 250,
+            "wind_gust": 3.9,
+            "weather": [
+                {"id": 802, "main": "Clouds", "description": "scattered clouds", "icon": "03d"},
+            ],
+            "pop": 0,
+        },
+        {
+            "dt": 1760785200,
+            "temp": 18.4,
+            "feels_like": 17.86,
+            "pressure": 1018,
+            "humidity": 63,
+            "dew_point": 11.23,
+            "uvi": 3.05,
+            "clouds": 75,
+            "visibility": 10000,
+            "wind_speed": 3.1,
+            "wind_deg": 255,
+            "wind_gust": 4.62,
+            "weather": [
+                {"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"},
+            ],
+            "pop": 0.32,
+            "rain": {"1h": 0.21},
+        },
+    ],
+    "daily": [
+        {
+            "dt": 1760785200,
+            "sunrise": 1760767320,
+            "sunset": 1760807158,
+            "moonrise": 1760760480,
+            "moonset": 1760803020,
+            "moon_phase": 0.89,
+            "summary": "Expect a day of partly cloudy with rain",
+            "temp": {"day": 18.4, "min": 10.52, "max": 19.87, "night": 12.76, "eve": 16.02, "morn": 10.81},
+            "feels_like": {"day": 17.86, "night": 12.31, "eve": 15.6, "morn": 10.2},
+            "pressure": 1018,
+            "humidity": 63,
+            "dew_point": 11.23,
+            "wind_speed": 3.64,
+            "wind_deg": 251,
+            "wind_gust": 6.02,
+            "weather": [
+                {"id": 500, "main": "Rain", "description": "light rain", "icon": "10d"},
+            ],
+            "clouds": 75,
+            "pop": 0.32,
+            "rain": 0.21,
+            "uvi": 3.4,
+        },
+        {
+            "dt": 1760871600,
+            "sunrise": 1760853789,
+            "sunset": 1760893467,
+            "moonrise": 1760850120,
+            "moonset": 1760890980,
+            "moon_phase": 0.93,
+            "summary": "There will be clear sky today",
+            "temp": {"day": 20.03, "min": 9.87, "max": 21.45, "night": 13.9, "eve": 17.33, "morn": 10.11},
+            "feels_like": {"day": 19.52, "night": 13.4, "eve": 16.9, "morn": 9.6},
+            "pressure": 1021,
+            "humidity": 55,
+            "dew_point": 10.62,
+            "wind_speed": 2.88,
+            "wind_deg": 270,
+            "wind_gust": 4.4,
+            "weather": [
+                {"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"},
+            ],
+            "clouds": 3,
+            "pop": 0,
+            "uvi": 3.9,
+        },
+    ],
+}
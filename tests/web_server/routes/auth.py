@@ -1,4 +1,5 @@
 from datetime import datetime, timezone
+from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 from httpx import BasicAuth
@@ -8,11 +9,16 @@ from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 
 from ouranos import json
 from ouranos.core.config.consts import TOKEN_SUBS
-from ouranos.core.database.models.app import anonymous_user, User
+from ouranos.core.database.models import caches
+from ouranos.core.database.models.app import (
+    anonymous_user, password_hashing_pool, User, user_last_seen)
+from ouranos.core.exceptions import PasswordHashingBusyError
 from ouranos.core.utils import Tokenizer
+from ouranos.web_server.auth import broadcast_user_update, VerifiedSessionCache
 
 from tests.data.auth import admin, operator
 from tests.class_fixtures import UsersAware
+from tests.utils import MockAsyncDispatcher
 
 
 registration_payload = {
@@ -92,10 +98,47 @@ class TestCurrentUser(UsersAware):
 
         response = client_admin.put("/api/auth/current_user")
         assert response.status_code == 200
+        await user_last_seen.flush()
 
         async with db.scoped_session() as session:
             user = await User.get_by(session, username=admin.username)
         assert user.last_seen > old_last_seen
+        # The cached user is updated in place rather than evicted
+        assert caches.cache_users[admin.id].last_seen == user.last_seen
+
+
+@pytest.mark.asyncio
+class TestVerifiedSession(UsersAware):
+    async def test_verified_session_cached(self, client_admin: TestClient):
+        token = client_admin.cookies["session"]
+        user_agent = client_admin.headers["user-agent"]
+        response = client_admin.get("/api/auth/current_user")
+        assert response.status_code == 200
+
+        session_info = VerifiedSessionCache.get_session_info(token, user_agent)
+        assert session_info.user_id == admin.id
+        assert caches.cache_users[admin.id].username == admin.username
+
+        # Served from the cache
+        response = client_admin.get("/api/auth/current_user")
+        assert response.status_code == 200
+        assert json.loads(response.text)["username"] == admin.username
+
+    async def test_user_update_broadcast(
+            self,
+            client_admin: TestClient,
+            mock_dispatcher: MockAsyncDispatcher,
+    ):
+        response = client_admin.get("/api/auth/current_user")
+        assert response.status_code == 200
+        assert admin.id in caches.cache_users
+
+        await broadcast_user_update(admin.id)
+
+        assert admin.id not in caches.cache_users
+        emitted = mock_dispatcher.emit_store[-1]
+        assert emitted["event"] == "user_updated"
+        assert emitted["data"] == {"user_id": admin.id}
 
 
 class TestRefreshSession(UsersAware):
@@ -253,7 +296,12 @@ class TestUserResetPassword(UsersAware):
         assert response.status_code == 400
         assert "Wrong password format" in response.text
 
-    async def test_user_reset_password_token_success(self, db: AsyncSQLAlchemyWrapper, client: TestClient):
+    async def test_user_reset_password_token_success(
+            self,
+            db: AsyncSQLAlchemyWrapper,
+            client: TestClient,
+            mock_dispatcher: MockAsyncDispatcher,
+    ):
         # User need to be confirmed to update his password
         async with db.scoped_session() as session:
             await User.update(session, user_id=operator.id, values={"confirmed_at": datetime.now()})
@@ -275,6 +323,27 @@ class TestUserResetPassword(UsersAware):
         async with db.scoped_session() as session:
             user = await User.get_by(session, username=operator.username)
         assert user.password_hash != old_hash
+        # The other workers drop their snapshot of the user
+        emitted = mock_dispatcher.emit_store[-1]
+        assert emitted["event"] == "user_updated"
+        assert emitted["data"] == {"user_id": operator.id}
+
+    async def test_user_reset_password_hashing_busy(self, db: AsyncSQLAlchemyWrapper, client: TestClient):
+        async with db.scoped_session() as session:
+            await User.update(session, user_id=operator.id, values={"confirmed_at": datetime.now()})
+            user = await User.get_by(session, username=operator.username)
+
+        token = await user.create_password_reset_token()
+        busy = PasswordHashingBusyError("Too many password hashing operations are pending")
+        with patch.object(password_hashing_pool, "hash", side_effect=busy):
+            response = client.post(
+                "/api/auth/reset_password",
+                params={"token": token},
+                json={"password": "New_val1d_password!"},
+            )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
 
 
 class TestRegistrationToken(UsersAware):
@@ -660,6 +660,16 @@ class TestWeatherEventUnique(ClimateAware, UsersAware):
 #   Ecosystem actuators state
 # ------------------------------------------------------------------------------
 class TestEcosystemActuator(ActuatorsAware, UsersAware):
+    def test_management_functionalities(self, client: TestClient):
+        response = client.get("/api/gaia/ecosystem/management")
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert len(data) == 1
+        assert data[0]["uid"] == g_data.ecosystem_uid
+        assert data[0]["actuators"] == g_data.actuator_record.active
+        assert not data[0]["recent_picture"]
+
     def _assert_actuator_state(self, actuators_state: list[dict]):
         assert len(actuators_state) == 1
         state = actuators_state[0]
@@ -708,6 +718,24 @@ class TestEcosystemActuator(ActuatorsAware, UsersAware):
         assert inner_data[3] == g_data.actuator_record.status
         assert inner_data[4] == g_data.actuator_record.level
 
+    def test_export_records(self, client_user: TestClient):
+        response = client_user.get(
+            "/api/gaia/ecosystem/actuator/data/export",
+            params={"actuator_types": [g_data.actuator_record.type.name]},
+        )
+        assert response.status_code == 200
+
+        lines = response.text.splitlines()
+        assert len(lines) == 1
+        record = json.loads(lines[0])
+        assert datetime.fromisoformat(record["timestamp"]) == g_data.actuator_record.timestamp
+        assert record["ecosystem_uid"] == g_data.ecosystem_uid
+        assert record["type"] == g_data.actuator_record.type.name
+        assert record["active"] == g_data.actuator_record.active
+        assert record["mode"] == g_data.actuator_record.mode.name
+        assert record["status"] == g_data.actuator_record.status
+        assert record["level"] == g_data.actuator_record.level
+
     def test_turn_actuator_failure_not_operator(self, client_user: TestClient):
         response = client_user.put(
             f"/api/gaia/ecosystem/u/{g_data.ecosystem_uid}/turn_actuator/u/heater"
@@ -1,4 +1,6 @@
 from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+import gzip
 
 from fastapi.testclient import TestClient
 import pytest
@@ -6,11 +8,11 @@ import pytest
 from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 
 from ouranos import json
-from ouranos.core.database.models.gaia import Ecosystem
+from ouranos.core.database.models.gaia import Ecosystem, ResourceVersion
 from ouranos.core.utils import create_time_window
 
 import tests.data.gaia as g_data
-from tests.class_fixtures import HardwareAware, SensorsAware
+from tests.class_fixtures import HardwareAware, SensorsAware, UsersAware
 
 
 class TestMeasuresAvailable(HardwareAware):
@@ -69,6 +71,28 @@ class TestSensorsSkeleton(HardwareAware):
         response = client.get("/api/gaia/ecosystem/u/wrong_uid/sensor/skeleton")
         assert response.status_code == 404
 
+    async def test_get_conditional(
+            self,
+            client: TestClient,
+            db: AsyncSQLAlchemyWrapper,
+    ):
+        url = f"/api/gaia/ecosystem/u/{g_data.ecosystem_uid}/sensor/skeleton"
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.content
+
+        # A new hardware config invalidates the skeleton
+        async with db.scoped_session() as session:
+            await ResourceVersion.bump(session, "hardware")
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != etag
+
 
 class TestSensorsCurrentData(SensorsAware):
     def test_get(self, client: TestClient):
@@ -158,6 +182,28 @@ class TestSensorData(SensorsAware):
                (g_data.sensors_data["timestamp"] - timedelta(hours=1))
         assert historic_value[1] == g_data.sensor_record.value
 
+    def test_get_historic_conditional(self, client: TestClient):
+        url = (
+            f"/api/gaia/ecosystem/u/{g_data.ecosystem_uid}"
+            f"/sensor/u/{g_data.hardware_uid}/data/{g_data.sensor_record.measure}"
+            f"/historic"
+        )
+        response = client.get(url)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+        last_modified = response.headers["Last-Modified"]
+        assert parsedate_to_datetime(last_modified) == \
+               (g_data.sensors_data["timestamp"] - timedelta(hours=1)).replace(microsecond=0)
+
+        response = client.get(url, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+
+        response = client.get(url, headers={"If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+        response = client.get(url, headers={"If-None-Match": 'W/"outdated"'})
+        assert response.status_code == 200
+
     def test_get_historic_failure_wrong_sensor(self, client: TestClient):
         response = client.get(
             f"/api/gaia/ecosystem/u/{g_data.ecosystem_uid}/sensor/u/wrong_uid"
@@ -169,3 +215,67 @@ class TestSensorData(SensorsAware):
             f"/api/gaia/ecosystem/u/{g_data.ecosystem_uid}"
             f"/sensor/u/{g_data.hardware_uid}/data/humidity/historic")
         assert response.status_code == 400
+
+
+class TestSensorsDataExport(SensorsAware, UsersAware):
+    def _assert_record(self, record: dict) -> None:
+        assert datetime.fromisoformat(record["timestamp"]) == \
+               (g_data.sensors_data["timestamp"] - timedelta(hours=1))
+        assert record["ecosystem_uid"] == g_data.ecosystem_uid
+        assert record["sensor_uid"] == g_data.sensor_record.sensor_uid
+        assert record["measure"] == g_data.sensor_record.measure
+        assert record["value"] == g_data.sensor_record.value
+
+    def test_export_ndjson(self, client_user: TestClient):
+        response = client_user.get("/api/gaia/ecosystem/sensor/data/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        lines = response.text.splitlines()
+        assert len(lines) == 1
+        self._assert_record(json.loads(lines[0]))
+
+    def test_export_csv(self, client_user: TestClient):
+        response = client_user.get(
+            "/api/gaia/ecosystem/sensor/data/export",
+            params={"format": "csv"},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+
+        header, *rows = response.text.splitlines()
+        assert header == "timestamp,ecosystem_uid,sensor_uid,measure,value"
+        assert len(rows) == 1
+        self._assert_record(dict(zip(header.split(","), rows[0].split(","))) | {
+            "value": float(rows[0].split(",")[-1])})
+
+    def test_export_gzip(self, client_user: TestClient):
+        response = client_user.get(
+            "/api/gaia/ecosystem/sensor/data/export",
+            params={"gzip": True},
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+
+        lines = gzip.decompress(response.content).splitlines()
+        assert len(lines) == 1
+        self._assert_record(json.loads(lines[0]))
+
+    def test_export_filtered_out(self, client_user: TestClient):
+        response = client_user.get(
+            "/api/gaia/ecosystem/sensor/data/export",
+            params={"measures": ["humidity"]},
+        )
+        assert response.status_code == 200
+        assert response.text == ""
+
+    def test_export_failure_not_logged(self, client: TestClient):
+        response = client.get("/api/gaia/ecosystem/sensor/data/export")
+        assert response.status_code == 403
+
+    def test_export_failure_wrong_ecosystem(self, client_user: TestClient):
+        response = client_user.get(
+            "/api/gaia/ecosystem/sensor/data/export",
+            params={"ecosystems_id": ["wrong_uid"]},
+        )
+        assert response.status_code == 404
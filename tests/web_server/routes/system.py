@@ -1,4 +1,4 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 
 from fastapi.testclient import TestClient
 
@@ -13,6 +13,12 @@ system_uid = g_data.system_dict["uid"]
 data_order = [
     "timestamp", "CPU_used", "CPU_temp", "RAM_process", "RAM_used", "DISK_used"
 ]
+processes_data_order = [
+    "label", "pid", "CPU_used", "RAM_used", "FD_count", "thread_count"
+]
+processes_historic_order = [
+    "timestamp", "CPU_used", "RAM_used", "FD_count", "thread_count"
+]
 
 
 class TestSystems(SystemAware, UsersAware):
@@ -37,6 +43,18 @@ class TestSystems(SystemAware, UsersAware):
         assert system["RAM_total"] == g_data.system_dict["RAM_total"]
         assert system["DISK_total"] == g_data.system_dict["DISK_total"]
 
+    def test_get_archiving(self, client_admin: TestClient):
+        response = client_admin.get("/api/system/archiving")
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        tables = {progress["table"] for progress in data}
+        assert tables == {"actuator_records_archive", "sensor_records_archive"}
+        for progress in data:
+            # Nothing old enough to be archived
+            assert progress["lag"] == 0.0
+            assert progress["completed"] is None
+
 
 class TestSystemUnique(SystemAware, UsersAware):
     def test_get_failure_anon(self, client: TestClient):
@@ -86,6 +104,7 @@ class TestSystemUnique(SystemAware, UsersAware):
 
         data = json.loads(response.text)
         assert data["order"] == data_order
+        assert data["resolution"] == "raw"
         value = data["values"][0]
         assert datetime.fromisoformat(value[0]) == (
                 g_data.system_data_dict["timestamp"] - timedelta(hours=1))
@@ -95,6 +114,78 @@ class TestSystemUnique(SystemAware, UsersAware):
         assert value[4] == g_data.system_data_dict["RAM_used"]
         assert value[5] == g_data.system_data_dict["DISK_used"]
 
+    def test_get_historic_data_hourly(self, client_admin: TestClient):
+        start_time = datetime.now(timezone.utc) - timedelta(days=30)
+        response = client_admin.get(
+            f"/api/system/{system_uid}/data/historic",
+            params={"start_time": start_time.isoformat()},
+        )
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert data["resolution"] == "hourly"
+        # The hour not rolled up yet is aggregated from the raw data
+        record_time = g_data.system_data_dict["timestamp"] - timedelta(hours=1)
+        value = data["values"][0]
+        assert datetime.fromisoformat(value[0]) == \
+               record_time.replace(minute=0, second=0, microsecond=0)
+        assert value[1] == g_data.system_data_dict["CPU_used"]
+        assert value[5] == g_data.system_data_dict["DISK_used"]
+        assert data["minimums"][0] == data["maximums"][0] == value
+
     def test_get_historic_data_failure_wrong_uid(self, client_admin: TestClient):
         response = client_admin.get("/api/system/wrong_uid/data/historic")
         assert response.status_code == 404
+
+    def test_get_current_processes_data(self, client_admin: TestClient):
+        response = client_admin.get(
+            f"/api/system/{system_uid}/data/processes/current")
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert data["order"] == processes_data_order
+        assert datetime.fromisoformat(data["timestamp"]) == \
+               g_data.system_data_dict["timestamp"]
+        assert len(data["values"]) == len(g_data.system_processes_list)
+        for value, process in zip(data["values"], g_data.system_processes_list):
+            assert value == [process[key] for key in processes_data_order]
+
+    def test_get_current_processes_data_failure_wrong_uid(
+            self,
+            client_admin: TestClient,
+    ):
+        response = client_admin.get("/api/system/wrong_uid/data/processes/current")
+        assert response.status_code == 404
+
+    def test_get_historic_processes_data(self, client_admin: TestClient):
+        response = client_admin.get(
+            f"/api/system/{system_uid}/data/processes/historic")
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert data["order"] == processes_historic_order
+        assert data["series"].keys() == {
+            process["label"] for process in g_data.system_processes_list}
+        for process in g_data.system_processes_list:
+            series = data["series"][process["label"]]
+            assert len(series) == 1
+            assert datetime.fromisoformat(series[0][0]) == (
+                    g_data.system_data_dict["timestamp"] - timedelta(hours=1))
+            assert series[0][1:] == [
+                process[key] for key in processes_historic_order[1:]]
+
+    def test_get_event_loops_lag(self, client_admin: TestClient):
+        response = client_admin.get(f"/api/system/{system_uid}/data/event_loops")
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert len(data) == 1
+        report = data[0]
+        assert datetime.fromisoformat(report["timestamp"]) == \
+               g_data.event_loop_report["timestamp"]
+        for key in ("name", "pid", "samples", "lag_p50", "lag_p99", "slow_callbacks"):
+            assert report[key] == g_data.event_loop_report[key]
+
+    def test_get_event_loops_lag_failure_wrong_uid(self, client_admin: TestClient):
+        response = client_admin.get("/api/system/wrong_uid/data/event_loops")
+        assert response.status_code == 404
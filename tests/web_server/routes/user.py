@@ -1,4 +1,5 @@
 from datetime import datetime
+from unittest.mock import patch
 
 from fastapi.testclient import TestClient
 import pytest
@@ -7,9 +8,11 @@ from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 
 from ouranos import json
 from ouranos.core.database.models.app import User
+from ouranos.core.exceptions import PasswordHashingBusyError
 
 from tests.data.auth import operator
 from tests.class_fixtures import UsersAware
+from tests.utils import MockAsyncDispatcher
 
 
 @pytest.mark.asyncio
@@ -98,6 +101,7 @@ class TestUser(UsersAware):
             self,
             client_admin: TestClient,
             db: AsyncSQLAlchemyWrapper,
+            mock_dispatcher: MockAsyncDispatcher,
     ):
         username = "Who"
         firstname = "Bob"
@@ -113,6 +117,21 @@ class TestUser(UsersAware):
             user = await User.get_by(session, username=username)
             assert user.firstname == firstname
 
+        # The other web workers are asked to drop their snapshot of the user
+        dispatched = mock_dispatcher.emit_store[0]
+        assert dispatched["event"] == "user_updated"
+        assert dispatched["data"] == {"user_id": user.id}
+
+    def test_update_user_failure_hashing_busy(self, client_user: TestClient):
+        busy = PasswordHashingBusyError("Too many password hashing operations are pending")
+        with patch.object(User, "update", side_effect=busy):
+            response = client_user.put(
+                "/api/user/u/Who",
+                json={"firstname": "Alice"},
+            )
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
     def test_update_user_failure_other_admin(self, client_admin: TestClient):
         # The Ouranos system administrator has a permission level equal to the
         # admin's own, so it cannot be updated
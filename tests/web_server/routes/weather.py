@@ -7,13 +7,17 @@ import gaia_validators as gv
 from gaia_validators.utils import get_sun_times
 
 from ouranos import json
-from ouranos.aggregator.sky_watcher import get_weather_test_data
-from ouranos.core.caches import CacheFactory
+from ouranos.aggregator.sky_watcher import (
+    get_weather_test_data, location_key, make_weather_snapshots)
+from ouranos.core.caches import CacheFactory, make_snapshot
 
 from tests.class_fixtures import ServicesEnabled
 
 
 coordinates = gv.Coordinates(latitude=42, longitude=0)
+place_coordinates = gv.Coordinates(latitude=45, longitude=5)
+engine_uid = "engine_uid"
+place_name = "greenhouse"
 
 
 class TestWeatherEmpty(ServicesEnabled):
@@ -48,13 +52,16 @@ class TestWeatherFilled(ServicesEnabled):
         await cache.clear()
 
         weather_data = (await get_weather_test_data(coordinates, "key")).model_dump()
-        await cache.set("weather_currently", weather_data["current"])
-        await cache.set("weather_hourly", weather_data["hourly"])
-        await cache.set("weather_daily", weather_data["daily"])
+        location = location_key(place_coordinates)
+        await cache.set_many({
+            **make_weather_snapshots(weather_data),
+            **make_weather_snapshots(weather_data, location),
+            "places_locations": {f"{engine_uid}/{place_name}": location},
+        })
 
         days = [date.today() + timedelta(days=i) for i in range(7)]
         sun_times = [get_sun_times(coordinates, day).model_dump() for day in days]
-        await cache.set("sun_times", sun_times)
+        await cache.set("snapshot_sun_times", make_snapshot(sun_times))
 
         yield
 
@@ -122,3 +129,43 @@ class TestWeatherFilled(ServicesEnabled):
         assert len(data) == 1
         assert data[0]["temperature_min"] == 21.0
         assert data[0]["temperature_max"] == 42.0
+
+    def test_get_forecast_not_modified(self, client: TestClient):
+        response = client.get("/api/app/services/weather/forecast/hourly")
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = client.get(
+            "/api/app/services/weather/forecast/hourly",
+            headers={"If-None-Match": etag},
+        )
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+
+    def test_get_forecast_brotli(self, client: TestClient):
+        response = client.get(
+            "/api/app/services/weather/forecast",
+            headers={"Accept-Encoding": "br"},
+        )
+        assert response.status_code == 200
+        # The precompressed variant is served
+        assert response.headers["Content-Encoding"] == "br"
+        data = json.loads(response.text)
+        assert data["currently"]["temperature"] == 25.0
+
+    def test_get_forecast_place(self, client: TestClient):
+        response = client.get(
+            "/api/app/services/weather/forecast/currently",
+            params={"engine_uid": engine_uid, "place": place_name},
+        )
+        assert response.status_code == 200
+
+        data = json.loads(response.text)
+        assert data["temperature"] == 25.0
+
+    def test_get_forecast_place_failure_unknown(self, client: TestClient):
+        response = client.get(
+            "/api/app/services/weather/forecast/currently",
+            params={"engine_uid": engine_uid, "place": "unknown"},
+        )
+        assert response.status_code == 404
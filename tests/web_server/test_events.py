@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 from collections import defaultdict, deque
 from datetime import datetime, timezone
 from typing import Any
@@ -11,13 +12,19 @@ from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
 import gaia_validators as gv
 from socketio.exceptions import ConnectionRefusedError
 
-from ouranos import current_app
-from ouranos.core.database.models.app import User, anonymous_user
+from ouranos import current_app, json
+from ouranos.core.database.models.app import (
+    User, anonymous_user, user_last_seen)
 from ouranos.core.exceptions import NotAuthorized
+from ouranos.core.utils import msgpack
 from ouranos.web_server.auth import SessionInfo
-from ouranos.web_server.events import ADMIN_ROOM, ClientEvents
+from ouranos.web_server.events import (
+    ADMIN_ROOM, ClientEvents, DispatcherEvents, ecosystem_room)
+from ouranos.web_server.events.encoding import (
+    BROADCAST_ROOM, emit_encoded, encoded_room, Encoding, parse_contract)
 
-from tests.class_fixtures import EcosystemAware, UsersAware
+from tests.class_fixtures import (
+    ActuatorsAware, EcosystemAware, SensorsAware, UsersAware)
 from tests.data.auth import admin, operator, user
 from tests.data import gaia as g_data
 from tests.utils import MockAsyncDispatcher
@@ -56,6 +63,11 @@ class MockSioServer:
     async def leave_room(self, sid, room, namespace=None):
         self.rooms[sid].discard(room)
 
+    def get_participants(self, namespace, room):
+        for sid, rooms in self.rooms.items():
+            if room in rooms:
+                yield sid, sid
+
     async def get_session(self, sid, namespace=None):
         return self._sessions.get(sid, {})
 
@@ -302,6 +314,7 @@ class TestClientAuthEvents(UsersAware):
         # A 'user_heartbeat_ack' event should be sent ...
         assert len(mock_server.emit_store) == 1
         # ... But the user's last_seen field shouldn't be updated
+        await user_last_seen.flush()
         async with db.scoped_session() as session:
             db_user = await User.get(session, user_id=user.id)
         assert db_user is not None
@@ -316,6 +329,12 @@ class TestClientAuthEvents(UsersAware):
         assert emitted["to"] == SID
         assert emitted["namespace"] == "/"
 
+        # Heartbeats are buffered and written in bulk
+        async with db.scoped_session() as session:
+            refreshed = await User.get(session, user_id=user.id)
+        assert refreshed.last_seen == old
+        assert await user_last_seen.flush() == 1
+
         async with db.scoped_session() as session:
             refreshed = await User.get(session, user_id=user.id)
         assert refreshed.last_seen > old
@@ -375,6 +394,35 @@ class TestClientRoomEvents:
         assert emitted["event"] == "join_room_ack"
         assert emitted["data"]["result"] == gv.Result.failure
 
+    async def test_on_join_encoded_admin_room_is_rejected(
+            self,
+            client_events: ClientEvents,
+            mock_server: MockSioServer,
+    ):
+        """Test that the administrator room cannot be joined through its
+        encoded name.
+
+        Verifies that:
+        - The client is NOT added to the encoded administrator room
+        - A failure acknowledgment is emitted
+        - The client receives none of the administrator events
+        """
+        await client_events.on_connect(SID, {})
+        room = encoded_room(ADMIN_ROOM, Encoding.msgpack)
+        await client_events.on_join_room(SID, room)
+
+        assert room not in mock_server.rooms[SID]
+        emitted = mock_server.emit_store[-1]
+        assert emitted["event"] == "join_room_ack"
+        assert emitted["data"]["result"] == gv.Result.failure
+
+        mock_server.emit_store.clear()
+        await emit_encoded(
+            mock_server, "current_server_data", {"CPU_used": 4.2}, room=ADMIN_ROOM)
+        assert mock_server.emit_store
+        for emitted in mock_server.emit_store:
+            assert emitted["room"] not in mock_server.rooms[SID]
+
     async def test_on_leave_room(
             self,
             client_events: ClientEvents,
@@ -506,3 +554,205 @@ class TestClientEcosystemCommands(EcosystemAware, UsersAware):
         assert emitted["data"]["status"] is True
         assert emitted["namespace"] == "aggregator-internal"
         assert emitted["room"] == g_data.engine_sid
+
+
+@pytest.mark.asyncio
+class TestClientEcosystemRoom(SensorsAware, ActuatorsAware):
+    async def test_on_join_ecosystem_room(
+            self,
+            client_events: ClientEvents,
+            mock_server: MockSioServer,
+    ):
+        """Test joining an ecosystem room without requesting a snapshot.
+
+        Verifies that:
+        - The client is added to the ecosystem room
+        - Only the acknowledgment is emitted
+        """
+        room = ecosystem_room(g_data.ecosystem_uid)
+        await client_events.on_join_room(SID, room)
+
+        assert room in mock_server.rooms[SID]
+        assert len(mock_server.emit_store) == 1
+        assert mock_server.emit_store[0]["event"] == "join_room_ack"
+
+    async def test_on_join_ecosystem_room_snapshot(
+            self,
+            client_events: ClientEvents,
+            mock_server: MockSioServer,
+    ):
+        """Test joining an ecosystem room with a snapshot of its current state.
+
+        Verifies that:
+        - The current sensors data and actuators state are sent to the sid
+        """
+        room = ecosystem_room(g_data.ecosystem_uid)
+        await client_events.on_join_room(SID, room, True)
+
+        emitted = {emit["event"]: emit for emit in mock_server.emit_store}
+        sensors_data = emitted["current_sensors_data"]
+        assert sensors_data["room"] == SID
+        assert sensors_data["data"][0]["ecosystem_uid"] == g_data.ecosystem_uid
+        assert sensors_data["data"][0]["sensor_uid"] == g_data.sensor_record.sensor_uid
+        assert sensors_data["data"][0]["value"] == g_data.sensor_record.value
+        actuators_data = emitted["actuators_data"]
+        assert actuators_data["room"] == SID
+        assert actuators_data["data"][0]["type"] == g_data.actuator_record.type.name
+
+
+@pytest.mark.asyncio
+class TestDispatcherEvents:
+    async def test_emit_per_ecosystem(self, mock_server: MockSioServer):
+        """Test that the data received from the aggregator is split per
+        ecosystem room.
+
+        Verifies that:
+        - Each ecosystem room only receives the data of its ecosystem
+        """
+        dispatcher_events = DispatcherEvents(mock_server, coalescing_window=0)  # noqa
+        data = [
+            {"ecosystem_uid": "ecosystem_1", "sensor_uid": "sensor_1", "value": 1.0},
+            {"ecosystem_uid": "ecosystem_2", "sensor_uid": "sensor_2", "value": 2.0},
+            {"ecosystem_uid": "ecosystem_1", "sensor_uid": "sensor_3", "value": 3.0},
+        ]
+        await dispatcher_events.on_current_sensors_data("sid", data)
+
+        emitted = {
+            emit["room"]: emit for emit in mock_server.emit_store
+            if not isinstance(emit["data"], bytes)  # MessagePack clients rooms
+        }
+        assert len(emitted) == 2
+        ecosystem_1 = emitted[ecosystem_room("ecosystem_1")]
+        assert ecosystem_1["event"] == "current_sensors_data"
+        assert [
+            record["sensor_uid"] for record in ecosystem_1["data"]
+        ] == ["sensor_1", "sensor_3"]
+        ecosystem_2 = emitted[ecosystem_room("ecosystem_2")]
+        assert [
+            record["sensor_uid"] for record in ecosystem_2["data"]
+        ] == ["sensor_2"]
+
+        mock_server.emit_store.clear()
+        await dispatcher_events.on_ecosystem_status("sid", [
+            {"uid": "ecosystem_1", "status": True},
+            {"uid": "ecosystem_2", "status": False},
+        ])
+        emitted = {emit["room"]: emit for emit in mock_server.emit_store}
+        assert emitted[ecosystem_room("ecosystem_2")]["data"] == [
+            {"uid": "ecosystem_2", "status": False}]
+
+    async def test_coalesce_live_updates(self, mock_server: MockSioServer):
+        """Test that the live updates are coalesced during the window.
+
+        Verifies that:
+        - Nothing is emitted before the window closes
+        - A single message per room is emitted, keeping the latest value of
+          each sensor measure
+        """
+        dispatcher_events = DispatcherEvents(mock_server, coalescing_window=0.05)  # noqa
+        for value in (1.0, 2.0, 3.0):
+            await dispatcher_events.on_current_sensors_data("sid", [
+                {"ecosystem_uid": "ecosystem_1", "sensor_uid": "sensor_1",
+                 "measure": "temperature", "value": value},
+                {"ecosystem_uid": "ecosystem_1", "sensor_uid": "sensor_1",
+                 "measure": "humidity", "value": value * 10},
+            ])
+        assert len(mock_server.emit_store) == 0
+
+        await asyncio.sleep(0.1)
+        json_emits = [
+            emit for emit in mock_server.emit_store
+            if not isinstance(emit["data"], bytes)
+        ]
+        assert len(json_emits) == 1
+        emitted = json_emits[0]
+        assert emitted["event"] == "current_sensors_data"
+        assert emitted["room"] == ecosystem_room("ecosystem_1")
+        assert {
+            record["measure"]: record["value"] for record in emitted["data"]
+        } == {"temperature": 3.0, "humidity": 30.0}
+
+        # Pending updates can be flushed without waiting for the window
+        await dispatcher_events.on_ecosystems_heartbeat(
+            "sid", {"engine_uid": "engine_1", "ecosystems": []})
+        await dispatcher_events.coalescer.flush()
+        emitted = [
+            emit for emit in mock_server.emit_store
+            if emit["room"] == BROADCAST_ROOM
+        ][-1]
+        assert emitted["event"] == "ecosystems_heartbeat"
+        assert emitted["data"] == [{"engine_uid": "engine_1", "ecosystems": []}]
+
+
+class TestSocketIOEncoding:
+    def test_parse_contract(self):
+        """Test the parsing of the contract sent by the clients.
+
+        Verifies that:
+        - A bare version number selects JSON
+        - MessagePack is only granted when it is available
+        - Unknown encodings are rejected
+        """
+        assert parse_contract(2) == (2, Encoding.json)
+        assert parse_contract("2") == (2, Encoding.json)
+        expected = Encoding.msgpack if msgpack.available else Encoding.json
+        assert parse_contract("2+msgpack") == (2, expected)
+        with pytest.raises(ValueError):
+            parse_contract("2+xml")
+
+    def test_encoded_room(self):
+        assert encoded_room("some_room", Encoding.json) == "some_room"
+        assert encoded_room("some_room", Encoding.msgpack) == "some_room#msgpack"
+        assert encoded_room(None, Encoding.json) == BROADCAST_ROOM
+
+    @pytest.mark.skipif(not msgpack.available, reason="msgpack is not installed")
+    def test_msgpack_round_trip(self):
+        """Test that datetimes are packed as timestamps and unpacked as aware
+        UTC datetimes."""
+        now = datetime.now(timezone.utc)
+        data = [{"timestamp": now, "naive": now.replace(tzinfo=None), "value": 4.2}]
+        packed = msgpack.dumps(data)
+        assert len(packed) < len(json.dumps(data))
+        assert msgpack.loads(packed) == [{"timestamp": now, "naive": now, "value": 4.2}]
+
+
+@pytest.mark.asyncio
+@pytest.mark.skipif(not msgpack.available, reason="msgpack is not installed")
+class TestClientMsgpack:
+    async def test_on_connect_msgpack(
+            self,
+            client_events: ClientEvents,
+            mock_server: MockSioServer,
+    ):
+        """Test a client negotiating MessagePack while connecting.
+
+        Verifies that:
+        - The client enters the MessagePack rooms instead of the JSON ones
+        - The data events are sent to it MessagePack-encoded
+        """
+        own_contract = current_app.config["SOCKETIO_CONTRACT"]
+        result = await client_events.on_connect(
+            SID, {}, auth={"socketio_contract": f"{own_contract}+msgpack"})
+        assert result is True
+        assert encoded_room(None, Encoding.msgpack) in mock_server.rooms[SID]
+        assert BROADCAST_ROOM not in mock_server.rooms[SID]
+
+        await client_events.on_join_room(SID, ecosystem_room("ecosystem_1"))
+        assert f"{ecosystem_room('ecosystem_1')}#msgpack" in mock_server.rooms[SID]
+
+        dispatcher_events = DispatcherEvents(mock_server, coalescing_window=0)  # noqa
+        await dispatcher_events.on_sun_times("sid", {"sunrise": "06:00"})
+        emitted = {emit["room"]: emit for emit in mock_server.emit_store}
+        packed = emitted[encoded_room(None, Encoding.msgpack)]["data"]
+        assert msgpack.loads(packed) == {"sunrise": "06:00"}
+
+    async def test_msgpack_only_packed_for_members(
+            self,
+            client_events: ClientEvents,
+            mock_server: MockSioServer,
+    ):
+        """Test that the data is only MessagePack-encoded when a client of the
+        room uses it"""
+        await client_events.on_connect(SID, {})
+        await emit_encoded(mock_server, "pictures_update", {"data": "x"})
+        assert [emit["room"] for emit in mock_server.emit_store] == [BROADCAST_ROOM]
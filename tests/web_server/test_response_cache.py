@@ -0,0 +1,117 @@
+import aiosqlite
+import brotli
+import pytest
+from starlette.requests import Request
+
+from ouranos.web_server.response_cache import (
+    CachedBody, CachedResponse, SQLiteResponseCacheBackend)
+
+
+def make_request(query_string: bytes = b"", accept_encoding: bytes = b"br") -> Request:
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": "/api/gaia/ecosystem/sensor/skeleton",
+        "query_string": query_string,
+        "headers": [(b"accept-encoding", accept_encoding)],
+    })
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend(tmp_path):
+    backend = SQLiteResponseCacheBackend(tmp_path / "responses.sqlite")
+    try:
+        assert await backend.get("key") is None
+
+        await backend.set("key", CachedBody(b"body", None), 60)
+        await backend.set("other", CachedBody(b"other", b"br"), 60)
+        assert await backend.get("key") == CachedBody(b"body", None)
+        assert await backend.get("other") == CachedBody(b"other", b"br")
+
+        # Expired responses are not served
+        await backend.set("expired", CachedBody(b"body", None), 0)
+        assert await backend.get("expired") is None
+    finally:
+        await backend.close()
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_shared(tmp_path):
+    # Two workers opening the same file
+    writer = SQLiteResponseCacheBackend(tmp_path / "responses.sqlite")
+    reader = SQLiteResponseCacheBackend(tmp_path / "responses.sqlite")
+    try:
+        await writer.set("key", CachedBody(b"body", None), 60)
+        assert await reader.get("key") == CachedBody(b"body", None)
+        await reader.set("key", CachedBody(b"new", None), 60)
+        assert await writer.get("key") == CachedBody(b"new", None)
+    finally:
+        await writer.close()
+        await reader.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_response(tmp_path):
+    backend = SQLiteResponseCacheBackend(tmp_path / "responses.sqlite")
+    body = b'{"data": "' + b"x" * 1000 + b'"}'
+    try:
+        cache = CachedResponse(make_request(b"level=plants"), backend, 60)
+        assert await cache.get("start", "end") is None
+        response = await cache.set(body, "start", "end", headers={"ETag": 'W/"etag"'})
+        assert response.headers["content-encoding"] == "br"
+        assert brotli.decompress(response.body) == body
+
+        # The key depends on the query and on the key parts
+        cached = await cache.get("start", "end")
+        assert cached is not None
+        assert cached.headers["vary"] == "Accept-Encoding"
+        assert brotli.decompress(cached.body) == body
+        assert await cache.get("start", "later") is None
+        other_query = CachedResponse(make_request(b"level=ecosystem"), backend, 60)
+        assert await other_query.get("start", "end") is None
+
+        # Clients not supporting brotli get the raw body
+        raw = CachedResponse(make_request(b"level=plants", b"gzip"), backend, 60)
+        cached = await raw.get("start", "end")
+        assert "content-encoding" not in cached.headers
+        assert cached.body == body
+    finally:
+        await backend.close()
+
+
+class FailingBackend(SQLiteResponseCacheBackend):
+    """A backend whose store is unavailable, like a locked file"""
+    def __init__(self) -> None:
+        super().__init__("unused.sqlite")
+
+    async def get(self, key):
+        raise RuntimeError("database is locked")
+
+    async def set(self, key, value, ttl):
+        raise RuntimeError("database is locked")
+
+
+@pytest.mark.asyncio
+async def test_cached_response_backend_error():
+    cache = CachedResponse(make_request(), FailingBackend(), 60)
+    # A failing backend is treated as a cache miss ...
+    assert await cache.get("start", "end") is None
+    # ... and the computed response is still served
+    response = await cache.set(b'{"data": 1}', "start", "end")
+    assert response.body == b'{"data": 1}'
+
+
+@pytest.mark.asyncio
+async def test_sqlite_backend_old_schema(tmp_path):
+    # Files created by older versions have a `tags` column
+    async with aiosqlite.connect(tmp_path / "responses.sqlite") as connection:
+        await connection.execute(
+            "CREATE TABLE responses (key TEXT PRIMARY KEY, body BLOB NOT NULL, "
+            "br_body BLOB, expires REAL NOT NULL, tags TEXT NOT NULL)")
+        await connection.commit()
+    backend = SQLiteResponseCacheBackend(tmp_path / "responses.sqlite")
+    try:
+        await backend.set("key", CachedBody(b"body", None), 60)
+        assert await backend.get("key") == CachedBody(b"body", None)
+    finally:
+        await backend.close()
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta, timezone
+
+import gaia_validators as gv
+
+from ouranos import json
+from ouranos.core.utils import rows_to_tuples
+from ouranos.web_server.responses import prevalidated_response
+from ouranos.web_server.validate.gaia.ecosystem import EcosystemActuatorRecords
+from ouranos.web_server.validate.gaia.sensor import (
+    EcosystemSensorData, SensorMeasureHistoricTimedValue, SensorRecordProjection)
+
+
+now = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+class Record:
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def test_prevalidated_timed_values():
+    content = {
+        "uid": "sensor_uid",
+        "measure": "temperature",
+        "unit": "°C",
+        "span": (now - timedelta(hours=1), now),
+        "values": [(now - timedelta(minutes=i), 20.0 + i / 10) for i in range(10)],
+    }
+    expected = SensorMeasureHistoricTimedValue.model_validate(content).model_dump(mode="json")
+
+    response = prevalidated_response(
+        SensorMeasureHistoricTimedValue, {**content})
+    assert json.loads(response.body) == expected
+
+
+def test_prevalidated_enums():
+    content = {
+        "uid": "ecosystem_uid",
+        "name": "ecosystem",
+        "actuator_type": gv.HardwareType.light,
+        "span": (now - timedelta(hours=1), now),
+        "values": [(now, True, gv.ActuatorMode.automatic, False, None)],
+    }
+    expected = EcosystemActuatorRecords.model_validate(content).model_dump(mode="json")
+
+    content["actuator_type"] = content["actuator_type"].name
+    content["values"] = rows_to_tuples(content["values"])
+    response = prevalidated_response(EcosystemActuatorRecords, content)
+    assert json.loads(response.body) == expected
+
+
+def test_projection():
+    record = Record(
+        timestamp=now, ecosystem_uid="ecosystem_uid", sensor_uid="sensor_uid",
+        measure="temperature", value=21.5)
+    content = {"uid": "ecosystem_uid", "name": "ecosystem", "values": [record]}
+    expected = EcosystemSensorData.model_validate(
+        content, from_attributes=True).model_dump(mode="json")
+
+    content["values"] = SensorRecordProjection.from_entities(content["values"])
+    response = prevalidated_response(EcosystemSensorData, content)
+    assert json.loads(response.body) == expected
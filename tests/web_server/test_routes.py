@@ -1,7 +1,8 @@
 from .routes.app import TestApp
 from .routes.auth import (
     TestCurrentUser, TestLogin, TestRefreshSession, TestRegister,
-    TestRegistrationToken, TestUserConfirmation, TestUserResetPassword)
+    TestRegistrationToken, TestUserConfirmation, TestUserResetPassword,
+    TestVerifiedSession)
 from .routes.calendar import (
     TestCalendar, TestEventCreation, TestEventDeletion, TestEventUpdate)
 from .routes.ecosystem import (
@@ -17,7 +18,7 @@ from .routes.protected import (
     TestInactiveUserProtection, TestOperatorProtection)
 from .routes.sensor import (
     TestMeasuresAvailable, TestSensorData, TestSensorsCurrentData,
-    TestSensorsSkeleton)
+    TestSensorsDataExport, TestSensorsSkeleton)
 from .routes.services import TestServices, TestServiceUpdate
 from .routes.system import TestSystems, TestSystemUnique
 from .routes.user import TestUser
@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+from ouranos.web_server.system_data import SystemDataBuffers, SystemDataRingBuffer
+
+from tests.data.system import system_data_dict
+
+
+def make_sample(seconds_ago: float, cpu_used: float) -> dict:
+    return {
+        **system_data_dict,
+        "timestamp": datetime.now(timezone.utc) - timedelta(seconds=seconds_ago),
+        "CPU_used": cpu_used,
+        "CPU_temp": None,
+    }
+
+
+def test_ring_buffer():
+    buffer = SystemDataRingBuffer(capacity=4)
+    assert buffer.get_recent(90) == []
+
+    for i in range(6):
+        buffer.append(make_sample(50 - 10 * i, i))
+    # Only the latest samples are kept, oldest first
+    assert len(buffer) == buffer.capacity
+    recent = buffer.get_recent(90)
+    assert [value[1] for value in recent] == [2.0, 3.0, 4.0, 5.0]
+    # Missing values are returned as None
+    assert all(value[2] is None for value in recent)
+    assert recent[0][3] == system_data_dict["RAM_process"]
+
+    # Too old samples are not returned
+    assert [value[1] for value in buffer.get_recent(25)] == [3.0, 4.0, 5.0]
+
+
+def test_ring_buffer_timestamps():
+    buffer = SystemDataRingBuffer(capacity=2)
+    timestamp = datetime.now(timezone.utc)
+    # Timestamps can be received serialized
+    buffer.append({**system_data_dict, "timestamp": timestamp.isoformat()})
+    assert buffer.get_recent(90)[0][0] == timestamp
+
+
+def test_buffers():
+    uid = system_data_dict["system_uid"]
+    try:
+        assert SystemDataBuffers.get_recent(uid) == []
+        SystemDataBuffers.append({"uid": uid, **make_sample(0, 0.5)})
+        assert len(SystemDataBuffers.get_recent(uid)) == 1
+        assert SystemDataBuffers.get_recent("other_uid") == []
+    finally:
+        SystemDataBuffers.clear()
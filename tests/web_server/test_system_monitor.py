@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+import subprocess
+import sys
+
+import psutil
+import pytest
+from sqlalchemy import func, select
+
+from sqlalchemy_wrapper import AsyncSQLAlchemyWrapper
+
+from ouranos.core.database.models.system import (
+    floor_hour, SystemDataHourly, SystemDataRecord, SystemProcessRecord)
+from ouranos.core.config.consts import ROOT_PID_ENV_VAR
+from ouranos.core.database.models.utils import TimeWindow
+from ouranos.web_server.system_monitor import _find_root_process, ProcessTree
+
+from tests.class_fixtures import SystemAware
+import tests.data.system as g_data
+
+
+def test_process_tree():
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        process_tree = ProcessTree(root=psutil.Process())
+        samples = {
+            sample["pid"]: sample
+            for sample in process_tree.sample({child.pid: "Aggregator-0"})
+        }
+        assert samples[psutil.Process().pid]["label"] == "main"
+        # Processes spawned with multiprocessing are labelled with their name
+        child_sample = samples[child.pid]
+        assert child_sample["label"] == "Aggregator-0"
+        assert child_sample["RAM_used"] > 0
+        assert child_sample["thread_count"] >= 1
+
+        # Default multiprocessing names are the ones of uvicorn workers
+        samples = process_tree.sample({child.pid: "SpawnProcess-3"})
+        labels = {sample["pid"]: sample["label"] for sample in samples}
+        assert labels[child.pid] == "web_worker-3"
+    finally:
+        child.kill()
+        child.wait()
+
+
+def test_find_root_process(monkeypatch: pytest.MonkeyPatch):
+    process = psutil.Process()
+    # Without a recorded root, the tree starts at the current process even
+    #  if its parents run the same executable
+    monkeypatch.delenv(ROOT_PID_ENV_VAR, raising=False)
+    assert _find_root_process(process) == process
+
+    parent = process.parent()
+    monkeypatch.setenv(ROOT_PID_ENV_VAR, str(parent.pid))
+    assert _find_root_process(process) == parent
+
+    # A pid that is not an ancestor is ignored
+    child = subprocess.Popen(
+        [sys.executable, "-c", "import time; time.sleep(5)"])
+    try:
+        monkeypatch.setenv(ROOT_PID_ENV_VAR, str(child.pid))
+        assert _find_root_process(process) == process
+    finally:
+        child.kill()
+        child.wait()
+
+
+@pytest.mark.asyncio
+class TestSystemDataRollUp(SystemAware):
+    async def test_roll_up(self, db: AsyncSQLAlchemyWrapper):
+        start = floor_hour(datetime.now(timezone.utc)) - timedelta(days=3)
+        async with db.scoped_session() as session:
+            await SystemDataRecord.create_multiple(session, [
+                {
+                    **g_data.system_data_dict,
+                    "timestamp": start + timedelta(minutes=minutes),
+                    "CPU_used": CPU_used,
+                }
+                for minutes, CPU_used in ((0, 10.0), (10, 20.0), (20, 30.0), (65, 40.0))
+            ])
+
+        async with db.scoped_session() as session:
+            assert await SystemDataHourly.roll_up(session) == 2
+            # The hours without data, up to the one of the fixture record,
+            #  are skipped
+            assert await SystemDataHourly.roll_up(session) == 1
+            assert await SystemDataHourly.roll_up(session) == 0
+
+            result = await session.execute(
+                select(SystemDataHourly).order_by(SystemDataHourly.timestamp))
+            hours = result.scalars().all()
+            assert hours[0].timestamp == start
+            assert hours[0].samples == 3
+            assert hours[0].CPU_used_min == 10.0
+            assert hours[0].CPU_used_mean == 20.0
+            assert hours[0].CPU_used_max == 30.0
+            assert hours[1].samples == 1
+            assert hours[1].CPU_used_mean == 40.0
+
+            # The hour including the window start is returned
+            rows = await SystemDataHourly.get_timed_values(
+                session, system_uid=g_data.system_dict["uid"],
+                time_window=TimeWindow(
+                    start + timedelta(minutes=30), start + timedelta(hours=2)))
+            assert [row[0] for row in rows] == [start, start + timedelta(hours=1)]
+
+            await SystemDataHourly.delete_rolled_up(
+                session, older_than=start + timedelta(days=1))
+            result = await session.execute(
+                select(func.count()).select_from(SystemDataRecord))
+            # Only the recent record is kept raw
+            assert result.scalar() == 1
+
+            await SystemProcessRecord.create_multiple(session, {
+                **g_data.system_processes_list[0],
+                "system_uid": g_data.system_dict["uid"],
+                "timestamp": start,
+            })
+            await SystemProcessRecord.delete_older_than(
+                session, older_than=start + timedelta(days=1))
+            result = await session.execute(
+                select(func.count()).select_from(SystemProcessRecord))
+            # Only the processes of the fixture record are kept
+            assert result.scalar() == len(g_data.system_processes_list)